@@ -0,0 +1,387 @@
+"""찡긋봇 핫패스 마이크로벤치마크.
+
+디스코드에 접속하지 않고(가짜 길드/멤버 객체 사용) 다음 경로의 성능을 측정합니다.
+
+- 상태 저장/로드 (json, sqlite, journal 백엔드 / 파티 10, 1천, 5만 개)
+- 파티 임베드의 참여자 목록 렌더링 (build_party_embed)
+- 모집/수정 폼의 날짜 파싱 (parse_party_time)
+- 리마인더/삭제 일정 복원과 마감 처리 (schedule_party_deadlines, DeadlineScheduler)
+- `!파티목록` 검색 (PartyIndex, 전체를 훑는 방식과 비교)
+
+사용법:
+    python bench.py                                  # 전체 실행, 결과를 bench_results.json에 저장
+    python bench.py --quick                          # 파티 5만 개 케이스 제외
+    python bench.py --only storage,scheduler         # 일부 그룹만 (storage,render,parse,scheduler,partylist)
+    python bench.py --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json --tolerance 0.25   # 기준보다 25% 이상 느려지면 종료 코드 1
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import platform
+import statistics
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+from storage import JsonStateStore, SqliteStateStore, JournalStateStore, empty_state
+from scheduler import DeadlineScheduler
+from party_index import PartyIndex, dungeon_key
+
+PARTY_COUNTS = (10, 1_000, 50_000)
+QUICK_PARTY_COUNTS = (10, 1_000)
+PARTICIPANT_COUNTS = (8, 100, 1_000)
+ARCANA = ("세이크리드 가드", "다크 메이지", "세인트 바드", "블래스트 랜서", "엘레멘탈 나이트", "알케믹 스팅어", "포비든 알케미스트", "배리어블 거너")
+
+
+# === 측정 도우미 ===
+def measure(func, repeat: int = 5, number: int = 1, setup=None) -> dict:
+    """func를 number번 실행하는 것을 repeat번 반복해 1회당 소요 시간(초)의 통계를 반환합니다."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - started) / number)
+    return {
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    """저장소의 print 출력을 숨깁니다."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def make_state(party_count: int, participants_per_party: int = 6) -> dict:
+    """가짜 파티 party_count개가 들어 있는 상태를 만듭니다."""
+    rng = random.Random(party_count)
+    now = datetime.now(timezone.utc)
+    state = empty_state()
+    state["role_message_id"] = 1
+    state["initial_message_id"] = 2
+    for i in range(party_count):
+        party_time = now + timedelta(minutes=rng.randint(30, 60 * 24 * 30))
+        state["party_infos"][str(10**17 + i)] = {
+            "dungeon": f"던전{i % 37}",
+            "date": f"{party_time.month}/{party_time.day}",
+            "time": f"{party_time.hour:02d}:{party_time.minute:02d}",
+            "reminder_time": party_time - timedelta(minutes=10),
+            "party_time": party_time,
+            "participants": {str(2 * 10**17 + i * 100 + j): rng.choice(ARCANA) for j in range(participants_per_party)},
+            "embed_msg_id": 3 * 10**17 + i,
+            "owner_id": 2 * 10**17 + i * 100,
+        }
+    return state
+
+
+# === 상태 저장/로드 ===
+def bench_storage(results: dict, party_counts):
+    for party_count in party_counts:
+        state = make_state(party_count)
+        repeat = 3 if party_count >= 50_000 else 5
+        with tempfile.TemporaryDirectory() as tmp:
+            stores = {
+                "json": lambda: JsonStateStore(os.path.join(tmp, "state.json"), lambda: state),
+                "sqlite": lambda: SqliteStateStore(os.path.join(tmp, "state.db"), lambda: state),
+                "journal": lambda: JournalStateStore(os.path.join(tmp, "state.journal"), os.path.join(tmp, "state.snapshot.json"),
+                                                     lambda: state, snapshot_every=10**9),
+            }
+            for backend, make_store in stores.items():
+                with quiet():
+                    store = make_store()
+
+                    def save_full():
+                        store.mark_dirty()
+                        store.flush_sync()
+
+                    results[f"storage.save_full.{backend}.{party_count}"] = measure(save_full, repeat=repeat)
+
+                    thread_id = next(iter(state["party_infos"]))
+                    counter = iter(range(10**9))
+
+                    def save_one_join():
+                        store.participant_joined(thread_id, 9 * 10**17 + next(counter), ARCANA[0])
+                        store.flush_sync()
+
+                    results[f"storage.save_one_join.{backend}.{party_count}"] = measure(save_one_join, repeat=repeat, number=20)
+                    results[f"storage.load.{backend}.{party_count}"] = measure(lambda: make_store().load(), repeat=repeat)
+                    if backend == "sqlite":
+                        store.conn.close()
+        print(f"  storage: 파티 {party_count}개 완료")
+
+
+# === 임베드 렌더링 / 날짜 파싱 (extensions/party.py 필요) ===
+class FakeAsset:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeMember:
+    def __init__(self, user_id: int, display_name: str):
+        self.id = user_id
+        self.display_name = display_name
+        self.mention = f"<@{user_id}>"
+        self.avatar = FakeAsset(f"https://cdn.example/avatars/{user_id}.png")
+
+
+class FakeGuild:
+    def __init__(self, members: dict):
+        self.id = 1
+        self.members_by_id = members
+
+    def get_member(self, user_id: int):
+        return self.members_by_id.get(user_id)
+
+
+class FakeRuntime:
+    """렌더링 캐시만 가진 길드 런타임 대역."""
+    def __init__(self):
+        self.party_render_cache = {}
+        self.party_member_threads = {}
+
+
+def import_party():
+    """파티 확장(extensions/party.py)을 불러옵니다. discord.py 등 의존성이 없으면 None을 반환합니다."""
+    try:
+        with quiet():
+            from extensions import party
+        return party
+    except ImportError as e:
+        print(f"  ⚠️ extensions/party.py를 불러올 수 없어 건너뜁니다: {e}")
+        return None
+
+
+def bench_render(results: dict, party):
+    for participant_count in PARTICIPANT_COUNTS:
+        members = {}
+        participants = {}
+        for j in range(participant_count):
+            user_id = 2 * 10**17 + j
+            if j % 10:  # 10명 중 1명은 서버를 떠난 멤버
+                members[user_id] = FakeMember(user_id, f"참여자{j}")
+            participants[str(user_id)] = ARCANA[j % len(ARCANA)]
+        owner_id = 2 * 10**17 + 1
+        guild = FakeGuild(members)
+        info = {"dungeon": "브리레흐1-3관", "date": "7/10", "time": "20:30", "participants": participants, "owner_id": owner_id}
+
+        results[f"render.build_party_embed.{participant_count}"] = measure(lambda: party.build_party_embed(info, guild), number=20)
+        # 렌더링 캐시 사용 (참여자 한 명만 바뀐 상태에서 다시 그리기)
+        thread_id = 3 * 10**17 + participant_count
+        rt = FakeRuntime()
+        party.build_party_embed(info, guild, rt, thread_id)
+
+        first = str(2 * 10**17)
+
+        def render_one_changed():
+            participants[first] = ARCANA[1] if participants[first] == ARCANA[0] else ARCANA[0]
+            party.build_party_embed(info, guild, rt, thread_id)
+
+        results[f"render.build_party_embed_cached.{participant_count}"] = measure(render_one_changed, number=20)
+        party.forget_party_render(rt, thread_id)
+        embed = party.build_party_embed(info, guild)
+        results[f"render.embed_hash.{participant_count}"] = measure(lambda: party.embed_hash(embed), number=20)
+    print("  render 완료")
+
+
+def bench_parse(results: dict, party):
+    inputs = [(f"{m}/{d}", f"{h:02d}:{mi:02d}") for m in range(1, 13) for d in (1, 15, 28) for h in (0, 12, 23) for mi in (0, 30)]
+    results["parse.parse_party_time"] = measure(lambda: [party.parse_party_time(d, t) for d, t in inputs], number=5)
+    results["parse.parse_party_time"]["per_call"] = results["parse.parse_party_time"]["median"] / len(inputs)
+
+    def parse_invalid():
+        try:
+            party.parse_party_time("13/40", "25:99")
+        except ValueError:
+            pass
+
+    results["parse.parse_party_time_invalid"] = measure(parse_invalid, number=200)
+    print("  parse 완료")
+
+
+# === 스케줄러 ===
+def bench_scheduler(results: dict, party_counts, party=None):
+    async def noop(key, when):
+        pass
+
+    for party_count in party_counts:
+        state = make_state(party_count, participants_per_party=0)
+
+        def rebuild():
+            scheduler = DeadlineScheduler({"reminder": noop, "archive": noop, "delete": noop})
+            for thread_id, info in state["party_infos"].items():
+                scheduler.schedule("reminder", thread_id, info["reminder_time"])
+                scheduler.schedule("delete", thread_id, info["party_time"])
+                scheduler.schedule("archive", thread_id, info["party_time"] + timedelta(hours=1))
+            return scheduler
+
+        results[f"scheduler.rebuild.{party_count}"] = measure(rebuild, repeat=3)
+
+        if party is not None:
+            from core import DEFAULT_GUILD_CONFIGS, YOUR_GUILD_ID, GuildConfig, GuildRuntime
+            rt = GuildRuntime(GuildConfig(YOUR_GUILD_ID, DEFAULT_GUILD_CONFIGS[str(YOUR_GUILD_ID)]))
+
+            def rebuild_main():
+                for thread_id, info in state["party_infos"].items():
+                    party.schedule_party_deadlines(rt, thread_id, info)
+
+            def reset_main():
+                rt.scheduler = DeadlineScheduler(rt.scheduler.handlers)
+
+            results[f"scheduler.schedule_party_deadlines.{party_count}"] = measure(rebuild_main, repeat=3, setup=reset_main)
+
+        scheduler = rebuild()
+        keys = list(state["party_infos"])
+
+        def reschedule():
+            key = random.choice(keys)
+            scheduler.schedule("reminder", key, datetime.now(timezone.utc) + timedelta(days=1))
+
+        results[f"scheduler.reschedule.{party_count}"] = measure(reschedule, number=1000)
+
+        # 모든 리마인더가 이미 지난 상태에서 한 번에 처리하는 시간 (예전 reminder_loop 한 바퀴에 해당)
+        async def fire_all():
+            fired = asyncio.Event()
+            remaining = [party_count]
+
+            async def count(key, when):
+                remaining[0] -= 1
+                if remaining[0] == 0:
+                    fired.set()
+
+            scheduler = DeadlineScheduler({"reminder": count})
+            past = datetime.now(timezone.utc) - timedelta(seconds=1)
+            for key in keys:
+                scheduler.schedule("reminder", key, past)
+            started = time.perf_counter()
+            scheduler.start()
+            await fired.wait()
+            elapsed = time.perf_counter() - started
+            await scheduler.close()
+            return elapsed
+
+        samples = [asyncio.run(fire_all()) for _ in range(3)]
+        results[f"scheduler.fire_all_due.{party_count}"] = {
+            "median": statistics.median(samples), "min": min(samples), "max": max(samples), "repeat": 3, "number": 1,
+        }
+    print("  scheduler 완료")
+
+
+# === 파티 목록 검색 ===
+def bench_partylist(results: dict, party_counts):
+
+    for party_count in party_counts:
+        party_infos = make_state(party_count, participants_per_party=4)["party_infos"]
+        index = PartyIndex()
+        results[f"partylist.index_rebuild.{party_count}"] = measure(lambda: index.rebuild(party_infos), repeat=3)
+
+        now = time.time()
+        week = (now + 86400, now + 8 * 86400)
+        results[f"partylist.query_dungeon.{party_count}"] = measure(lambda: index.query(dungeon="던전7", start=now), number=20)
+        results[f"partylist.query_range.{party_count}"] = measure(lambda: index.query(start=week[0], end=week[1]), number=20)
+
+        def scan_dungeon():
+            # 인덱스 없이 전부 훑고 정렬하는 방식 (비교용)
+            rows = [
+                (info["party_time"].timestamp(), thread_id) for thread_id, info in party_infos.items()
+                if dungeon_key("던전7") in dungeon_key(info["dungeon"]) and info["party_time"].timestamp() >= now
+            ]
+            return [thread_id for _, thread_id in sorted(rows)]
+
+        results[f"partylist.scan_dungeon.{party_count}"] = measure(scan_dungeon, number=20)
+
+        key = next(iter(party_infos))
+        info = party_infos[key]
+        results[f"partylist.index_update.{party_count}"] = measure(lambda: index.add(key, info), number=1000)
+    print("  partylist 완료")
+
+
+# === 기준 비교 ===
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """기준보다 (1 + tolerance)배 넘게 느려진 항목 목록을 반환합니다."""
+    regressions = []
+    print(f"\n{'벤치마크':<50} {'기준':>12} {'현재':>12} {'비율':>7}")
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<50} {'-':>12} {result['median'] * 1000:>10.3f}ms {'new':>7}")
+            continue
+        ratio = result["median"] / base["median"] if base["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            regressions.append((name, ratio))
+            flag = "  ❌"
+        print(f"{name:<50} {base['median'] * 1000:>10.3f}ms {result['median'] * 1000:>10.3f}ms {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="찡긋봇 핫패스 마이크로벤치마크")
+    parser.add_argument("--only", help="실행할 그룹 (storage,render,parse,scheduler,partylist)")
+    parser.add_argument("--quick", action="store_true", help="파티 5만 개 케이스를 건너뜁니다")
+    parser.add_argument("--output", default="bench_results.json", help="결과 JSON 파일 경로")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용하는 느려짐 비율 (기본 0.25 = 25%%)")
+    parser.add_argument("--save-baseline", help="이번 결과를 기준으로 저장할 경로")
+    args = parser.parse_args()
+
+    groups = set(args.only.split(",")) if args.only else {"storage", "render", "parse", "scheduler", "partylist"}
+    party_counts = QUICK_PARTY_COUNTS if args.quick else PARTY_COUNTS
+
+    results = {}
+    print("⏱️ 벤치마크 실행 중...")
+    party = import_party() if groups & {"render", "parse", "scheduler"} else None
+    if "storage" in groups:
+        bench_storage(results, party_counts)
+    if "render" in groups and party:
+        bench_render(results, party)
+    if "parse" in groups and party:
+        bench_parse(results, party)
+    if "scheduler" in groups:
+        bench_scheduler(results, party_counts, party)
+    if "partylist" in groups:
+        bench_partylist(results, party_counts)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ 결과 저장: {args.output} ({len(results)}개 항목)")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ 기준 저장: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ 성능 저하 {len(regressions)}건: " + ", ".join(f"{name} ({ratio:.2f}x)" for name, ratio in regressions))
+            sys.exit(1)
+        print("\n✅ 기준 대비 성능 저하 없음")
+    else:
+        for name, result in sorted(results.items()):
+            print(f"{name:<50} {result['median'] * 1000:>10.3f}ms")
+
+
+if __name__ == "__main__":
+    main_cli()
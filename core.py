@@ -0,0 +1,1163 @@
+import os
+import asyncio
+import time
+import functools
+from collections import OrderedDict
+from datetime import datetime
+from dotenv import load_dotenv
+import discord
+from discord.ext import commands
+import pytz
+from storage import create_store, empty_state
+from guild_config import GuildConfig, GuildConfigStore
+from scheduler import DeadlineScheduler
+from join_queue import JoinQueue
+from lease import LeaderLease
+from outbound import OutboundDispatcher, PRIORITY_ROLE
+from metrics import registry as metrics
+from log import debug_enabled, get_logger, set_debug
+
+log = get_logger("core")
+
+# === .env 로드 ===
+load_dotenv()
+TOKEN = os.getenv("DISCORD_TOKEN")
+
+# === 기본 길드 설정 ===
+# guilds.json이 없을 때 이 값들로 첫 길드 설정을 만듭니다. 이후에는 guilds.json의 길드별 설정을 씁니다.
+YOUR_GUILD_ID = 1388092210519605361 
+ROLE_SELECT_CHANNEL_ID = 1388211020576587786
+VERIFY_CHANNEL_ID = 1391373955507552296
+VERIFIED_ROLE_ID = 1390356825454416094
+GUEST_ROLE_ID = 1393038834106892379
+VERIFY_LOG_CHANNEL_ID = 1391756822763012190
+WELCOME_CHANNEL_ID = 1390643886656847983 
+
+# --- 인증 질문/답변 설정 ---
+VERIFY_QUESTION = "찡긋 디스코드 채널에 오신것을 환영합니다.\n안내받은 코드를 입력하세요.\n(코드가 없을 경우 승인이 불가합니다.)"
+VERIFY_ANSWER = "20211113"
+VERIFY_TIMEOUT = 60 # 답변 대기 시간 (초)
+
+# 역할 ID 목록 (직업 역할 + MBTI 역할)
+ROLE_IDS = {
+    "JOB": {
+        "세이크리드 가드": 1388109175703470241,
+        "다크 메이지": 1388109120141262858,
+        "세인트 바드": 1388109253000036384,
+        "블래스트 랜서": 1388109274315489404,
+        "엘레멘탈 나이트": 1388109205453537311,
+        "알케믹 스팅어": 1389897468761870428,
+        "포비든 알케미스트": 1389897592061558908,
+        "배리어블 거너": 1389897731463581736,
+    },
+    "MBTI": {
+        "ISTJ": 1391719641327599717,
+        "ISFJ": 1391789705716306063,
+        "INFJ": 1391789913942524095,
+        "INTJ": 1391788061448208524,
+        "ISTP": 1392017470323298334,
+        "ISFP": 1391789971702288536,
+        "INFP": 1391715412504350730,
+        "INTP": 1391790057798504570,
+        "ESTP": 1391790142464987156,
+        "ESFP": 1391790201902334133,
+        "ENFP": 1391790284131532800,
+        "ENTP": 1391790424829722794,
+        "ESTJ": 1391790662554484906,
+        "ESFJ": 1391790746016682056,
+        "ENFJ": 1391719175600345180,
+        "ENTJ": 1391790926036209835,
+    }
+}
+
+# 역할 버튼 이모지 맵
+EMOJI_MAP = {
+    "세이크리드 가드": "🛡️", "다크 메이지": "🔮", "세인트 바드": "🎵",
+    "블래스트 랜서": "⚔️", "엘레멘탈 나이트": "🗡️", "알케믹 스팅어": "🧪",
+    "포비든 알케미스트": "☠️", "배리어블 거너": "🔫",
+    "ISTJ": "🧱", "ISFJ": "💖", "INFJ": "💡", "INTJ": "🧠",
+    "ISTP": "🛠️", "ISFP": "🎨", "INFP": "🌸", "INTP": "🤔",
+    "ESTP": "⚡", "ESFP": "🥳", "ENFP": "🌈", "ENTP": "💡",
+    "ESTJ": "🏛️", "ESFJ": "🤝", "ENFJ": "🌟", "ENTJ": "👑",
+}
+
+# guilds.json이 없을 때 위 설정으로 만드는 기본 길드 설정
+DEFAULT_GUILD_CONFIGS = {
+    str(YOUR_GUILD_ID): {
+        "name": "찡긋",
+        "role_select_channel_id": ROLE_SELECT_CHANNEL_ID,
+        "verify_channel_id": VERIFY_CHANNEL_ID,
+        "verified_role_id": VERIFIED_ROLE_ID,
+        "guest_role_id": GUEST_ROLE_ID,
+        "verify_log_channel_id": VERIFY_LOG_CHANNEL_ID,
+        "welcome_channel_id": WELCOME_CHANNEL_ID,
+        "verify_question": VERIFY_QUESTION,
+        "verify_answer": VERIFY_ANSWER,
+        "verify_timeout": VERIFY_TIMEOUT,
+        "bot_nickname": "찡긋봇",
+        "role_ids": ROLE_IDS,
+        "emojis": EMOJI_MAP,
+    }
+}
+
+# 길드별 설정 파일. 한 프로세스로 여러 서버를 운영하려면 이 파일에 길드를 추가합니다.
+# 역할 ID와 이모지를 바꾼 뒤 봇 소유자가 `!설정리로드`를 쓰면 재시작 없이 반영됩니다.
+GUILD_CONFIG_FILE = os.getenv("GUILD_CONFIG_FILE", "guilds.json")
+guild_configs = GuildConfigStore(GUILD_CONFIG_FILE, DEFAULT_GUILD_CONFIGS)
+
+# 상태 저장 폴더. 길드마다 따로 저장합니다. (state/<길드 ID>.json 등)
+STATE_DIR = os.getenv("STATE_DIR", "state")
+# 길드별 저장 이전에 쓰던 파일명 (처음 실행할 때 기본 길드의 상태로 옮깁니다)
+DATA_FILE = "state.json" 
+STATE_DB_FILE = "state.db"
+STATE_JOURNAL_FILE = "state.journal"
+STATE_SNAPSHOT_FILE = "state.snapshot.json"
+
+# 리더 임대 파일. 같은 폴더를 쓰는 여러 프로세스(예: 재시작 중 겹친 이전/새 프로세스) 중
+# 임대를 가진 하나만 디스코드에 접속해 마감 작업을 돌리고 상태를 씁니다.
+LEASE_FILE = os.getenv("LEASE_FILE", os.path.join(STATE_DIR, "leader.db"))
+# 리더가 LEASE_TTL초 동안 연장하지 못하면 대기 중인 프로세스가 이어받습니다.
+LEASE_TTL = 6.0
+LEASE_HEARTBEAT = 2.0
+
+# 상태 저장소 백엔드:
+#   "json"    (기본값) state/<길드 ID>.json 통째로 저장
+#   "sqlite"  state/<길드 ID>.db에 행 단위로 저장
+#   "journal" 변경마다 state/<길드 ID>.journal에 한 줄 추가, JOURNAL_SNAPSHOT_EVERY개마다 스냅샷
+# sqlite/journal로 처음 실행하면 기존 JSON 상태에서 시작합니다.
+STATE_BACKEND = os.getenv("STATE_BACKEND", "json")
+
+# KST 시간대 정의 (UTC+9)
+KST = pytz.timezone('Asia/Seoul')
+
+# 상태 저장 최소 간격 (초). 이 시간 안에 일어난 변경들은 한 번의 저장으로 합쳐집니다.
+SAVE_INTERVAL = 2.0
+# journal은 한 줄 추가라 저렴하므로 더 자주 기록합니다. (죽었을 때 잃는 변경을 최소화)
+JOURNAL_FLUSH_INTERVAL = 0.1
+JOURNAL_SNAPSHOT_EVERY = 500
+
+# === 길드별 상태 ===
+# 길드 스케줄러가 다루는 마감 작업 종류와 처리 함수. (party 확장이 setup에서 등록)
+DEADLINE_KINDS = ("reminder", "archive", "delete")
+deadline_handlers = {}
+
+async def run_deadline(rt: "GuildRuntime", kind: str, key: str, when: datetime):
+    """마감 시각이 된 작업을 지금 등록된 처리 함수로 실행합니다."""
+    handler = deadline_handlers.get(kind)
+    if handler is None:
+        log.warning("⚠️ '%s' 마감 작업을 처리할 확장이 로드되지 않았습니다.", kind, guild_id=rt.guild_id, thread_id=key)
+        return
+    await handler(rt, key, when)
+
+# 입장 처리 (verify 확장이 setup에서 등록): "assign" 손님 역할 부여, "welcome" 환영 메시지, "spike" 급증 알림
+# 큐는 길드 런타임에 있으므로 확장을 다시 불러와도 대기 중인 입장은 그대로 처리됩니다.
+join_handlers = {}
+# 손님 역할을 동시에 부여하는 작업자 수
+JOIN_ROLE_CONCURRENCY = 4
+# 환영 메시지 한 개에 멘션할 최대 인원과 모으는 시간 (초). 급증 모드에서는 더 길게 모아 한 메시지만 보냅니다.
+WELCOME_BATCH_SIZE = 20
+WELCOME_BATCH_WINDOW = 3.0
+WELCOME_SPIKE_BATCH_WINDOW = 15.0
+# JOIN_SPIKE_WINDOW초에 JOIN_SPIKE_THRESHOLD명 이상 들어오면 급증 모드. 절반 아래로 JOIN_SPIKE_COOLDOWN초 유지되면 해제.
+JOIN_SPIKE_THRESHOLD = 10
+JOIN_SPIKE_WINDOW = 10.0
+JOIN_SPIKE_COOLDOWN = 60.0
+
+async def run_join_handler(rt: "GuildRuntime", name: str, *args):
+    """입장 큐가 부르는 처리 함수를 지금 등록된 것으로 실행합니다."""
+    handler = join_handlers.get(name)
+    if handler is None:
+        log.warning("⚠️ 입장 처리 '%s'를 맡을 확장이 로드되지 않았습니다.", name, guild_id=rt.guild_id)
+        return
+    await handler(rt, *args)
+
+def notify_join_spike(rt: "GuildRuntime", active: bool, rate: int):
+    metrics.inc("join_spikes_total" if active else "join_spikes_ended_total", guild=rt.guild_id)
+    handler = join_handlers.get("spike")
+    if handler is not None:
+        asyncio.get_running_loop().create_task(handler(rt, active, rate))
+
+def guild_state_paths(guild_id: int) -> dict:
+    base = os.path.join(STATE_DIR, str(guild_id))
+    return {
+        "json_path": f"{base}.json",
+        "db_path": f"{base}.db",
+        "journal_path": f"{base}.journal",
+        "snapshot_path": f"{base}.snapshot.json",
+    }
+
+def migrate_legacy_state(guild_id: int):
+    """길드별 저장 이전의 상태 파일(state.json 등)이 있으면 기본 길드의 파일로 옮깁니다."""
+    paths = guild_state_paths(guild_id)
+    if any(os.path.exists(path) for path in paths.values()):
+        return
+    legacy = {
+        DATA_FILE: paths["json_path"],
+        STATE_DB_FILE: paths["db_path"],
+        STATE_DB_FILE + "-wal": paths["db_path"] + "-wal",
+        STATE_DB_FILE + "-shm": paths["db_path"] + "-shm",
+        STATE_JOURNAL_FILE: paths["journal_path"],
+        STATE_SNAPSHOT_FILE: paths["snapshot_path"],
+    }
+    for old, new in legacy.items():
+        if os.path.exists(old):
+            os.replace(old, new)
+            log.info("📦 이전 상태 파일 %s -> %s 이동", old, new, guild_id=guild_id)
+
+def record_state_flush(guild_id: int, backend: str, coalesced: int, size: int, duration: float):
+    """상태 저장 한 번의 소요 시간과 기록한 크기를 지표로 남깁니다."""
+    metrics.observe("state_save_seconds", duration, backend=backend, guild=guild_id)
+    metrics.inc("state_save_bytes_total", size, backend=backend, guild=guild_id)
+    metrics.inc("state_save_mutations_total", coalesced, backend=backend, guild=guild_id)
+
+class GuildRuntime:
+    """길드 하나의 설정, 상태, 저장소, 스케줄러, 통계 인덱스를 묶어 둔 것.
+
+    길드마다 저장소와 스케줄러가 따로 있으므로, 큰 길드의 저장이나 마감 처리가
+    다른 길드를 막지 않습니다.
+    """
+
+    def __init__(self, config: GuildConfig):
+        self.config = config
+        self.guild_id = config.guild_id
+        self.state = empty_state()
+        self.store = create_store(
+            STATE_BACKEND, lambda: self.state, **guild_state_paths(self.guild_id),
+            min_interval=SAVE_INTERVAL, journal_interval=JOURNAL_FLUSH_INTERVAL, snapshot_every=JOURNAL_SNAPSHOT_EVERY,
+        )
+        self.store.on_flush = functools.partial(record_state_flush, self.guild_id, self.store.backend)
+        # 리마인더/보관/삭제 마감 시각을 하나의 heap으로 관리합니다. 키는 스레드 ID 문자열입니다.
+        # 처리 함수는 확장이 deadline_handlers에 등록하므로, 확장을 다시 불러와도 예약은 그대로 유지됩니다.
+        self.scheduler = DeadlineScheduler({
+            kind: functools.partial(run_deadline, self, kind) for kind in DEADLINE_KINDS
+        })
+        # 새 멤버 입장 파이프라인 (손님 역할 부여, 환영 메시지 묶음, 급증 감지)
+        self.join_queue = JoinQueue(
+            functools.partial(run_join_handler, self, "assign"),
+            functools.partial(run_join_handler, self, "welcome"),
+            functools.partial(notify_join_spike, self),
+            functools.partial(metrics.observe, "event_latency_seconds", event="join_queue"),
+            concurrency=JOIN_ROLE_CONCURRENCY, batch_size=WELCOME_BATCH_SIZE,
+            batch_window=WELCOME_BATCH_WINDOW, spike_batch_window=WELCOME_SPIKE_BATCH_WINDOW,
+            spike_threshold=JOIN_SPIKE_THRESHOLD, spike_window=JOIN_SPIKE_WINDOW, spike_cooldown=JOIN_SPIKE_COOLDOWN,
+        )
+        # 파티 임베드 캐시. 확장을 다시 불러와도 대기 중인 업데이트와 렌더링 캐시가 유지되도록 여기에 둡니다.
+        # 스레드 ID -> 임베드 메시지 핸들 (fetch 없이 바로 수정하기 위해 PartialMessage를 보관)
+        self.party_embed_messages = {}
+        # 스레드 ID -> 마지막으로 반영한 임베드 내용의 해시 (내용이 같으면 수정을 건너뜀)
+        self.party_embed_hashes = {}
+        # 스레드 ID -> 대기 중인 지연 업데이트 작업
+        self.party_embed_update_tasks = {}
+        # 스레드 ID -> {"lines": {참여자 ID 문자열: (아르카나, 렌더링된 줄)}, "footer": (모집자 ID, 문구, 아이콘 URL)}
+        self.party_render_cache = {}
+        # 멤버 ID -> 그 멤버가 참여자/모집자로 렌더링된 파티 스레드 ID 집합 (멤버 정보가 바뀌면 해당 줄만 지움)
+        self.party_member_threads = {}
+        # 파티 시간/던전/모집자 인덱스(!파티목록)와 끝난 파티 기록(!파티통계). party 확장이 길드를 시작할 때 만듭니다.
+        self.party_index = None
+        self.history = None
+        # MBTI 역할별 인원 수 인덱스 (!mbti통계에서 사용)
+        self.mbti_index = RoleCountIndex(config.role_id_sets["MBTI"])
+        # 시작 시 정리 작업을 이미 마쳤는지 (재접속으로 다시 불리면 건너뜀)와 단계별 소요 시간 (초)
+        self.reconciled = False
+        self.startup_timings = {}
+
+    @property
+    def party_infos(self) -> dict:
+        return self.state["party_infos"]
+
+    def load(self):
+        self.state = self.store.load()
+
+    def apply_config(self, config: GuildConfig) -> GuildConfig:
+        """다시 읽은 설정으로 바꾸고 이전 설정을 반환합니다. MBTI 역할이 바뀌면 통계 인덱스를 새로 만듭니다."""
+        old, self.config = self.config, config
+        if old.role_id_sets["MBTI"] != config.role_id_sets["MBTI"]:
+            self.mbti_index = RoleCountIndex(config.role_id_sets["MBTI"])
+        return old
+
+# 길드 ID -> GuildRuntime
+guilds = {}
+
+def get_runtime(guild):
+    """길드(또는 길드 ID)의 런타임을 반환합니다. 설정되지 않은 길드면 None."""
+    if guild is None:
+        return None
+    return guilds.get(guild if isinstance(guild, int) else guild.id)
+
+def add_guild(config: GuildConfig) -> GuildRuntime:
+    """길드 런타임을 만들고 저장된 상태를 불러옵니다."""
+    rt = guilds[config.guild_id] = GuildRuntime(config)
+    rt.load()
+    log.info("✅ 길드 '%s' 상태 로드: 파티 %d개", config.name, len(rt.party_infos), guild_id=config.guild_id)
+    return rt
+
+def load_guilds():
+    """길드 설정을 읽고 길드마다 저장된 상태를 불러옵니다."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    configs = guild_configs.load()
+    if YOUR_GUILD_ID in configs:
+        migrate_legacy_state(YOUR_GUILD_ID)
+    for config in configs.values():
+        add_guild(config)
+
+leader_lease = LeaderLease(LEASE_FILE, ttl=LEASE_TTL, heartbeat=LEASE_HEARTBEAT)
+
+async def on_leader_lost():
+    """리더 임대를 잃으면 (다른 프로세스가 이어받았으므로) 마감 작업과 쓰기를 멈추고 접속을 끊습니다."""
+    for rt in guilds.values():
+        await rt.scheduler.close()
+        await rt.join_queue.close()
+        await rt.store.close(flush=False)
+    await bot.close()
+
+leader_lease.on_lost = on_leader_lost
+
+# === 인텐트 및 봇 초기화 ===
+# 큰 서버에서 멤버 캐시가 차지하는 메모리와 시작 시 멤버 목록을 받는 시간을 줄이는 모드 (LOW_MEMORY_MODE=1)
+LOW_MEMORY_MODE = os.getenv("LOW_MEMORY_MODE") == "1"
+# 저메모리 모드에서 ID로 불러온 멤버를 기억해 둘 최대 수
+MEMBER_LRU_SIZE = 2000
+# 저메모리 모드에서 MBTI 통계 인덱스를 멤버 목록으로 다시 맞추는 주기 (초).
+# 캐시에 없는 멤버의 역할 변경/퇴장 이벤트는 오지 않으므로 봇이 직접 바꾼 역할만 바로 반영됩니다.
+MBTI_INDEX_MAX_AGE = 6 * 3600
+# 프로세스 시작 시각 (시작 소요 시간 보고용)
+PROCESS_STARTED = time.monotonic()
+intents = discord.Intents.default()
+intents.message_content = True
+intents.members = True
+# 여러 길드를 한 프로세스로 운영하므로 샤드를 자동으로 나눠 게이트웨이 부하를 분산합니다.
+# 저메모리 모드에서는 멤버를 캐시에 쌓지 않고(봇 자신만) 시작 시 전체 멤버 목록(chunk)도 받지 않습니다.
+# 봇은 역할 버튼/인증처럼 인터랙션에 함께 오는 멤버 정보로 대부분 처리하고, 파티 임베드·리마인더 멘션·
+# MBTI 통계처럼 다른 멤버가 필요할 때만 ID로 불러와 LRU에 잠깐 둡니다. (아래 "멤버 조회" 참고)
+bot = commands.AutoShardedBot(
+    command_prefix="!", intents=intents, help_command=None,
+    member_cache_flags=discord.MemberCacheFlags.none() if LOW_MEMORY_MODE else discord.MemberCacheFlags.from_intents(intents),
+    chunk_guilds_at_startup=not LOW_MEMORY_MODE,
+)
+# 429 대기 시간이 이보다 길면 discord.py가 기다리지 않고 RateLimited를 발생시킵니다.
+# 디스패처가 이를 받아 해당 경로만 멈추고(작업은 보관) 다른 작업을 먼저 처리합니다. 이보다 짧은 429는
+# discord.py가 요청 안에서 기다렸다가 다시 보내므로 그동안 작업자 하나가 묶입니다.
+# 생성자 인자는 30초 미만을 30초로 올리므로 첫 요청 전에 HTTP 클라이언트에 직접 넣습니다. (버킷마다 생성 시 복사)
+# 디스패처를 거치지 않는 호출(명령어 응답 ctx.send, 슬래시 명령어 등록)은 이보다 긴 429에서 그대로 실패합니다.
+OUTBOUND_MAX_RATELIMIT_TIMEOUT = 2.0
+bot.http.max_ratelimit_timeout = OUTBOUND_MAX_RATELIMIT_TIMEOUT
+
+# 디스코드 API로 나가는 호출(리마인더, 역할 변경, 로그, 스레드 정리, 임베드 수정)을 우선순위대로 처리합니다.
+OUTBOUND_WORKERS = 4
+OUTBOUND_BACKLOG_LIMIT = 50
+outbound = OutboundDispatcher(workers=OUTBOUND_WORKERS, backlog_limit=OUTBOUND_BACKLOG_LIMIT)
+
+# 설정하면 http://127.0.0.1:<포트>/metrics 에서 Prometheus 형식 지표를 볼 수 있습니다.
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+def instrument_http(http):
+    """모든 REST 호출을 경로별로 세고 소요 시간을 기록하도록 HTTP 클라이언트를 감쌉니다."""
+    original_request = http.request
+
+    async def request(route, **kwargs):
+        started = time.perf_counter()
+        status = "ok"
+        try:
+            return await original_request(route, **kwargs)
+        except discord.HTTPException as e:
+            status = str(e.status)
+            raise
+        except Exception as e:
+            status = type(e).__name__
+            raise
+        finally:
+            metrics.inc("discord_rest_requests_total", method=route.method, route=route.path, status=status)
+            metrics.observe("discord_rest_request_seconds", time.perf_counter() - started, method=route.method, route=route.path)
+
+    http.request = request
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.metrics_started = time.perf_counter()
+
+@bot.after_invoke
+async def record_command_latency(ctx):
+    started = getattr(ctx, "metrics_started", None)
+    if started is not None and ctx.command:
+        metrics.observe("command_latency_seconds", time.perf_counter() - started, command=ctx.command.qualified_name)
+
+def roles_route(guild) -> str:
+    """멤버 역할 변경 API는 길드 단위로 요청 제한이 걸리므로 길드별 경로를 씁니다."""
+    return f"guild:{guild.id}:roles"
+
+# 마지막으로 보낸 역할 목록을 기억하는 시간(초). 게이트웨이 이벤트로 멤버 캐시가 갱신되기 전에
+# 같은 멤버의 다음 변경이 오면 캐시 대신 보낸 목록을 기준으로 계산합니다.
+MEMBER_ROLE_STATE_TTL = 10.0
+
+class MemberRoleState:
+    """멤버 한 명의 역할 변경을 한 번에 하나씩 처리하기 위한 잠금과 마지막으로 보낸 역할 목록."""
+    __slots__ = ("lock", "users", "base", "applied", "expires_at")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+        self.base = None      # 역할 목록을 보낼 때 멤버 캐시에 있던 역할 ID 집합
+        self.applied = None   # 보낸 역할 ID 집합
+        self.expires_at = 0.0
+
+# 멤버 ID -> MemberRoleState (역할을 바꾸는 중이거나 최근에 바꾼 멤버만)
+member_role_states = {}
+
+def _expire_member_role_state(member_id: int, state: MemberRoleState):
+    if member_role_states.get(member_id) is state and state.users == 0 and time.monotonic() >= state.expires_at:
+        del member_role_states[member_id]
+
+async def edit_member_roles(member: discord.Member, add=(), remove=(), *, priority: int = PRIORITY_ROLE, reason: str = None) -> bool:
+    """멤버의 목표 역할 집합을 계산해 `member.edit(roles=...)` 한 번으로 바꿉니다.
+
+    같은 멤버에 대한 변경은 순서대로 하나씩 처리되므로, 빠른 연속 클릭이 서로의 결과를 덮어쓰지 않습니다.
+    바뀔 것이 없으면 API를 호출하지 않고 False를 반환합니다.
+    """
+    state = member_role_states.get(member.id)
+    if state is None:
+        state = member_role_states[member.id] = MemberRoleState()
+    state.users += 1
+    try:
+        async with state.lock:
+            guild = member.guild
+            cached = guild.get_member(member.id) or member
+            cached_ids = frozenset(role.id for role in cached.roles if role.id != guild.id)
+            current = state.applied if state.applied is not None and state.base == cached_ids else cached_ids
+            target = (current - {role.id for role in remove}) | {role.id for role in add}
+            if target == current:
+                return False
+            await outbound.call(
+                priority, roles_route(guild),
+                lambda: cached.edit(roles=[discord.Object(id=role_id) for role_id in target], reason=reason),
+            )
+            state.base, state.applied = cached_ids, target
+            if guild.get_member(member.id) is None:
+                # 캐시에 없는 멤버는 역할 변경 이벤트가 오지 않으므로 통계 인덱스에 직접 반영합니다. (저메모리 모드)
+                rt = get_runtime(guild)
+                if rt is not None:
+                    rt.mbti_index.role_ids_changed(member.id, current, target)
+            return True
+    finally:
+        state.users -= 1
+        if state.users == 0:
+            state.expires_at = time.monotonic() + MEMBER_ROLE_STATE_TTL
+            asyncio.get_running_loop().call_later(MEMBER_ROLE_STATE_TTL, _expire_member_role_state, member.id, state)
+
+@bot.event
+async def setup_hook():
+    """로그인 직후 한 번 실행됩니다. 대기(standby) 프로세스도 임대를 기다리기 전에 미리 실행합니다.
+
+    디스패처를 시작하고 확장을 불러온 뒤 설정된 길드마다 슬래시 명령어를 등록합니다.
+    길드 상태는 이전 리더가 마지막으로 저장한 내용을 읽어야 하므로 임대를 얻은 뒤 start_guilds()에서 읽습니다.
+    """
+    outbound.start()
+    instrument_http(bot.http)
+
+    # 기능 확장을 불러옵니다. (각 확장이 영구 뷰, 명령어, 마감 작업 처리 함수를 등록)
+    await load_extensions()
+
+    # `/모집` 등 하이브리드 명령어를 각 길드에 바로 반영되도록 등록합니다. (설정 파일만 읽음)
+    await sync_guild_commands(guild_configs.load())
+
+async def start_guilds():
+    """(리더 임대를 얻은 뒤) 길드 상태를 읽고 저장/마감/입장 작업을 시작합니다. 이후에는 게이트웨이 접속만 남습니다."""
+    if METRICS_PORT:
+        try:
+            await metrics.serve("127.0.0.1", int(METRICS_PORT))
+        except Exception as e:
+            log.error("❌ 지표 엔드포인트 시작 실패: %s", e)
+    load_guilds()
+    for rt in guilds.values():
+        start_guild(rt)
+    # 대기 중에 설정 파일에 새로 추가된 길드만 여기서 등록합니다.
+    await sync_guild_commands(guilds)
+
+def start_guild(rt: GuildRuntime):
+    """길드의 저장/마감/입장 작업을 시작하고, 확장이 등록한 준비 작업(예: 마감 일정 복원)을 실행합니다."""
+    rt.store.start()
+    rt.scheduler.start()
+    rt.join_queue.start()
+    for name, starter in list(guild_starters.items()):
+        try:
+            starter(rt)
+        except Exception as e:
+            log.exception("❌ 길드 준비 작업 '%s' 실패: %s", name, e, guild_id=rt.guild_id)
+
+# 슬래시 명령어를 이미 등록한 길드 ID
+synced_command_guilds = set()
+
+async def sync_guild_commands(guild_ids):
+    """아직 등록하지 않은 길드에 슬래시 명령어를 등록합니다."""
+    for guild_id in guild_ids:
+        if guild_id in synced_command_guilds:
+            continue
+        bot.tree.copy_global_to(guild=discord.Object(id=guild_id))
+        try:
+            try:
+                await bot.tree.sync(guild=discord.Object(id=guild_id))
+            except discord.RateLimited as e:
+                # 디스패처를 거치지 않으므로 긴 429는 여기서 한 번 기다렸다가 다시 등록합니다.
+                log.warning("⚠️ 슬래시 명령어 등록이 요청 제한(429)에 걸려 %.1f초 후 다시 시도합니다.", e.retry_after, guild_id=guild_id)
+                await asyncio.sleep(e.retry_after)
+                await bot.tree.sync(guild=discord.Object(id=guild_id))
+            synced_command_guilds.add(guild_id)
+            log.info("✅ 슬래시 명령어 등록 완료", guild_id=guild_id)
+        except Exception as e:
+            log.error("❌ 슬래시 명령어 등록 실패: %s", e, guild_id=guild_id)
+
+# === 확장 (기능 모듈) ===
+# 기능별 확장. 코드를 고치면 프로세스를 재시작하지 않고 해당 확장만 다시 불러올 수 있습니다.
+# (게이트웨이 연결, 멤버 캐시, 길드 상태는 이 모듈에 있으므로 그대로 유지됩니다.)
+EXTENSIONS = [
+    "extensions.roles",
+    "extensions.verify",
+    "extensions.party",
+    "extensions.mbti",
+    "extensions.help",
+]
+
+# 시작 정리 단계 이름 -> async def reconciler(rt, guild). 확장이 setup에서 등록합니다.
+guild_reconcilers = {}
+# 길드 상태를 읽은 직후 실행할 준비 작업 이름 -> def starter(rt). 확장이 setup에서 등록합니다.
+# (대기 프로세스는 길드 상태보다 확장을 먼저 불러오므로, 상태에 의존하는 준비는 여기서 합니다)
+guild_starters = {}
+
+async def load_extensions():
+    for name in EXTENSIONS:
+        try:
+            await bot.load_extension(name)
+            log.info("🧩 확장 로드: %s", name)
+        except commands.ExtensionError as e:
+            log.exception("❌ 확장 로드 실패 (%s): %s", name, e)
+
+def copy_commands_to_guilds():
+    """전역 앱 명령어를 설정된 길드마다 복사합니다. (REST 호출 없이 로컬 트리만 갱신)"""
+    for guild_id in guilds:
+        bot.tree.copy_global_to(guild=discord.Object(id=guild_id))
+
+def resolve_extension(name: str) -> str:
+    """`party`처럼 짧은 이름도 받아 `extensions.party`로 바꿉니다."""
+    return name if name.startswith("extensions.") else f"extensions.{name}"
+
+async def reload_extension(name: str) -> float:
+    """확장 하나를 다시 불러옵니다. 실패하면 이전 버전이 그대로 남습니다. 걸린 시간(초)을 반환합니다."""
+    name = resolve_extension(name)
+    started = time.perf_counter()
+    if name in bot.extensions:
+        await bot.reload_extension(name)
+    else:
+        await bot.load_extension(name)
+    # 길드별로 복사해 둔 슬래시 명령어가 새 함수를 가리키도록 다시 복사합니다.
+    copy_commands_to_guilds()
+    duration = time.perf_counter() - started
+    metrics.inc("extension_reloads_total", extension=name)
+    log.info("🔄 확장 다시 로드: %s", name, duration=duration)
+    return duration
+
+@bot.command(name="리로드")
+@commands.is_owner()
+async def reload_command(ctx, *names: str):
+    """(봇 소유자) 확장을 다시 불러옵니다. 이름을 생략하면 전체를 다시 불러옵니다. (예: !리로드 party)"""
+    results = []
+    for name in names or EXTENSIONS:
+        try:
+            duration = await reload_extension(name)
+            results.append(f"✅ `{resolve_extension(name)}` {duration * 1000:.0f}ms")
+        except commands.ExtensionError as e:
+            results.append(f"❌ `{resolve_extension(name)}` {e}")
+    await ctx.send("\n".join(results))
+
+# 종료 요청을 받으면 진행 중인 인터랙션/명령어와 API 큐를 최대 이 시간(초)까지 기다린 뒤 접속을 끊습니다.
+SHUTDOWN_DRAIN_TIMEOUT = 10.0
+# 기다릴 작업: discord.py가 뷰/모달 콜백, 슬래시 명령어, 이벤트 핸들러에 붙이는 태스크 이름과 파티 임베드 지연 업데이트
+IN_FLIGHT_TASK_PREFIXES = (
+    "discord-ui-view-dispatch-", "discord-ui-modal-dispatch-", "CommandTree-invoker", "discord.py: on_", "party-embed-",
+)
+shutting_down = False
+
+async def graceful_shutdown(reason: str):
+    """진행 중인 처리를 마무리할 시간을 준 뒤 접속을 끊습니다. 상태 저장과 임대 반납은 main.run_bot이 이어서 합니다."""
+    global shutting_down
+    if shutting_down:
+        return
+    shutting_down = True
+    started = time.perf_counter()
+    current = asyncio.current_task()
+    pending = [
+        task for task in asyncio.all_tasks()
+        if task is not current and not task.done() and task.get_name().startswith(IN_FLIGHT_TASK_PREFIXES)
+    ]
+    log.info("🛑 종료 시작 (%s): 진행 중인 처리 %d건, 최대 %.0f초 대기", reason, len(pending), SHUTDOWN_DRAIN_TIMEOUT)
+    unfinished = 0
+    if pending:
+        _, not_done = await asyncio.wait(pending, timeout=SHUTDOWN_DRAIN_TIMEOUT)
+        unfinished = len(not_done)
+    for rt in guilds.values():
+        # 실행 중인 마감 작업(스레드 삭제와 파티 기록, 리마인더)을 마치게 하고, 새 마감 작업은 시작하지 않습니다.
+        await rt.scheduler.close(timeout=max(0.0, SHUTDOWN_DRAIN_TIMEOUT - (time.perf_counter() - started)))
+    for rt in guilds.values():
+        # 큐에 남은 새 멤버의 손님 역할 부여를 먼저 마칩니다.
+        await rt.join_queue.drain(max(0.0, SHUTDOWN_DRAIN_TIMEOUT - (time.perf_counter() - started)))
+    drained = await outbound.drain(max(0.0, SHUTDOWN_DRAIN_TIMEOUT - (time.perf_counter() - started)))
+    log.info(
+        "🛑 정리 완료" + (f", 끝나지 않은 처리 {unfinished}건" if unfinished else "")
+        + ("" if drained else f", 남은 API 호출 {outbound.stats()['total_depth']}건"),
+        duration=time.perf_counter() - started,
+    )
+    await bot.close()
+
+@bot.command(name="디버그")
+@commands.is_owner()
+async def debug_command(ctx, switch: str = None):
+    """(봇 소유자) 상세(DEBUG) 로그를 켜거나 끕니다. (예: !디버그 켜기, !디버그 끄기)"""
+    if switch in ("켜기", "on"):
+        set_debug(True)
+    elif switch in ("끄기", "off"):
+        set_debug(False)
+    await ctx.send(f"🔍 상세 로그: {'켜짐' if debug_enabled() else '꺼짐'}")
+
+async def handle_control_line(line: str):
+    """감시 프로세스(watcher.py)가 표준 입력으로 보내는 제어 명령을 처리합니다. (예: `reload extensions.party`, `debug on`)"""
+    command, _, arg = line.strip().partition(" ")
+    if command == "debug" and arg in ("on", "off"):
+        set_debug(arg == "on")
+        log.info("🔍 상세 로그 %s", "켜짐" if arg == "on" else "꺼짐")
+        return
+    if command != "reload" or not arg:
+        if command:
+            log.warning("⚠️ 알 수 없는 제어 명령: %s", line.strip())
+        return
+    if not bot.is_ready():
+        log.info("ℹ️ 아직 준비되지 않아 확장 다시 로드를 건너뜁니다: %s", arg)
+        return
+    try:
+        await reload_extension(arg)
+    except commands.ExtensionError as e:
+        log.exception("❌ 확장 다시 로드 실패 (%s): %s", arg, e)
+
+# === 공통 UI 도우미 ===
+
+async def reply_unconfigured(interaction: discord.Interaction):
+    await interaction.response.send_message("⚠️ 이 서버는 봇 길드 설정(guilds.json)에 등록되어 있지 않습니다.", ephemeral=True)
+
+def role_emoji(config: GuildConfig, role_name: str) -> str:
+    return config.emojis.get(role_name) or EMOJI_MAP.get(role_name, "❓")
+
+
+## 멤버 조회 (저메모리 모드)
+
+
+class MemberLRU:
+    """ID로 불러온 멤버를 최근 사용 순으로 최대 maxsize명까지 기억합니다. 서버를 떠난 멤버는 None으로 기억합니다."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()   # (길드 ID, 멤버 ID) -> Member 또는 None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self.entries
+
+    def get(self, guild_id: int, user_id: int):
+        key = (guild_id, user_id)
+        member = self.entries.get(key)
+        if member is None and key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return member
+
+    def put(self, guild_id: int, user_id: int, member):
+        key = (guild_id, user_id)
+        self.entries[key] = member
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def discard(self, guild_id: int, user_id: int):
+        self.entries.pop((guild_id, user_id), None)
+
+member_lru = MemberLRU(MEMBER_LRU_SIZE)
+# 한 번에 REST로 불러오는 멤버 수 (길드 멤버 조회는 길드 단위로 요청 제한이 걸림)
+MEMBER_FETCH_CONCURRENCY = 4
+
+def lookup_member(guild: discord.Guild, user_id: int):
+    """멤버 캐시, 없으면 LRU에서 멤버를 찾습니다. API를 호출하지 않으며 모르면 None을 반환합니다."""
+    member = guild.get_member(user_id)
+    if member is None and LOW_MEMORY_MODE:
+        member = member_lru.get(guild.id, user_id)
+    return member
+
+def remember_member(member):
+    """인터랙션 등으로 받은 멤버 정보를 LRU에 넣어 둡니다. (멤버 캐시를 쓰는 모드에서는 하지 않음)"""
+    if LOW_MEMORY_MODE and isinstance(member, discord.Member) and member.guild.get_member(member.id) is None:
+        member_lru.put(member.guild.id, member.id, member)
+
+async def resolve_members(guild: discord.Guild, user_ids):
+    """캐시와 LRU에 없는 멤버만 REST로 불러와 LRU에 넣습니다. (저메모리 모드에서만 동작)
+
+    파티 임베드나 리마인더 멘션처럼 특정 멤버들이 필요할 때 부르고, 이후에는 lookup_member로 찾습니다.
+    """
+    if not LOW_MEMORY_MODE:
+        return
+    missing = {
+        user_id for user_id in user_ids
+        if guild.get_member(user_id) is None and (guild.id, user_id) not in member_lru
+    }
+    if not missing:
+        return
+    semaphore = asyncio.Semaphore(MEMBER_FETCH_CONCURRENCY)
+
+    async def fetch(user_id: int):
+        async with semaphore:
+            try:
+                member = await guild.fetch_member(user_id)
+            except discord.NotFound:
+                member = None
+            except discord.HTTPException as e:
+                log.warning("멤버 조회 실패: %s", e, guild_id=guild.id, user_id=user_id)
+                return
+            member_lru.put(guild.id, user_id, member)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch(user_id) for user_id in missing))
+    metrics.inc("member_fetches_total", len(missing))
+    log.debug("멤버 %d명 조회", len(missing), guild_id=guild.id, duration=time.perf_counter() - started)
+
+async def iter_guild_members(guild: discord.Guild):
+    """길드의 모든 멤버를 하나씩 돌려줍니다.
+
+    멤버 캐시가 채워져 있으면 캐시를, 저메모리 모드에서는 REST로 1000명씩 받아 캐시에 쌓지 않고 넘겨줍니다.
+    """
+    if not LOW_MEMORY_MODE or guild.chunked:
+        for member in guild.members:
+            yield member
+        return
+    async for member in guild.fetch_members(limit=None):
+        yield member
+
+@bot.event
+async def on_member_join(member: discord.Member):
+    """다시 들어온 멤버가 LRU에 '나간 멤버'로 남아 있지 않도록 지웁니다. (필요할 때 다시 불러옴)"""
+    member_lru.discard(member.guild.id, member.id)
+
+@bot.event
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    """캐시에 없는 멤버가 나가도 LRU에서는 지웁니다."""
+    member_lru.discard(payload.guild_id, payload.user.id)
+
+def process_memory_bytes():
+    """현재 프로세스의 상주 메모리(RSS) 크기를 바이트로 반환합니다. 알 수 없으면 None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 리눅스 외에는 /proc이 없으므로 최대 사용량으로 대신합니다. (macOS는 바이트, 그 외는 KB)
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+## MBTI 통계 인덱스
+
+
+class RoleCountIndex:
+    """역할 ID별 보유 멤버 수를 멤버 이벤트로 갱신하는 인덱스.
+
+    시작 시 멤버 캐시로 한 번 만들고, 이후에는 역할 변경/입장/퇴장 이벤트마다 증감만 하므로
+    통계 명령어가 REST 호출 없이 바로 답할 수 있습니다.
+
+    다시 만드는 동안에는 새 집계를 따로 모으고 다 센 뒤 한 번에 바꿉니다. 그 사이에 온 이벤트 중
+    이미 센 멤버(멤버 목록은 ID 오름차순으로 받으므로 지금까지 센 가장 큰 ID 이하)의 변경은
+    따로 모아 두었다가 새 집계에 더하므로, 다시 만드는 중의 변경이 사라지지 않습니다.
+    """
+
+    def __init__(self, role_ids):
+        self.role_ids = set(role_ids)
+        self.counts = {role_id: 0 for role_id in self.role_ids}
+        self.ready = False
+        self.built_at = 0.0
+        self.lock = asyncio.Lock()
+        self._rebuild_cursor = None   # 다시 만드는 중이면 지금까지 센 멤버 ID 중 가장 큰 값
+        self._rebuild_deltas = None   # 다시 만드는 중에 이미 센 멤버에게 생긴 변경 (역할 ID -> 증감)
+
+    def _tracked(self, member) -> set:
+        return {role.id for role in member.roles} & self.role_ids
+
+    def rebuild(self, members):
+        """멤버 목록으로 인덱스를 처음부터 다시 만듭니다."""
+        counts = {role_id: 0 for role_id in self.role_ids}
+        for member in members:
+            for role_id in self._tracked(member):
+                counts[role_id] += 1
+        self._set(counts)
+
+    async def rebuild_from(self, members):
+        """비동기 멤버 목록(iter_guild_members)으로 인덱스를 다시 만듭니다. 멤버를 모아 두지 않고 세기만 합니다.
+
+        다 셀 때까지 기존 집계로 계속 답하고, 끝나면 그 사이의 변경을 더한 새 집계로 바꿉니다.
+        """
+        counts = {role_id: 0 for role_id in self.role_ids}
+        self._rebuild_cursor, self._rebuild_deltas = 0, {}
+        try:
+            async for member in members:
+                for role_id in self._tracked(member):
+                    counts[role_id] += 1
+                self._rebuild_cursor = max(self._rebuild_cursor, member.id)
+            for role_id, delta in self._rebuild_deltas.items():
+                counts[role_id] += delta
+            self._set(counts)
+        finally:
+            self._rebuild_cursor = self._rebuild_deltas = None
+
+    def _set(self, counts: dict):
+        self.counts = counts
+        self.ready = True
+        self.built_at = time.monotonic()
+
+    async def verify(self, members) -> dict:
+        """멤버 목록과 비교해 어긋난 역할을 {역할 ID: (인덱스 값, 실제 값)}으로 반환하고 인덱스를 다시 만듭니다."""
+        before = self.counts
+        await self.rebuild_from(members)
+        return {
+            role_id: (before.get(role_id, 0), count)
+            for role_id, count in self.counts.items()
+            if before.get(role_id, 0) != count
+        }
+
+    def _bump(self, role_id: int, delta: int, member_id: int):
+        self.counts[role_id] += delta
+        if self._rebuild_cursor is not None and member_id <= self._rebuild_cursor:
+            self._rebuild_deltas[role_id] = self._rebuild_deltas.get(role_id, 0) + delta
+
+    def member_added(self, member):
+        for role_id in self._tracked(member):
+            self._bump(role_id, 1, member.id)
+
+    def member_removed(self, member):
+        for role_id in self._tracked(member):
+            self._bump(role_id, -1, member.id)
+
+    def member_updated(self, before, after):
+        self.role_ids_changed(after.id, {role.id for role in before.roles}, {role.id for role in after.roles})
+
+    def role_ids_changed(self, member_id: int, before_ids, after_ids):
+        old_roles, new_roles = set(before_ids) & self.role_ids, set(after_ids) & self.role_ids
+        for role_id in old_roles - new_roles:
+            self._bump(role_id, -1, member_id)
+        for role_id in new_roles - old_roles:
+            self._bump(role_id, 1, member_id)
+
+async def ensure_mbti_index(rt: GuildRuntime, guild: discord.Guild, force: bool = False):
+    """길드의 MBTI 인덱스가 아직 없거나 (저메모리 모드에서) 오래되었으면 멤버 목록으로 다시 만듭니다.
+
+    force=True면 상태와 관계없이 다시 만듭니다. (재접속으로 놓친 이벤트를 반영)
+    """
+    index = rt.mbti_index
+
+    def needs_rebuild():
+        stale = LOW_MEMORY_MODE and time.monotonic() - index.built_at > MBTI_INDEX_MAX_AGE
+        return not index.ready or stale
+
+    if not force and not needs_rebuild():
+        return  # 다른 곳에서 다시 만드는 중이어도 기존 집계로 바로 답합니다.
+    async with index.lock:
+        if force or needs_rebuild():
+            await index.rebuild_from(iter_guild_members(guild))
+
+
+## 봇 상태 (지표)
+
+
+@metrics.register_collector
+def collect_bot_metrics(registry):
+    """지표를 읽을 때마다 게이트웨이 지연, 스케줄러, 디스패처, 저장소 상태를 게이지로 채웁니다."""
+    latency = bot.latency
+    registry.set_gauge("discord_gateway_latency_seconds", latency if latency == latency else -1)  # 연결 전에는 NaN
+    for shard_id, shard_latency in bot.latencies:
+        registry.set_gauge("discord_shard_latency_seconds", shard_latency if shard_latency == shard_latency else -1, shard=shard_id)
+
+    for guild_id, rt in guilds.items():
+        scheduler_stats = rt.scheduler.stats()
+        for kind, count in scheduler_stats["scheduled"].items():
+            registry.set_gauge("scheduler_deadlines", count, kind=kind, guild=guild_id)
+        registry.set_gauge("scheduler_running_tasks", scheduler_stats["running"], guild=guild_id)
+        registry.set_gauge("state_pending_mutations", rt.store.stats()["pending"], backend=rt.store.backend, guild=guild_id)
+        join_stats = rt.join_queue.stats()
+        registry.set_gauge("join_queue_depth", join_stats["depth"], guild=guild_id)
+        registry.set_gauge("join_queue_oldest_seconds", join_stats["oldest_wait"], guild=guild_id)
+        registry.set_gauge("join_queue_max_wait_seconds", join_stats["max_wait"], guild=guild_id)
+        registry.set_gauge("join_welcome_pending", join_stats["welcome_pending"], guild=guild_id)
+        registry.set_gauge("join_rate", join_stats["rate"], window=f"{JOIN_SPIKE_WINDOW:g}s", guild=guild_id)
+        registry.set_gauge("join_spike_mode", 1 if join_stats["spike"] else 0, guild=guild_id)
+
+    outbound_stats = outbound.stats()
+    for priority, depth in outbound_stats["depth"].items():
+        registry.set_gauge("outbound_queue_depth", depth, priority=priority)
+        registry.set_gauge("outbound_wait_max_seconds", outbound_stats["max_wait"][priority], priority=priority)
+    registry.set_gauge("outbound_dropped", outbound_stats["dropped"])
+    registry.set_gauge("outbound_merged", outbound_stats["merged"])
+    registry.set_gauge("outbound_rate_limited", outbound_stats["rate_limited"])
+    registry.set_gauge("leader", 1 if leader_lease.is_leader else 0)
+
+    memory = process_memory_bytes()
+    if memory is not None:
+        registry.set_gauge("process_resident_memory_bytes", memory)
+    registry.set_gauge("low_memory_mode", 1 if LOW_MEMORY_MODE else 0)
+    registry.set_gauge("member_cache_size", sum(len(guild.members) for guild in bot.guilds))
+    registry.set_gauge("member_lru_size", len(member_lru))
+    if ready_after is not None:
+        registry.set_gauge("startup_seconds", ready_after)
+
+def format_memory_status() -> str:
+    """`!봇상태`와 시작 로그에 쓰는 메모리 모드/사용량 요약."""
+    memory = process_memory_bytes()
+    parts = [
+        "저메모리 모드" if LOW_MEMORY_MODE else "전체 캐시 모드",
+        f"RSS {memory / 1024 / 1024:.0f}MB" if memory is not None else "RSS 알 수 없음",
+        f"캐시 멤버 {sum(len(guild.members) for guild in bot.guilds)}명",
+    ]
+    if LOW_MEMORY_MODE:
+        parts.append(f"LRU {len(member_lru)}명 (적중 {member_lru.hits} · 조회 {member_lru.misses})")
+    if ready_after is not None:
+        parts.append(f"시작 {ready_after:.1f}초")
+    return " · ".join(parts)
+
+def format_latency_lines(name: str, label: str, limit: int = 10) -> str:
+    """히스토그램을 `이름: 횟수, 평균, p95` 줄로 정리합니다."""
+    series = metrics.histograms.get(name, {})
+    rows = sorted(series.items(), key=lambda item: item[1].count, reverse=True)[:limit]
+    lines = []
+    for key, hist in rows:
+        labels = dict(key)
+        lines.append(f"`{labels.get(label, '?')}` {hist.count}회 · 평균 {hist.sum / hist.count * 1000:.0f}ms · p95 ≤{hist.quantile(0.95) * 1000:.0f}ms")
+    return "\n".join(lines) or "기록 없음"
+
+@bot.command(name="봇상태")
+@commands.has_permissions(administrator=True)
+async def bot_status(ctx):
+    """(관리자) 봇의 지연 시간, REST 호출, 이 서버의 저장/스케줄러 상태와 API 큐 상태를 보여줍니다."""
+    rt = get_runtime(ctx.guild)
+    if rt is None:
+        await ctx.send("이 명령어는 설정된 서버에서만 사용할 수 있습니다.")
+        return
+    metrics.collect()
+    uptime = int(time.time() - metrics.started_at)
+    embed = discord.Embed(title="🩺 찡긋봇 상태", color=0x7289DA)
+    embed.add_field(name="게이트웨이 지연", value=f"{bot.latency * 1000:.0f}ms", inline=True)
+    embed.add_field(name="가동 시간", value=f"{uptime // 3600}시간 {uptime % 3600 // 60}분", inline=True)
+    embed.add_field(name="진행 중인 파티", value=f"{len(rt.party_infos)}개", inline=True)
+    embed.add_field(name="샤드", value=f"{bot.shard_count or 1}개 · 길드 {len(bot.guilds)}개 (설정 {len(guilds)}개)", inline=True)
+    lease_stats = leader_lease.stats()
+    embed.add_field(
+        name="리더 임대",
+        value=f"{lease_stats['holder']} · {int(lease_stats['held_for']) // 60}분 보유 · 연장 {lease_stats['renewals']}회",
+        inline=True,
+    )
+
+    embed.add_field(name="메모리", value=format_memory_status(), inline=False)
+
+    embed.add_field(name="명령어 지연", value=format_latency_lines("command_latency_seconds", "command"), inline=False)
+    embed.add_field(name="버튼/선택 지연", value=format_latency_lines("component_latency_seconds", "component"), inline=False)
+
+    rest_counts = {}
+    for key, count in metrics.counters.get("discord_rest_requests_total", {}).items():
+        labels = dict(key)
+        route_name = f"{labels['method']} {labels['route']}"
+        rest_counts[route_name] = rest_counts.get(route_name, 0) + count
+    top_routes = sorted(rest_counts.items(), key=lambda item: item[1], reverse=True)[:8]
+    embed.add_field(
+        name=f"REST 호출 (총 {sum(rest_counts.values()):.0f}회)",
+        value="\n".join(f"`{route_name}` {count:.0f}회" for route_name, count in top_routes) or "기록 없음",
+        inline=False
+    )
+
+    store_stats = rt.store.stats()
+    embed.add_field(
+        name=f"상태 저장 ({store_stats['backend']})",
+        value=(
+            f"저장 {store_stats['flushes']}회 · 변경 {store_stats['mutations']}건 (대기 {store_stats['pending']})\n"
+            f"저장당 평균 {store_stats['avg_flush_coalesced']:.1f}건 · 마지막 {store_stats['last_flush_duration'] * 1000:.1f}ms / {store_stats['last_flush_bytes']}B"
+        ),
+        inline=False
+    )
+
+    scheduler_stats = rt.scheduler.stats()
+    embed.add_field(
+        name="스케줄러",
+        value=(
+            " · ".join(f"{kind} {count}" for kind, count in scheduler_stats["scheduled"].items())
+            + f"\n실행 중 {scheduler_stats['running']} · 최대 지연 {scheduler_stats['max_lateness']:.2f}초"
+        ),
+        inline=True
+    )
+
+    join_stats = rt.join_queue.stats()
+    embed.add_field(
+        name="입장 처리" + (" 🚨 급증 모드" if join_stats["spike"] else ""),
+        value=(
+            f"대기 {join_stats['depth']} · 최근 {JOIN_SPIKE_WINDOW:g}초 {join_stats['rate']}명 · 급증 {join_stats['spikes']}회\n"
+            f"처리 {join_stats['assigned']} (실패 {join_stats['failed']}) · 환영 {join_stats['welcomed']}명/{join_stats['welcome_messages']}개 · 최대 대기 {join_stats['max_wait']:.1f}초"
+        ),
+        inline=True
+    )
+
+    outbound_stats = outbound.stats()
+    embed.add_field(
+        name="API 큐",
+        value=(
+            f"대기 {outbound_stats['total_depth']} · 버림 {outbound_stats['dropped']} · 합침 {outbound_stats['merged']} · 429 {outbound_stats['rate_limited']}\n"
+            + " · ".join(f"{name} 최대 {wait:.1f}초" for name, wait in outbound_stats["max_wait"].items() if wait)
+        ),
+        inline=True
+    )
+    await ctx.send(embed=embed)
+
+
+## 봇 실행 시 초기화 로직
+
+
+# 길드별 정리 작업 태스크 (길드 ID -> Task). 큰 길드가 오래 걸려도 다른 길드는 먼저 끝납니다.
+reconcile_tasks = {}
+# 프로세스 시작부터 처음으로 모든 샤드가 준비될 때까지 걸린 시간 (초)
+ready_after = None
+
+async def timed_phase(rt: GuildRuntime, name: str, coro):
+    """시작 단계 하나를 실행하고 길드별로 소요 시간을 기록합니다."""
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        rt.startup_timings[name] = time.perf_counter() - started
+        log.info("⏱️ 시작 단계 '%s' 완료", name, guild_id=rt.guild_id, duration=rt.startup_timings[name])
+
+async def set_bot_nickname(guild: discord.Guild, nick: str):
+    if guild.me.nick == nick:
+        return
+    try:
+        await guild.me.edit(nick=nick)
+    except Exception as e:
+        log.warning("닉네임 변경 실패: %s", e, guild_id=guild.id)
+
+async def reconcile_guild(rt: GuildRuntime, guild: discord.Guild):
+    """길드 하나의 시작 정리 작업. 길드마다 독립된 태스크로 실행됩니다."""
+    # 끊겨 있는 동안 놓친 멤버 이벤트가 있을 수 있으므로 재접속 시에도 인덱스는 매번 다시 만듭니다.
+    # (다시 만드는 동안에도 기존 집계로 답하므로 통계 명령어는 기다리지 않습니다)
+    started = time.perf_counter()
+    await ensure_mbti_index(rt, guild, force=True)
+    log.info("✅ MBTI 통계 인덱스 생성 완료 (멤버 %d명)", guild.member_count or 0, guild_id=rt.guild_id,
+             duration=time.perf_counter() - started)
+
+    if rt.reconciled:
+        log.info("ℹ️ 재접속으로 다시 준비되었습니다. 시작 정리 작업은 건너뜁니다.", guild_id=rt.guild_id)
+        return
+    rt.reconciled = True
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        timed_phase(rt, "닉네임", set_bot_nickname(guild, rt.config.bot_nickname)),
+        *(timed_phase(rt, name, reconciler(rt, guild)) for name, reconciler in list(guild_reconcilers.items())),
+    )
+    rt.startup_timings["전체"] = time.perf_counter() - started
+    log.info("✅ [%s] 시작 정리 작업 완료", rt.config.name, guild_id=rt.guild_id, duration=rt.startup_timings["전체"])
+
+def schedule_guild_reconcile(guild: discord.Guild):
+    """길드 정리 작업을 백그라운드 태스크로 띄웁니다. 같은 길드의 작업이 돌고 있으면 건너뜁니다."""
+    rt = get_runtime(guild)
+    if rt is None:
+        log.info("ℹ️ 설정되지 않은 길드 '%s'는 건너뜁니다.", guild.name, guild_id=guild.id)
+        return
+    running = reconcile_tasks.get(guild.id)
+    if running and not running.done():
+        return
+    reconcile_tasks[guild.id] = asyncio.create_task(reconcile_guild(rt, guild))
+
+@bot.event
+async def on_shard_ready(shard_id):
+    """샤드 하나가 준비되면 그 샤드의 길드만 바로 정리를 시작합니다."""
+    shard_guilds = [guild for guild in bot.guilds if guild.shard_id == shard_id]
+    log.info("✅ 샤드 %s 준비 완료 (길드 %d개)", shard_id, len(shard_guilds))
+    for guild in shard_guilds:
+        schedule_guild_reconcile(guild)
+
+@bot.event
+async def on_ready():
+    """모든 샤드가 준비되면 호출됩니다. 길드별 정리는 on_shard_ready에서 이미 시작됐습니다."""
+    global ready_after
+    log.info("✅ 봇 로그인 완료: %s (샤드 %d개, 길드 %d개)", bot.user, bot.shard_count or 1, len(bot.guilds))
+    if ready_after is None:
+        ready_after = time.monotonic() - PROCESS_STARTED
+        log.info("📊 시작 완료: %s", format_memory_status(), duration=ready_after)
+    for guild in bot.guilds:
+        schedule_guild_reconcile(guild)
+
+@bot.event
+async def on_guild_join(guild):
+    """실행 중에 새 길드에 초대되면, 설정이 있는 길드인 경우 정리 작업을 시작합니다."""
+    schedule_guild_reconcile(guild)
+
+
+## 길드 설정 다시 불러오기
+
+
+async def reload_guild_configs() -> list:
+    """guilds.json을 다시 읽어 실행 중인 길드에 반영하고, 결과를 한 줄씩 담은 목록을 반환합니다.
+
+    설정이 바뀐 길드는 역할 선택/인증 메시지와 파티 메시지의 뷰를 새 설정으로 다시 붙입니다.
+    파일이 잘못되었으면 ValueError를 발생시키고 기존 설정을 그대로 씁니다.
+    """
+    _, configs = guild_configs.reload()
+    lines = []
+    for guild_id, config in configs.items():
+        rt = guilds.get(guild_id)
+        if rt is None:
+            # 새로 추가된 길드: 상태를 불러오고 저장/마감 작업을 시작합니다.
+            rt = add_guild(config)
+            start_guild(rt)
+            await sync_guild_commands([guild_id])
+            guild = bot.get_guild(guild_id)
+            if guild:
+                schedule_guild_reconcile(guild)
+            lines.append(f"➕ {config.name} ({guild_id}) 추가")
+            continue
+        if rt.config == config:
+            continue
+        old = rt.apply_config(config)
+        guild = bot.get_guild(guild_id)
+        if guild:
+            await ensure_mbti_index(rt, guild)
+            await asyncio.gather(
+                *(timed_phase(rt, name, reconciler(rt, guild)) for name, reconciler in list(guild_reconcilers.items())),
+            )
+            if old.bot_nickname != config.bot_nickname:
+                await set_bot_nickname(guild, config.bot_nickname)
+        lines.append(f"🔄 {config.name} ({guild_id}) 설정 반영")
+    for guild_id in guilds.keys() - configs.keys():
+        # 실행 중인 길드를 떼어 내지는 않습니다. (예약된 마감 작업과 저장이 걸려 있으므로 재시작 시 반영)
+        lines.append(f"⚠️ {guilds[guild_id].config.name} ({guild_id})는 설정에서 빠졌지만 재시작 전까지 유지됩니다.")
+    metrics.inc("guild_config_reloads_total")
+    return lines
+
+@bot.command(name="설정리로드")
+@commands.is_owner()
+async def reload_config_command(ctx):
+    """(봇 소유자) guilds.json의 역할/이모지/채널 설정을 재시작 없이 다시 불러옵니다.
+
+    설정 파일은 프로세스의 모든 길드가 함께 쓰므로, 한 서버의 관리자가 아니라 봇 소유자만 실행할 수 있습니다.
+    """
+    try:
+        lines = await reload_guild_configs()
+    except ValueError as e:
+        await ctx.send(f"❌ 설정을 다시 불러오지 못했습니다. 기존 설정을 그대로 사용합니다.\n{e}")
+        return
+    await ctx.send("✅ 길드 설정을 다시 불러왔습니다.\n" + ("\n".join(lines) if lines else "바뀐 내용이 없습니다."))
+    log.info("🔄 길드 설정 다시 불러옴: 변경 %d건", len(lines))
@@ -0,0 +1,49 @@
+import discord
+from discord.ext import commands
+
+from core import bot, get_runtime
+
+## 봇 도움말 기능
+
+
+@commands.command(name="도움말", aliases=["help", "명령어"])
+async def show_help(ctx):
+    """봇의 사용 가능한 명령어 목록을 보여줍니다."""
+    
+    embed = discord.Embed(
+        title="✨ 찡긋봇 명령어 도움말 ✨",
+        description="찡긋봇이 제공하는 명령어는 다음과 같습니다:",
+        color=0x7289DA
+    )
+
+    embed.add_field(
+        name="🎉 파티 모집",
+        value="`!모집` 또는 `/모집` - 입력 폼으로 새로운 파티 모집 스레드를 생성합니다.\n(스레드 내에서 파티 참여/수정 버튼 이용)\n"
+              "`!파티목록 [던전: ] [날짜: 7/10~7/12] [아르카나: ] [모집자: @멤버]` - 모집 중인 파티를 조건으로 찾아봅니다.\n"
+              "`!파티통계` - 끝난 파티의 인기 던전, 시간대, 아르카나 비율, 활발한 모집자를 보여줍니다.",
+        inline=False
+    )
+
+    embed.add_field(
+        name="📊 MBTI 통계",
+        value="`!mbti통계` - 서버 내 MBTI 역할 분포를 보여줍니다.\n"
+              "`!mbti확인 [MBTI유형]` - 특정 MBTI 역할을 가진 멤버 목록을 보여줍니다. (예: `!mbti확인 ENFP`)",
+        inline=False
+    )
+    
+    rt = get_runtime(ctx.guild)
+    if rt is not None:
+        embed.add_field(
+            name="📌 역할 선택 및 인증",
+            value=f"역할 선택은 <#{rt.config.role_select_channel_id}> 채널에서, 인증은 <#{rt.config.verify_channel_id}> 채널에서 버튼을 통해 진행할 수 있습니다.",
+            inline=False
+        )
+
+    embed.set_footer(text="문의사항은 서버 관리자에게 문의해주세요. | 봇 버전: v0.1")
+    embed.set_thumbnail(url=bot.user.display_avatar.url)
+
+    await ctx.send(embed=embed)
+
+
+async def setup(bot):
+    bot.add_command(show_help)
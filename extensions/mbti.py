@@ -0,0 +1,204 @@
+import time
+
+import discord
+from discord.ext import commands
+from discord.ui import View
+
+from core import ensure_mbti_index, get_runtime, iter_guild_members
+from log import get_logger
+
+log = get_logger("mbti")
+
+## MBTI 통계 및 확인 기능
+
+
+@commands.command()
+async def mbti통계(ctx):
+    """서버 내 MBTI 역할 통계를 보여줍니다."""
+    guild = ctx.guild
+    rt = get_runtime(guild)
+    if not guild or rt is None:
+        await ctx.send("이 명령어는 설정된 서버에서만 사용할 수 있습니다.")
+        return
+
+    mbti_role_ids = rt.config.role_ids["MBTI"]
+    mbti_roles_dict = {name: guild.get_role(role_id) for name, role_id in mbti_role_ids.items()}
+    mbti_roles_dict = {name: role for name, role in mbti_roles_dict.items() if role}
+
+    if not mbti_roles_dict:
+        await ctx.send("서버에 설정된 MBTI 역할이 없습니다. guilds.json의 `role_ids.MBTI`를 확인해주세요.")
+        return
+
+    await ensure_mbti_index(rt, guild)
+    mbti_counts = {name: rt.mbti_index.counts.get(role_id, 0) for name, role_id in mbti_role_ids.items()}
+    
+    sorted_mbti_counts = sorted(mbti_counts.items(), key=lambda item: item[1], reverse=True)
+
+    embed = discord.Embed(
+        title="📊 서버 MBTI 통계",
+        description="현재 서버 멤버들의 MBTI 역할 분포입니다.",
+        color=0x7289DA
+    )
+
+    total_mbti_users = 0
+    for mbti, count in sorted_mbti_counts:
+        if count > 0:
+            embed.add_field(name=mbti, value=f"{count}명", inline=True)
+            total_mbti_users += count
+    
+    if total_mbti_users == 0:
+        embed.description = "아직 MBTI 역할을 선택한 사용자가 없습니다."
+
+    embed.set_footer(text=f"총 MBTI 선택 사용자: {total_mbti_users}명")
+    await ctx.send(embed=embed)
+
+
+@commands.command()
+@commands.has_permissions(administrator=True)
+async def mbti재계산(ctx):
+    """(관리자) MBTI 통계 인덱스를 실제 멤버 목록과 비교하고 다시 만듭니다."""
+    rt = get_runtime(ctx.guild)
+    if not ctx.guild or rt is None:
+        await ctx.send("이 명령어는 설정된 서버에서만 사용할 수 있습니다.")
+        return
+
+    async with rt.mbti_index.lock:
+        mismatches = await rt.mbti_index.verify(iter_guild_members(ctx.guild))
+    if not mismatches:
+        await ctx.send("✅ MBTI 통계 인덱스가 멤버 목록과 일치합니다.")
+        return
+
+    names = rt.config.role_name_by_id
+    lines = [f"• {names.get(role_id, role_id)}: {indexed}명 → {actual}명" for role_id, (indexed, actual) in mismatches.items()]
+    await ctx.send("🔄 MBTI 통계 인덱스를 다시 만들었습니다. 어긋났던 항목:\n" + "\n".join(lines))
+    log.warning("⚠️ MBTI 인덱스 불일치 %d건 발견 후 재생성.", len(mismatches), guild_id=ctx.guild.id)
+
+
+# 멤버 목록 한 페이지에 보여줄 인원 수와, 목록 캐시 유지 시간(초)
+MEMBER_LIST_PAGE_SIZE = 20
+MEMBER_LIST_CACHE_TTL = 60
+
+# 역할 ID -> {"expires": 만료 시각, "names": 정렬된 이름 목록, "pages": {페이지 번호: 렌더링된 문자열}}
+member_list_cache = {}
+
+async def get_member_list_entry(role: discord.Role) -> dict:
+    """역할을 가진 멤버 이름 목록을 가져옵니다. (멤버 캐시, 저메모리 모드에서는 REST로 훑음) 짧은 시간 동안 결과를 재사용합니다."""
+    now = time.monotonic()
+    entry = member_list_cache.get(role.id)
+    if entry is None or entry["expires"] < now:
+        names = [member.display_name async for member in iter_guild_members(role.guild) if member.get_role(role.id)]
+        entry = {
+            "expires": now + MEMBER_LIST_CACHE_TTL,
+            "names": sorted(names, key=str.lower),
+            "pages": {},
+        }
+        member_list_cache[role.id] = entry
+    return entry
+
+class MemberListView(View):
+    """역할 멤버 목록을 페이지 단위로 보여주는 뷰. 페이지는 넘길 때마다 필요한 부분만 렌더링합니다."""
+    def __init__(self, author_id: int, mbti_type: str, role: discord.Role, total: int):
+        super().__init__(timeout=120)
+        self.author_id = author_id
+        self.mbti_type = mbti_type
+        self.role = role
+        self.page = 0
+        self.total_pages = max(1, -(-total // MEMBER_LIST_PAGE_SIZE))
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.prev_button.disabled = self.page <= 0
+        self.next_button.disabled = self.page >= self.total_pages - 1
+
+    async def render_page(self) -> discord.Embed:
+        entry = await get_member_list_entry(self.role)
+        names = entry["names"]
+        self.total_pages = max(1, -(-len(names) // MEMBER_LIST_PAGE_SIZE))
+        self.page = min(self.page, self.total_pages - 1)
+
+        embed = discord.Embed(title=f"👥 {self.mbti_type} 유형 멤버 목록", color=0x7289DA)
+        if not names:
+            embed.description = f"현재 '{self.mbti_type}' 역할을 가진 멤버가 없습니다."
+            return embed
+
+        if self.page not in entry["pages"]:
+            start = self.page * MEMBER_LIST_PAGE_SIZE
+            entry["pages"][self.page] = "\n".join(names[start:start + MEMBER_LIST_PAGE_SIZE])
+        embed.description = entry["pages"][self.page]
+        embed.set_footer(text=f"총 {len(names)}명 | {self.page + 1}/{self.total_pages} 페이지")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("명령어를 입력한 사람만 페이지를 넘길 수 있습니다.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = page
+        embed = await self.render_page()
+        self._update_buttons()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+
+@commands.command()
+async def mbti확인(ctx, mbti_type: str):
+    """특정 MBTI 역할을 가진 멤버 목록을 보여줍니다. (예: !mbti확인 ENFP)"""
+    mbti_type = mbti_type.upper()
+    rt = get_runtime(ctx.guild)
+    if rt is None:
+        await ctx.send("이 명령어는 설정된 서버에서만 사용할 수 있습니다.")
+        return
+
+    role_id = rt.config.role_ids["MBTI"].get(mbti_type)
+    if not role_id:
+        await ctx.send(f"⚠️ '{mbti_type}'는 유효한 MBTI 역할이 아닙니다. 정확한 MBTI 유형을 입력해주세요. (예: ISTJ, ENFP)")
+        return
+
+    mbti_role = ctx.guild.get_role(role_id)
+    if not mbti_role:
+        await ctx.send(f"'{mbti_type}' 역할이 서버에 존재하지 않습니다. guilds.json의 `role_ids` 설정을 확인해주세요.")
+        return
+
+    entry = await get_member_list_entry(mbti_role)
+    view = MemberListView(ctx.author.id, mbti_type, mbti_role, len(entry["names"]))
+    await ctx.send(embed=await view.render_page(), view=view if view.total_pages > 1 else None)
+
+
+async def on_member_join(member):
+    """새 멤버를 MBTI 통계 인덱스에 더합니다."""
+    rt = get_runtime(member.guild)
+    if rt:
+        rt.mbti_index.member_added(member)
+
+
+async def on_member_remove(member):
+    """멤버가 나가면 MBTI 통계 인덱스에서 뺍니다."""
+    rt = get_runtime(member.guild)
+    if rt:
+        rt.mbti_index.member_removed(member)
+
+
+async def on_member_update(before, after):
+    """멤버 역할이 바뀌면 MBTI 통계 인덱스를 갱신합니다."""
+    if before.roles == after.roles:
+        return
+    rt = get_runtime(after.guild)
+    if rt:
+        rt.mbti_index.member_updated(before, after)
+
+
+async def setup(bot):
+    for command in (mbti통계, mbti재계산, mbti확인):
+        bot.add_command(command)
+    bot.add_listener(on_member_join)
+    bot.add_listener(on_member_remove)
+    bot.add_listener(on_member_update)
@@ -0,0 +1,898 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import discord
+from discord.ext import commands
+from discord.ui import Button, View, Select
+
+from core import (
+    EMOJI_MAP, KST, ROLE_IDS, STATE_DIR, GuildConfig, GuildRuntime,
+    bot, deadline_handlers, get_runtime, guild_reconcilers, guild_starters, guilds, lookup_member, outbound, remember_member,
+    reply_unconfigured, resolve_members, role_emoji,
+)
+from history import WEEKDAYS, PartyHistory
+from log import get_logger
+from metrics import registry as metrics
+from outbound import OutboundDropped, PRIORITY_REMINDER, PRIORITY_THREAD, PRIORITY_EMBED
+from party_index import PartyIndex
+
+log = get_logger("party")
+
+# === 파티 모집 기능 ===
+
+class PartyRoleSelect(Select):
+    """파티 참여자가 자신의 아르카나를 선택하고 참여하는 드롭다운 메뉴.
+
+    선택값은 인터랙션에 실려 오므로, 재시작 시 등록하는 영구 뷰(config=None)는 기본 아르카나 목록으로 만들어도 됩니다.
+    """
+    def __init__(self, config: GuildConfig = None):
+        if config is None:
+            names, emoji = list(ROLE_IDS["JOB"].keys()), lambda role: EMOJI_MAP.get(role, "❓")
+        else:
+            names, emoji = config.job_role_names, lambda role: role_emoji(config, role)
+        options = [
+            discord.SelectOption(label=role, emoji=emoji(role))
+            for role in names
+        ] + [discord.SelectOption(label="참여 취소", emoji="❌")]
+        super().__init__(placeholder="아르카나를 선택하거나 참여 취소하세요!", min_values=1, max_values=1, options=options, custom_id="party_role_select")
+
+    @metrics.timed("component_latency_seconds", component="PartyRoleSelect")
+    async def callback(self, interaction: discord.Interaction):
+        rt = get_runtime(interaction.guild)
+        thread_id = interaction.channel.id
+        info = rt.party_infos.get(str(thread_id)) if rt else None
+        if not info:
+            return await interaction.response.send_message("⚠️ 파티 정보를 찾을 수 없습니다.", ephemeral=True)
+
+        user = interaction.user
+        selected = self.values[0]
+        remember_member(user)
+
+        if selected == "참여 취소":
+            if str(user.id) in info["participants"]:
+                info["participants"].pop(str(user.id), None)
+                rt.store.participant_left(thread_id, user.id)
+                await interaction.response.send_message("파티 참여가 취소되었습니다.", ephemeral=True)
+            else:
+                await interaction.response.send_message("아직 이 파티에 참여하지 않았습니다.", ephemeral=True)
+        else:
+            info["participants"][str(user.id)] = selected
+            rt.store.participant_joined(thread_id, user.id, selected)
+            await interaction.response.send_message(f"'{selected}' 역할로 파티에 참여했습니다!", ephemeral=True)
+
+        request_party_embed_update(rt, thread_id)
+
+def parse_party_time(date_str: str, time_str: str):
+    """`7/10`, `20:30` 형식의 KST 날짜/시간을 (파티 시간, 리마인더 시간) UTC 쌍으로 변환합니다.
+
+    이미 지난 날짜면 내년으로 간주합니다. 형식이 틀리면 ValueError를 발생시킵니다.
+    """
+    now_kst = datetime.now(KST)
+    try:
+        parsed_dt_kst = KST.localize(datetime.strptime(f"{now_kst.year}-{date_str} {time_str}", "%Y-%m/%d %H:%M"))
+        if parsed_dt_kst < now_kst:
+            parsed_dt_kst = KST.localize(datetime.strptime(f"{now_kst.year + 1}-{date_str} {time_str}", "%Y-%m/%d %H:%M"))
+    except ValueError:
+        raise ValueError("날짜/시간 형식이 올바르지 않거나 유효하지 않은 날짜입니다. (예: 7/10 20:30)")
+
+    party_time_utc = parsed_dt_kst.astimezone(timezone.utc)
+    return party_time_utc, party_time_utc - timedelta(minutes=10)
+
+class PartyInfoModal(discord.ui.Modal):
+    """던전/날짜/시간을 입력받는 파티 정보 입력 폼."""
+    dungeon = discord.ui.TextInput(label="던전", placeholder="예: 브리레흐1-3관", max_length=50)
+    date = discord.ui.TextInput(label="날짜 (월/일)", placeholder="예: 7/10", min_length=3, max_length=5)
+    time = discord.ui.TextInput(label="시간 (24시간, KST)", placeholder="예: 20:30", min_length=4, max_length=5)
+
+    def parse(self):
+        """입력값을 검증하고 (던전, 날짜, 시간, 파티 시간, 리마인더 시간)을 반환합니다."""
+        dungeon = self.dungeon.value.strip()
+        date_str = self.date.value.strip()
+        time_str = self.time.value.strip()
+        if not dungeon or " " in dungeon:
+            raise ValueError("던전명은 공백 없이 입력해주세요. (예: 브리레흐1-3관)")
+        party_time_utc, reminder_time_utc = parse_party_time(date_str, time_str)
+        return dungeon, date_str, time_str, party_time_utc, reminder_time_utc
+
+    async def on_error(self, interaction: discord.Interaction, error: Exception):
+        log.error("❌ 파티 정보 입력 처리 중 오류 발생: %s", error, guild_id=interaction.guild_id, user_id=interaction.user.id)
+        if interaction.response.is_done():
+            await interaction.followup.send(f"⚠️ 오류 발생: {error}", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"⚠️ 오류 발생: {error}", ephemeral=True)
+
+class PartyEditModal(PartyInfoModal, title="파티 정보 수정"):
+    """기존 파티 정보를 수정하는 폼. 현재 값이 미리 채워집니다."""
+    def __init__(self, info: dict):
+        super().__init__()
+        self.dungeon.default = info["dungeon"]
+        self.date.default = info["date"]
+        self.time.default = info["time"]
+
+    async def on_submit(self, interaction: discord.Interaction):
+        rt = get_runtime(interaction.guild)
+        thread_id = interaction.channel.id
+        info = rt.party_infos.get(str(thread_id)) if rt else None
+        if not info:
+            return await interaction.response.send_message("⚠️ 파티 정보를 찾을 수 없습니다.", ephemeral=True)
+
+        try:
+            dungeon, date_str, time_str, party_time_utc, reminder_time_utc = self.parse()
+        except ValueError as e:
+            return await interaction.response.send_message(f"⚠️ {e}", ephemeral=True)
+
+        info.update({
+            "dungeon": dungeon, 
+            "date": date_str, 
+            "time": time_str, 
+            "reminder_time": reminder_time_utc,
+            "party_time": party_time_utc,
+        })
+        rt.store.party_edited(thread_id, info)
+        rt.party_index.add(thread_id, info)
+        schedule_party_deadlines(rt, thread_id, info)
+        await interaction.response.send_message("✅ 파티 정보가 성공적으로 수정되었습니다!", ephemeral=True)
+        await update_party_embed(rt, thread_id)
+
+class PartyEditButton(Button):
+    """파티 모집자가 파티 정보를 수정할 수 있는 버튼."""
+    def __init__(self, label="✏️ 파티 정보 수정", style=discord.ButtonStyle.primary):
+        super().__init__(label=label, style=style, custom_id="party_edit_button")
+
+    async def callback(self, interaction: discord.Interaction):
+        rt = get_runtime(interaction.guild)
+        thread_id = interaction.channel.id
+        info = rt.party_infos.get(str(thread_id)) if rt else None
+        if not info:
+            return await interaction.response.send_message("⚠️ 파티 정보를 찾을 수 없습니다.", ephemeral=True)
+
+        owner_id = info.get("owner_id")
+        if interaction.user.id != owner_id:
+            return await interaction.response.send_message("⛔ 당신은 이 파티의 모집자가 아닙니다.", ephemeral=True)
+
+        await interaction.response.send_modal(PartyEditModal(info))
+
+class PartyView(View):
+    """파티 모집 임베드에 포함될 뷰 (역할 선택 및 수정 버튼)."""
+    def __init__(self, config: GuildConfig = None):
+        super().__init__(timeout=None) # 봇 재시작 시에도 뷰가 유지되도록 설정
+        self.add_item(PartyRoleSelect(config))
+        self.add_item(PartyEditButton())
+
+# 이 시간(초) 안에 들어온 참여/취소는 임베드 수정 한 번으로 합쳐집니다.
+EMBED_UPDATE_DELAY = 1.5
+
+# 임베드 메시지 핸들, 내용 해시, 대기 중인 업데이트, 렌더링 캐시는 GuildRuntime에 있습니다. (다시 불러와도 유지)
+
+def render_participant_line(guild: discord.Guild, user_id: int, role_name: str) -> str:
+    user = lookup_member(guild, user_id)
+    return f"• {user.display_name if user else '(알 수 없음)'} ({role_name})"
+
+def render_owner_footer(guild: discord.Guild, owner_id: int) -> tuple:
+    owner_member = lookup_member(guild, owner_id)
+    if not owner_member:
+        return owner_id, None, None
+    return owner_id, f"모집자: {owner_member.display_name}", owner_member.avatar.url if owner_member.avatar else None
+
+def party_member_ids(info: dict) -> list:
+    """임베드에 이름이 나오는 멤버 ID 목록 (참여자와 모집자)."""
+    return [int(user_id_str) for user_id_str in info["participants"]] + [info["owner_id"]]
+
+def _track_member(rt: GuildRuntime, user_id: int, thread_id: int):
+    rt.party_member_threads.setdefault(user_id, set()).add(thread_id)
+
+def _untrack_member(rt: GuildRuntime, user_id: int, thread_id: int):
+    threads = rt.party_member_threads.get(user_id)
+    if threads is not None:
+        threads.discard(thread_id)
+        if not threads:
+            del rt.party_member_threads[user_id]
+
+def build_party_embed(info: dict, guild: discord.Guild, rt: GuildRuntime = None, thread_id: int = None) -> discord.Embed:
+    """파티 정보로 모집 임베드를 만듭니다.
+
+    rt와 thread_id를 주면 참여자 줄과 모집자 문구를 길드 런타임에 캐시해 두고, 새로 들어온 참여자나
+    정보가 바뀐 멤버의 줄만 다시 만듭니다.
+    """
+    cache = None
+    if rt is not None and thread_id is not None:
+        cache = rt.party_render_cache.setdefault(thread_id, {"lines": {}, "footer": None})
+    lines = cache["lines"] if cache is not None else {}
+    participants = info["participants"]
+
+    participants_str = "아직 없음"
+    if participants:
+        participants_list = []
+        for user_id_str, role_name in participants.items():
+            cached = lines.get(user_id_str)
+            if cached is None or cached[0] != role_name:
+                user_id = int(user_id_str)
+                cached = lines[user_id_str] = (role_name, render_participant_line(guild, user_id, role_name))
+                if cache is not None:
+                    _track_member(rt, user_id, thread_id)
+            participants_list.append(cached[1])
+        participants_str = "\n".join(participants_list)
+    if cache is not None and len(lines) > len(participants):
+        # 참여를 취소한 멤버의 줄을 지웁니다.
+        for user_id_str in lines.keys() - participants.keys():
+            del lines[user_id_str]
+            if int(user_id_str) != info["owner_id"]:
+                _untrack_member(rt, int(user_id_str), thread_id)
+
+    embed = discord.Embed(
+        title=f"🎯 파티 모집중! - {info['dungeon']}",
+        description=(
+            f"📍 던전: **{info['dungeon']}**\n"
+            f"📅 날짜: **{info['date']}**\n"
+            f"⏰ 시간: **{info['time']}**\n\n"
+            f"**🧑‍🤝‍🧑 현재 참여자: {len(participants)}명**\n{participants_str}\n\n"
+            "---"
+        ),
+        color=0x00ff00
+    )
+    footer = cache["footer"] if cache is not None else None
+    if footer is None:
+        footer = render_owner_footer(guild, info["owner_id"])
+        if cache is not None:
+            cache["footer"] = footer
+            _track_member(rt, info["owner_id"], thread_id)
+    if footer[1]:
+        embed.set_footer(text=footer[1], icon_url=footer[2])
+    return embed
+
+def forget_party_render(rt: GuildRuntime, thread_id: int):
+    """파티의 렌더링 캐시와 멤버 색인을 지웁니다."""
+    cache = rt.party_render_cache.pop(thread_id, None)
+    if cache is None:
+        return
+    for user_id_str in cache["lines"]:
+        _untrack_member(rt, int(user_id_str), thread_id)
+    if cache["footer"] is not None:
+        _untrack_member(rt, cache["footer"][0], thread_id)
+
+def invalidate_member_render(rt: GuildRuntime, user_id: int) -> set:
+    """멤버의 렌더링된 줄(과 모집자 문구)을 지우고, 다시 그려야 할 파티 스레드 ID 집합을 반환합니다."""
+    thread_ids = rt.party_member_threads.pop(user_id, set())
+    user_id_str = str(user_id)
+    for thread_id in thread_ids:
+        cache = rt.party_render_cache.get(thread_id)
+        if cache is None:
+            continue
+        cache["lines"].pop(user_id_str, None)
+        if cache["footer"] is not None and cache["footer"][0] == user_id:
+            cache["footer"] = None
+    return thread_ids
+
+def embed_hash(embed: discord.Embed) -> str:
+    """임베드 내용의 해시를 계산합니다."""
+    return hashlib.sha1(json.dumps(embed.to_dict(), sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def get_party_embed_message(rt: GuildRuntime, thread: discord.Thread, info: dict):
+    """캐시된 임베드 메시지 핸들을 반환합니다. 없으면 REST 호출 없이 PartialMessage를 만듭니다."""
+    message = rt.party_embed_messages.get(thread.id)
+    if message is None or message.id != info["embed_msg_id"]:
+        message = thread.get_partial_message(info["embed_msg_id"])
+        rt.party_embed_messages[thread.id] = message
+    return message
+
+def forget_party_embed(rt: GuildRuntime, thread_id: int):
+    """파티가 사라질 때 임베드 관련 캐시와 대기 중인 업데이트를 정리합니다."""
+    rt.party_embed_messages.pop(thread_id, None)
+    rt.party_embed_hashes.pop(thread_id, None)
+    forget_party_render(rt, thread_id)
+    task = rt.party_embed_update_tasks.pop(thread_id, None)
+    if task and task is not asyncio.current_task():
+        task.cancel()
+
+def request_party_embed_update(rt: GuildRuntime, thread_id: int):
+    """임베드 업데이트를 예약합니다. 이미 예약되어 있으면 그 업데이트에 합쳐집니다."""
+    if thread_id in rt.party_embed_update_tasks:
+        return
+    rt.party_embed_update_tasks[thread_id] = bot.loop.create_task(_delayed_party_embed_update(rt, thread_id), name=f"party-embed-{thread_id}")
+
+async def _delayed_party_embed_update(rt: GuildRuntime, thread_id: int):
+    await asyncio.sleep(EMBED_UPDATE_DELAY)
+    # 수정 중에 들어온 변경은 새 업데이트로 예약되도록 먼저 목록에서 뺍니다.
+    rt.party_embed_update_tasks.pop(thread_id, None)
+    await update_party_embed(rt, thread_id)
+
+async def update_party_embed(rt: GuildRuntime, thread_id: int):
+    """주어진 스레드 ID의 파티 모집 임베드 메시지를 업데이트합니다. 내용이 바뀌지 않았으면 건너뜁니다."""
+    info = rt.party_infos.get(str(thread_id))
+    if not info:
+        log.debug("임베드 업데이트: 파티 정보 없음", thread_id=thread_id)
+        return
+
+    thread = bot.get_channel(thread_id)
+    if not thread or not isinstance(thread, discord.Thread):
+        log.debug("임베드 업데이트: 스레드 채널을 찾을 수 없거나 스레드가 아님", thread_id=thread_id)
+        remove_party_info(rt, thread_id)
+        return
+
+    # 저메모리 모드에서 캐시에 없는 참여자는 큐에 넣기 전에 불러옵니다. (이미 아는 멤버면 API 호출 없음)
+    await resolve_members(thread.guild, party_member_ids(info))
+    try:
+        # 같은 스레드의 수정이 큐에 이미 있으면 하나로 합쳐지고, 큐가 밀리면 버려질 수 있습니다.
+        await outbound.call(PRIORITY_EMBED, f"channel:{thread_id}", lambda: _edit_party_embed(rt, thread_id), merge_key=("embed", thread_id))
+    except OutboundDropped:
+        log.debug("임베드 업데이트가 큐 적체로 버려졌습니다.", thread_id=thread_id)
+
+async def _edit_party_embed(rt: GuildRuntime, thread_id: int):
+    """(디스패처에서 실행) 실행 시점의 최신 정보로 임베드를 만들고, 내용이 바뀐 경우에만 수정합니다."""
+    info = rt.party_infos.get(str(thread_id))
+    thread = bot.get_channel(thread_id)
+    if not info or not thread:
+        return
+
+    new_embed = build_party_embed(info, thread.guild, rt, thread_id)
+    new_hash = embed_hash(new_embed)
+    if rt.party_embed_hashes.get(thread_id) == new_hash:
+        return
+
+    started = time.perf_counter()
+    try:
+        await get_party_embed_message(rt, thread, info).edit(embed=new_embed)
+        rt.party_embed_hashes[thread_id] = new_hash
+        log.debug("임베드 업데이트 완료", guild_id=rt.guild_id, thread_id=thread_id, duration=time.perf_counter() - started)
+    except discord.NotFound:
+        log.warning("임베드 메시지 (%s)를 찾을 수 없음", info["embed_msg_id"], guild_id=rt.guild_id, thread_id=thread_id)
+        rt.party_embed_messages.pop(thread_id, None)
+    except discord.RateLimited:
+        raise  # 디스패처가 경로를 멈추고 다시 시도합니다.
+    except Exception as e:
+        log.error("임베드 업데이트 실패: %s", e, guild_id=rt.guild_id, thread_id=thread_id)
+
+# === 명령어: 파티 모집 ===
+class PartyCreateModal(PartyInfoModal, title="파티 모집"):
+    """새 파티 모집 스레드를 만드는 폼."""
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            dungeon, date_str, time_str, party_time_utc, reminder_time_utc = self.parse()
+        except ValueError as e:
+            return await interaction.response.send_message(f"⚠️ {e}", ephemeral=True)
+
+        rt = get_runtime(interaction.guild)
+        if rt is None:
+            return await reply_unconfigured(interaction)
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        thread = await create_party(rt, interaction.channel, interaction.user, dungeon, date_str, time_str, party_time_utc, reminder_time_utc)
+        if thread:
+            await interaction.followup.send(f"{interaction.user.mention}님, 파티 모집 스레드가 생성되었습니다: {thread.mention}", ephemeral=True)
+        else:
+            await interaction.followup.send("❌ 스레드를 생성하지 못했습니다. 봇의 권한을 확인해주세요.", ephemeral=True)
+
+class PartyCreateButtonView(View):
+    """`!모집`(텍스트 명령어)으로 호출했을 때 입력 폼을 열어 주는 버튼. 명령어를 입력한 사람만 누를 수 있습니다."""
+    def __init__(self, author_id: int):
+        super().__init__(timeout=60)
+        self.author_id = author_id
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("명령어를 입력한 사람만 파티를 만들 수 있습니다.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="📥 파티 정보 입력", style=discord.ButtonStyle.primary)
+    async def open_modal(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(PartyCreateModal())
+
+async def create_party(rt: GuildRuntime, channel, author: discord.Member, dungeon: str, date_str: str, time_str: str,
+                       party_time_utc: datetime, reminder_time_utc: datetime):
+    """파티 모집 스레드와 임베드를 만들고 상태에 등록합니다. 실패하면 None을 반환합니다."""
+    try:
+        thread = await channel.create_thread(
+            name=f"[{dungeon}] {date_str} {time_str} - {author.display_name}님의 파티 모집",
+            type=discord.ChannelType.public_thread,
+            auto_archive_duration=60,
+        )
+        log.info("스레드 '%s' 생성 성공", thread.name, guild_id=channel.guild.id, thread_id=thread.id, user_id=author.id)
+    except discord.Forbidden:
+        log.error("길드 '%s'에서 스레드 생성 권한 부족", channel.guild.name, guild_id=channel.guild.id)
+        return None
+    except Exception as e:
+        log.exception("스레드 생성 중 예상치 못한 오류 발생: %s", e, guild_id=channel.guild.id)
+        return None
+
+    party_info = {
+        "dungeon": dungeon,
+        "date": date_str,
+        "time": time_str,
+        "reminder_time": reminder_time_utc,
+        "party_time": party_time_utc,
+        "participants": {},
+        "embed_msg_id": None,
+        "owner_id": author.id,
+    }
+
+    rt.party_infos[str(thread.id)] = party_info
+    rt.store.party_created(thread.id, party_info)
+    rt.party_index.add(thread.id, party_info)
+    remember_member(author)
+
+    initial_embed = build_party_embed(party_info, channel.guild, rt, thread.id)
+
+    # 임베드와 View를 한 번에 보내서 별도의 수정 호출을 없앱니다.
+    embed_msg = await thread.send(embed=initial_embed, view=PartyView(rt.config))
+    await embed_msg.pin()
+    party_info["embed_msg_id"] = embed_msg.id
+    rt.store.party_edited(thread.id, party_info)
+    rt.party_embed_messages[thread.id] = embed_msg
+    rt.party_embed_hashes[thread.id] = embed_hash(initial_embed)
+
+    schedule_party_deadlines(rt, thread.id, party_info)
+    return thread
+
+@commands.hybrid_command(name="모집", description="새로운 파티 모집 스레드를 생성합니다.")
+async def 모집(ctx):
+    if not ctx.guild:
+        await ctx.send("이 명령어는 서버 채널에서만 사용할 수 있습니다.")
+        return
+    rt = get_runtime(ctx.guild)
+    if rt is None:
+        await ctx.send("⚠️ 이 서버는 봇 길드 설정(guilds.json)에 등록되어 있지 않습니다.")
+        return
+
+    if ctx.interaction is None:
+        try:
+            await ctx.message.delete()
+        except discord.Forbidden:
+            log.warning("❌ '%s' 길드에서 메시지 삭제 권한이 없습니다.", ctx.guild.name, guild_id=ctx.guild.id)
+        except Exception as e:
+            log.warning("⚠️ 메시지 삭제 중 오류 발생: %s", e, guild_id=ctx.guild.id)
+
+    verified_role = ctx.guild.get_role(rt.config.verified_role_id)
+    if not verified_role or verified_role not in ctx.author.roles:
+        await ctx.send("⛔ 파티 모집은 `찡긋` 역할을 가진 멤버만 가능합니다. 먼저 인증을 완료해주세요!", ephemeral=True, delete_after=10)
+        return
+
+    if ctx.interaction is not None:
+        # `/모집`: 바로 입력 폼을 띄웁니다.
+        await ctx.interaction.response.send_modal(PartyCreateModal())
+    else:
+        # `!모집`: 텍스트 명령어에서는 폼을 바로 띄울 수 없으므로 폼을 여는 버튼을 보냅니다.
+        await ctx.send(f"{ctx.author.mention}님, 아래 버튼을 눌러 파티 정보를 입력해주세요.", view=PartyCreateButtonView(ctx.author.id), delete_after=60)
+
+
+def remove_party_info(rt: "GuildRuntime", thread_id):
+    """파티 정보를 상태에서 제거합니다. 이미 없으면 아무것도 하지 않습니다."""
+    if rt.party_infos.pop(str(thread_id), None) is not None:
+        rt.store.party_removed(thread_id)
+        rt.party_index.remove(thread_id)
+    rt.scheduler.cancel_all(str(thread_id))
+    forget_party_embed(rt, int(thread_id))
+
+async def end_party(rt: "GuildRuntime", thread_id):
+    """끝난 파티를 기록에 남기고 파티 정보를 제거합니다. (삭제 일정이 취소되므로 제거 전에 기록합니다)"""
+    info = rt.party_infos.get(str(thread_id))
+    remove_party_info(rt, thread_id)
+    if info is not None:
+        await archive_party(rt, int(thread_id), info)
+
+
+## 배경 작업 (리마인더, 스레드 자동 보관 및 삭제)
+
+
+# 리마인더 시간이 이보다 더 지났으면 보내지 않고 버립니다. (봇이 오래 꺼져 있었던 경우)
+REMINDER_GRACE = timedelta(minutes=5)
+# 파티 시간 이후 스레드 삭제에 실패했을 때, 이 시간이 지나면 스레드를 보관 처리합니다.
+ARCHIVE_AFTER = timedelta(hours=1)
+
+async def send_party_reminder(rt: GuildRuntime, thread_id_str: str, reminder_dt_utc: datetime):
+    """파티 시작 10분 전 참여자들에게 리마인더를 보냅니다."""
+    await bot.wait_until_ready()
+    info = rt.party_infos.get(thread_id_str)
+    if not info or info.get("reminder_time") is None:
+        return
+
+    thread_id = int(thread_id_str)
+    if datetime.now(timezone.utc) - reminder_dt_utc > REMINDER_GRACE:
+        log.info("리마인더 시간이 너무 오래 지났습니다. 초기화.", guild_id=rt.guild_id, thread_id=thread_id)
+        info["reminder_time"] = None
+        rt.store.reminder_fired(thread_id)
+        return
+
+    thread = bot.get_channel(thread_id)
+    if not thread or not isinstance(thread, discord.Thread):
+        log.warning("⚠️ 스레드를 찾을 수 없거나 이미 삭제되었습니다. 파티를 기록하고 파티 정보에서 제거합니다.", guild_id=rt.guild_id, thread_id=thread_id)
+        await end_party(rt, thread_id)
+        return
+
+    mentions = []
+    participant_ids = [int(user_id_str) for user_id_str in info.get("participants", {})]
+    await resolve_members(thread.guild, participant_ids)
+    for user_id in participant_ids:
+        member = lookup_member(thread.guild, user_id)
+        if member:
+            mentions.append(member.mention)
+
+    reminder_text = (
+        f"⏰ **리마인더 알림!**\n{' '.join(mentions)}\n"
+        f"`{info['dungeon']}` 던전이 10분 후에 시작됩니다! **({info['date']} {info['time']})**"
+    )
+    try:
+        await outbound.call(PRIORITY_REMINDER, f"channel:{thread_id}", lambda: thread.send(reminder_text))
+        info["reminder_time"] = None
+        rt.store.reminder_fired(thread_id)
+        log.info("✅ 리마인더 전송 완료: %s", info["dungeon"], guild_id=rt.guild_id, thread_id=thread_id)
+    except discord.Forbidden:
+        log.error("❌ 리마인더 전송 실패: 스레드에 메시지 보낼 권한이 없습니다.", guild_id=rt.guild_id, thread_id=thread_id)
+        info["reminder_time"] = None
+        rt.store.reminder_fired(thread_id)
+    except Exception as e:
+        log.error("❌ 리마인더 전송 실패: %s", e, guild_id=rt.guild_id, thread_id=thread_id)
+
+async def archive_party_thread(rt: GuildRuntime, thread_id_str: str, archive_dt_utc: datetime):
+    """파티 시간 1시간 경과 후에도 스레드가 남아 있으면 자동 보관합니다."""
+    await bot.wait_until_ready()
+    thread = bot.get_channel(int(thread_id_str))
+    if not thread or not isinstance(thread, discord.Thread) or thread.archived:
+        return
+    try:
+        await outbound.call(PRIORITY_THREAD, f"channel:{thread.id}", lambda: thread.edit(archived=True, reason="파티 모집 시간 1시간 경과, 스레드 자동 보관"))
+        log.info("✅ 스레드 '%s' 자동 보관 처리됨.", thread.name, guild_id=rt.guild_id, thread_id=thread.id)
+    except discord.Forbidden:
+        log.error("❌ 스레드 '%s' 보관 권한이 없습니다. 봇 권한을 확인해주세요.", thread.name, guild_id=rt.guild_id, thread_id=thread.id)
+    except Exception as e:
+        log.error("❌ 스레드 '%s' 보관 중 오류 발생: %s", thread.name, e, guild_id=rt.guild_id, thread_id=thread.id)
+
+async def delete_party_thread(rt: GuildRuntime, thread_id_str: str, delete_dt_utc: datetime):
+    """파티 시간이 되면 스레드를 삭제하고, 파티를 기록에 남긴 뒤 파티 정보를 제거합니다."""
+    await bot.wait_until_ready()
+    thread_id = int(thread_id_str)
+    try:
+        thread_channel = bot.get_channel(thread_id)
+        if thread_channel and isinstance(thread_channel, discord.Thread):
+            await outbound.call(PRIORITY_THREAD, f"channel:{thread_id}", thread_channel.delete)
+            log.info("✅ 모집 시간 종료로 스레드 삭제", guild_id=rt.guild_id, thread_id=thread_id)
+        else:
+            log.warning("⚠️ 스레드를 찾을 수 없거나 이미 삭제되었습니다.", guild_id=rt.guild_id, thread_id=thread_id)
+    except discord.NotFound:
+        log.warning("⚠️ 스레드를 찾을 수 없어 삭제할 수 없습니다. (이미 삭제되었을 수 있음)", guild_id=rt.guild_id, thread_id=thread_id)
+    except Exception as e:
+        log.error("❌ 스레드 삭제 중 오류 발생: %s", e, guild_id=rt.guild_id, thread_id=thread_id)
+        return
+    await end_party(rt, thread_id)
+
+async def archive_party(rt: GuildRuntime, thread_id: int, info: dict):
+    """끝난 파티를 길드의 파티 기록에 남깁니다. (던전, 시간, 모집자, 참여자별 아르카나, 인원)"""
+    try:
+        await rt.history.record(thread_id, info)
+        metrics.inc("party_archived_total", guild=rt.guild_id)
+    except Exception as e:
+        log.error("❌ 파티 기록 저장 실패: %s", e, guild_id=rt.guild_id, thread_id=thread_id)
+
+def guild_history_paths(guild_id: int) -> dict:
+    """끝난 파티 기록(state/<길드 ID>.history.jsonl)과 누적 통계(state/<길드 ID>.history_stats.json) 경로."""
+    base = os.path.join(STATE_DIR, str(guild_id))
+    return {"records_path": f"{base}.history.jsonl", "stats_path": f"{base}.history_stats.json"}
+
+def start_party_guild(rt: GuildRuntime):
+    """길드의 파티 인덱스와 파티 기록을 준비하고 마감 일정을 복원합니다.
+
+    인덱스와 기록은 길드 런타임에 두므로, 확장을 다시 불러오면 이미 만든 것을 그대로 씁니다.
+    """
+    if rt.party_index is None:
+        rt.party_index = PartyIndex()
+        rt.party_index.rebuild(rt.party_infos)
+    if rt.history is None:
+        rt.history = PartyHistory(**guild_history_paths(rt.guild_id), tz=KST)
+        rt.history.load()
+    restore_party_deadlines(rt)
+
+def restore_party_deadlines(rt: GuildRuntime):
+    """저장된 파티의 리마인더/삭제 일정을 복원합니다. 같은 시각으로 다시 예약되므로 여러 번 불러도 안전합니다."""
+    for thread_id_str, info in rt.party_infos.items():
+        schedule_party_deadlines(rt, thread_id_str, info)
+    log.info("✅ 저장된 파티 %d개의 리마인더/삭제 일정 복원 완료.", len(rt.party_infos), guild_id=rt.guild_id)
+
+def schedule_party_deadlines(rt: GuildRuntime, thread_id, info: dict):
+    """파티 정보에 맞춰 길드 스케줄러에 리마인더/보관/삭제 시각을 예약합니다. 기존 예약은 새 시각으로 대체됩니다."""
+    scheduler = rt.scheduler
+    key = str(thread_id)
+    if info.get("reminder_time"):
+        scheduler.schedule("reminder", key, info["reminder_time"])
+    else:
+        scheduler.cancel("reminder", key)
+
+    party_time = info.get("party_time")
+    if party_time:
+        scheduler.schedule("delete", key, party_time)
+        scheduler.schedule("archive", key, party_time + ARCHIVE_AFTER)
+    else:
+        # 파티 시간 정보가 없으면 예전처럼 즉시 정리합니다.
+        scheduler.schedule("delete", key, datetime.now(timezone.utc))
+
+
+## 파티 통계 (끝난 파티 기록의 누적 통계)
+
+
+def format_ranking(rows, label, unit: str = "회") -> str:
+    return "\n".join(f"{rank}. {label(key)} — {count}{unit}" for rank, (key, count) in enumerate(rows, start=1)) or "기록 없음"
+
+@commands.hybrid_command(name="파티통계", description="지금까지 끝난 파티의 인기 던전, 시간대, 아르카나, 모집자 통계를 보여줍니다.")
+async def 파티통계(ctx):
+    rt = get_runtime(ctx.guild)
+    if rt is None:
+        await ctx.send("이 명령어는 설정된 서버에서만 사용할 수 있습니다.")
+        return
+
+    history = rt.history
+    total = history.aggregates["parties"]
+    embed = discord.Embed(title="📈 파티 통계", color=0x7289DA)
+    if total == 0:
+        embed.description = "아직 끝난 파티 기록이 없습니다."
+        await ctx.send(embed=embed)
+        return
+
+    embed.description = f"끝난 파티 **{total}개** · 평균 참여 인원 **{history.average_size():.1f}명**"
+    embed.add_field(name="🏰 인기 던전", value=format_ranking(history.top("dungeons"), lambda dungeon: dungeon), inline=False)
+    embed.add_field(name="⏰ 많이 모인 시간", value=format_ranking(history.top("hours", 3), lambda hour: f"{int(hour)}시"), inline=True)
+    embed.add_field(name="📅 많이 모인 요일", value=format_ranking(history.top("weekdays", 3), lambda day: WEEKDAYS[int(day)] + "요일"), inline=True)
+
+    arcana_total = sum(history.aggregates["arcana"].values())
+    arcana_lines = [
+        f"{role_emoji(rt.config, arcana)} {arcana} {count / arcana_total:.0%}"
+        for arcana, count in history.top("arcana", 8)
+    ]
+    embed.add_field(name="🔮 아르카나 비율", value="\n".join(arcana_lines) or "기록 없음", inline=False)
+    embed.add_field(name="👑 활발한 모집자", value=format_ranking(history.top("owners"), lambda owner_id: f"<@{owner_id}>"), inline=False)
+    await ctx.send(embed=embed)
+
+
+## 파티 목록 (시간/던전/모집자 인덱스로 검색)
+
+
+# 목록 한 페이지에 보여줄 파티 수
+PARTY_LIST_PAGE_SIZE = 10
+
+class PartyListFlags(commands.FlagConverter, delimiter=":", case_insensitive=True):
+    """`!파티목록 던전: 브리레흐 날짜: 7/10~7/12 아르카나: 다크 메이지 모집자: @멤버` (모두 생략 가능)"""
+    던전: str = commands.flag(default=None, description="던전 이름 (일부만 써도 됨)")
+    날짜: str = commands.flag(default=None, description="날짜 또는 범위 (예: 7/10, 7/10~7/12)")
+    아르카나: str = commands.flag(default=None, description="이 아르카나 자리가 비어 있는 파티만")
+    모집자: discord.Member = commands.flag(default=None, description="이 멤버가 모집한 파티만")
+
+def parse_date_range(text: str) -> tuple:
+    """`7/10` 또는 `7/10~7/12` (KST)를 (시작, 끝) UTC timestamp로 바꿉니다. 끝 날짜는 그날 자정까지 포함합니다.
+
+    올해 날짜로 보되, 범위가 모두 지났으면 내년으로 봅니다. 끝 날짜가 시작보다 앞이면 해를 넘긴 범위로 보고,
+    작년 말부터 올해 초까지의 범위가 아직 끝나지 않았으면(연초에 `12/30~1/2`) 그것을, 아니면 올해 말부터
+    내년 초까지를 씁니다. 형식이 틀리면 ValueError를 발생시킵니다.
+    """
+    first, _, last = text.replace(" ", "").partition("~")
+    today = datetime.now(KST).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def parse_day(value: str, year: int) -> datetime:
+        try:
+            return KST.localize(datetime.strptime(f"{year}-{value}", "%Y-%m/%d"))
+        except ValueError:
+            raise ValueError("날짜는 `7/10` 또는 `7/10~7/12` 형식으로 입력해주세요.")
+
+    start = parse_day(first, today.year)
+    end = parse_day(last, today.year) if last else start
+    if end < start:
+        if end >= today:
+            start = parse_day(first, today.year - 1)
+        else:
+            end = parse_day(last, today.year + 1)
+    elif end < today:
+        start, end = parse_day(first, today.year + 1), parse_day(last or first, today.year + 1)
+    return start.timestamp(), (end + timedelta(days=1)).timestamp()
+
+def find_job_role_name(config: GuildConfig, text: str):
+    """`다크메이지`처럼 띄어쓰기 없이 써도 아르카나 이름을 찾습니다. 없으면 None."""
+    wanted = "".join(text.split())
+    return next((name for name in config.job_role_names if "".join(name.split()) == wanted), None)
+
+def format_party_row(thread_id_str: str, info: dict) -> str:
+    """목록 한 줄. 스레드/모집자는 멘션으로 보여주므로 채널이나 멤버를 조회하지 않습니다."""
+    arcana = ", ".join(sorted(set(info["participants"].values()))) or "없음"
+    return (
+        f"• **{info['dungeon']}** {info['date']} {info['time']} · <#{thread_id_str}>\n"
+        f"  모집자 <@{info['owner_id']}> · 참여 {len(info['participants'])}명 ({arcana})"
+    )
+
+class PartyListView(View):
+    """검색한 파티 목록을 페이지 단위로 보여주는 뷰. 페이지를 넘길 때 그 페이지의 파티만 렌더링합니다."""
+    def __init__(self, author_id: int, rt: GuildRuntime, thread_ids: list, title: str):
+        super().__init__(timeout=180)
+        self.author_id = author_id
+        self.rt = rt
+        self.thread_ids = thread_ids
+        self.title = title
+        self.page = 0
+        self.total_pages = max(1, -(-len(thread_ids) // PARTY_LIST_PAGE_SIZE))
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.prev_button.disabled = self.page <= 0
+        self.next_button.disabled = self.page >= self.total_pages - 1
+
+    def render_page(self) -> discord.Embed:
+        embed = discord.Embed(title=self.title, color=0x00ff00)
+        start = self.page * PARTY_LIST_PAGE_SIZE
+        rows = []
+        for thread_id_str in self.thread_ids[start:start + PARTY_LIST_PAGE_SIZE]:
+            info = self.rt.party_infos.get(thread_id_str)
+            rows.append(format_party_row(thread_id_str, info) if info else "• ~~끝났거나 삭제된 파티~~")
+        embed.description = "\n".join(rows) or "조건에 맞는 파티가 없습니다."
+        embed.set_footer(text=f"총 {len(self.thread_ids)}개 | {self.page + 1}/{self.total_pages} 페이지")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("명령어를 입력한 사람만 페이지를 넘길 수 있습니다.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        self.page = min(max(page, 0), self.total_pages - 1)
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.render_page(), view=self)
+
+    @discord.ui.button(label="◀ 이전", style=discord.ButtonStyle.secondary)
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="다음 ▶", style=discord.ButtonStyle.secondary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+@commands.hybrid_command(name="파티목록", description="모집 중인 파티를 던전, 날짜, 빈 아르카나 자리, 모집자로 찾아봅니다.")
+async def 파티목록(ctx, *, flags: PartyListFlags):
+    rt = get_runtime(ctx.guild)
+    if rt is None:
+        await ctx.send("이 명령어는 설정된 서버에서만 사용할 수 있습니다.")
+        return
+
+    try:
+        start, end = parse_date_range(flags.날짜) if flags.날짜 else (time.time(), None)
+    except ValueError as e:
+        await ctx.send(f"⚠️ {e}")
+        return
+    arcana = None
+    if flags.아르카나:
+        arcana = find_job_role_name(rt.config, flags.아르카나)
+        if arcana is None:
+            await ctx.send(f"⚠️ '{flags.아르카나}'는 아르카나 이름이 아닙니다. ({', '.join(rt.config.job_role_names)})")
+            return
+
+    started = time.perf_counter()
+    thread_ids = rt.party_index.query(
+        dungeon=flags.던전, owner_id=flags.모집자.id if flags.모집자 else None, start=start, end=end,
+    )
+    if arcana:
+        # 빈 자리 조건은 후보 파티의 참여자만 확인합니다. (다른 조건으로 이미 좁혀진 목록)
+        party_infos = rt.party_infos
+        thread_ids = [
+            thread_id_str for thread_id_str in thread_ids
+            if arcana not in party_infos[thread_id_str]["participants"].values()
+        ]
+    log.debug("파티 목록 검색: %d개", len(thread_ids), guild_id=rt.guild_id, duration=time.perf_counter() - started)
+
+    conditions = [
+        f"던전 '{flags.던전}'" if flags.던전 else None,
+        f"날짜 {flags.날짜}" if flags.날짜 else None,
+        f"{arcana} 자리 있음" if arcana else None,
+        f"모집자 {flags.모집자.display_name}" if flags.모집자 else None,
+    ]
+    title = "📋 파티 목록" + (" — " + ", ".join(c for c in conditions if c) if any(conditions) else "")
+    view = PartyListView(ctx.author.id, rt, thread_ids, title)
+    await ctx.send(embed=view.render_page(), view=view if view.total_pages > 1 else None)
+
+
+## 시작 시 파티 정리
+
+
+# 시작 시 파티 스레드를 동시에 몇 개까지 정리할지 (길드마다 따로). 스레드마다 REST 경로(route)가 달라
+# 경로별 제한에는 걸리지 않지만, 전역 제한(초당 50회)에 여유를 두도록 작게 잡습니다.
+STARTUP_CONCURRENCY = 8
+
+async def reconcile_party(rt: GuildRuntime, guild: discord.Guild, thread_id_str: str, info: dict, semaphore: asyncio.Semaphore):
+    """파티 임베드를 최신 정보로 고치고 뷰를 다시 붙입니다. (fetch 없이 수정 한 번)"""
+    thread_id = int(thread_id_str)
+    thread = guild.get_channel(thread_id)
+    if not thread or not isinstance(thread, discord.Thread):
+        party_time = info.get("party_time")
+        if party_time and party_time <= datetime.now(timezone.utc):
+            # 봇이 꺼져 있는 동안 끝난 파티: 삭제 일정보다 먼저 여기서 지우므로 기록도 여기서 남깁니다.
+            log.warning("⚠️ 끝난 파티의 스레드를 찾을 수 없습니다. 기록하고 상태에서 제거합니다.", guild_id=rt.guild_id, thread_id=thread_id)
+            await end_party(rt, thread_id_str)
+            return
+        log.warning("⚠️ 스레드를 찾을 수 없거나 스레드가 아님. 상태에서 제거합니다.", guild_id=rt.guild_id, thread_id=thread_id)
+        remove_party_info(rt, thread_id_str)
+        return
+
+    if not info.get("embed_msg_id"):
+        return
+
+    async with semaphore:
+        if rt.party_infos.get(thread_id_str) is not info:
+            return  # 기다리는 동안 삭제/교체된 파티
+        await resolve_members(guild, party_member_ids(info))
+        new_embed = build_party_embed(info, guild, rt, thread_id)
+        try:
+            await get_party_embed_message(rt, thread, info).edit(embed=new_embed, view=PartyView(rt.config))
+            rt.party_embed_hashes[thread_id] = embed_hash(new_embed)
+            log.debug("임베드 정보 최신화 및 뷰 재등록 완료", guild_id=rt.guild_id, thread_id=thread_id)
+        except discord.NotFound:
+            log.warning("⚠️ 임베드 메시지를 찾을 수 없습니다. 상태에서 제거합니다.", guild_id=rt.guild_id, thread_id=thread_id)
+            remove_party_info(rt, thread_id_str)
+        except Exception as e:
+            log.error("❌ 파티 메시지 처리 중 오류 발생: %s", e, guild_id=rt.guild_id, thread_id=thread_id)
+
+async def reconcile_parties(rt: GuildRuntime, guild: discord.Guild):
+    semaphore = asyncio.Semaphore(STARTUP_CONCURRENCY)
+    await asyncio.gather(*(
+        reconcile_party(rt, guild, thread_id_str, info, semaphore)
+        for thread_id_str, info in list(rt.party_infos.items())
+    ))
+
+
+## 멤버 정보가 바뀌면 참여 중인 파티 임베드의 해당 줄만 다시 그림
+
+
+def refresh_member_parties(member: discord.Member):
+    rt = get_runtime(member.guild)
+    if rt is None or member.id not in rt.party_member_threads:
+        return
+    for thread_id in invalidate_member_render(rt, member.id):
+        if str(thread_id) in rt.party_infos:
+            request_party_embed_update(rt, thread_id)
+
+async def on_member_update(before, after):
+    """닉네임이나 아바타가 바뀌면 그 멤버가 있는 파티 임베드를 갱신합니다."""
+    if before.display_name != after.display_name or before.avatar != after.avatar:
+        refresh_member_parties(after)
+
+async def on_member_join(member):
+    """파티에 남아 있던 멤버가 서버에 다시 들어오면 이름을 다시 보여줍니다."""
+    refresh_member_parties(member)
+
+async def on_member_remove(member):
+    """파티 참여자가 서버를 나가면 '(알 수 없음)'으로 바꿉니다."""
+    refresh_member_parties(member)
+
+
+## 지표
+
+
+def collect_party_metrics(registry):
+    """지표를 읽을 때마다 길드별 진행 중인 파티 수를 게이지로 채웁니다."""
+    for guild_id, rt in guilds.items():
+        registry.set_gauge("party_count", len(rt.party_infos), guild=guild_id)
+
+async def setup(bot):
+    bot.add_view(PartyView())
+    bot.add_command(모집)
+    bot.add_command(파티통계)
+    bot.add_command(파티목록)
+    deadline_handlers.update({
+        "reminder": send_party_reminder,
+        "archive": archive_party_thread,
+        "delete": delete_party_thread,
+    })
+    guild_reconcilers["파티"] = reconcile_parties
+    bot.add_listener(on_member_update)
+    bot.add_listener(on_member_join)
+    bot.add_listener(on_member_remove)
+
+    metrics.register_collector(collect_party_metrics)
+    guild_starters["파티"] = start_party_guild
+    # 다시 불러온 경우 이미 읽어 둔 길드를 준비합니다. (처음 시작할 때는 길드 상태를 읽은 뒤 core가 부름)
+    for rt in guilds.values():
+        start_party_guild(rt)
+
+async def teardown(bot):
+    for kind in ("reminder", "archive", "delete"):
+        deadline_handlers.pop(kind, None)
+    guild_reconcilers.pop("파티", None)
+    guild_starters.pop("파티", None)
+    if collect_party_metrics in metrics.collectors:
+        metrics.collectors.remove(collect_party_metrics)
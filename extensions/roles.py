@@ -0,0 +1,377 @@
+import time
+import asyncio
+
+import discord
+from discord.ext import commands
+from discord.ui import Button, View
+
+from core import (
+    GuildConfig, GuildRuntime,
+    edit_member_roles, get_runtime, guild_reconcilers, guilds, iter_guild_members, outbound, reply_unconfigured, role_emoji,
+)
+from metrics import registry as metrics
+from log import get_logger
+from outbound import OutboundDropped, PRIORITY_BULK, PRIORITY_LOG
+
+log = get_logger("roles")
+
+# === 역할 선택 UI ===
+
+class RoleSelectButton(Button):
+    """카테고리별 역할을 선택하거나 해제하는 버튼."""
+    def __init__(self, role_name, emoji, role_type):
+        super().__init__(
+            label=role_name,
+            style=discord.ButtonStyle.secondary,
+            emoji=emoji,
+            custom_id=f"{role_type}_{role_name}_button"
+        )
+        self.role_name = role_name
+        self.role_type = role_type
+
+    @metrics.timed("component_latency_seconds", component="RoleSelectButton")
+    async def callback(self, interaction: discord.Interaction):
+        rt = get_runtime(interaction.guild)
+        if rt is None:
+            return await reply_unconfigured(interaction)
+
+        role_id = rt.config.role_ids[self.role_type].get(self.role_name)
+        if not role_id:
+            return await interaction.response.send_message(f"'{self.role_name}' 역할 ID를 찾을 수 없습니다.", ephemeral=True)
+
+        role = interaction.guild.get_role(role_id)
+        if not role:
+            return await interaction.response.send_message(f"'{self.role_name}' 역할을 서버에서 찾을 수 없습니다.", ephemeral=True)
+
+        # 역할 변경은 길드의 역할 경로 큐(일괄 작업, 입장 처리와 공유)를 거치므로 3초 안에 먼저 응답해 둡니다.
+        await interaction.response.defer(ephemeral=True)
+        member = interaction.user
+        try:
+            if role in member.roles:
+                await edit_member_roles(member, remove=[role])
+                message = f"'{self.role_name}' 역할이 제거되었습니다."
+            else:
+                replaced = ()
+                if self.role_type == "MBTI":
+                    # MBTI는 하나만 가질 수 있으므로 기존 MBTI 역할을 빼고 새 역할을 넣는 것을 한 번에 반영합니다.
+                    # (이름 비교 대신 설정을 읽을 때 만든 MBTI 역할 ID 집합으로 확인)
+                    mbti_role_ids = rt.config.role_id_sets["MBTI"]
+                    replaced = [existing_role for existing_role in member.roles if existing_role.id in mbti_role_ids]
+                await edit_member_roles(member, add=[role], remove=replaced)
+                message = f"'{self.role_name}' 역할이 추가되었습니다."
+        except discord.Forbidden:
+            log.error("❌ '%s' 역할 변경 권한이 없습니다.", self.role_name, guild_id=rt.guild_id, user_id=member.id)
+            message = "❌ 역할을 변경할 권한이 없습니다. 관리자에게 봇 권한을 확인해달라고 요청해주세요."
+        except (discord.HTTPException, OutboundDropped) as e:
+            log.error("❌ '%s' 역할 변경 실패: %s", self.role_name, e, guild_id=rt.guild_id, user_id=member.id)
+            message = "❌ 역할을 변경하지 못했습니다. 잠시 후 다시 시도해주세요."
+        await interaction.followup.send(message, ephemeral=True)
+
+
+class CategorySelectView(View):
+    """아르카나/MBTI 카테고리를 선택하는 초기 뷰."""
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="아르카나 선택", style=discord.ButtonStyle.primary, custom_id="job_select_button", emoji="💫")
+    async def job_select_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rt = get_runtime(interaction.guild)
+        if rt is None:
+            return await reply_unconfigured(interaction)
+        await interaction.response.edit_message(
+            content="👇 원하는 **아르카나 역할**을 선택하거나, `MBTI 선택` 버튼을 눌러주세요.",
+            view=RoleButtonsView(rt.config, "JOB")
+        )
+
+    @discord.ui.button(label="MBTI 선택", style=discord.ButtonStyle.success, custom_id="mbti_select_button", emoji="🎭")
+    async def mbti_select_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
+        rt = get_runtime(interaction.guild)
+        if rt is None:
+            return await reply_unconfigured(interaction)
+        await interaction.response.edit_message(
+            content="👇 원하는 **MBTI 역할**을 선택하거나, `아르카나 선택` 버튼을 눌러주세요.",
+            view=RoleButtonsView(rt.config, "MBTI")
+        )
+
+class RoleButtonsView(View):
+    """선택된 카테고리(아르카나 또는 MBTI)에 해당하는 역할 버튼들을 보여주는 뷰."""
+    def __init__(self, config: GuildConfig, role_category: str):
+        super().__init__(timeout=None)
+        self.role_category = role_category
+        
+        roles_to_display = config.role_ids[self.role_category]
+
+        for role_name in roles_to_display.keys():
+            self.add_item(RoleSelectButton(role_name, role_emoji(config, role_name), self.role_category))
+        
+        self.add_item(BackToCategoryButton())
+
+class BackToCategoryButton(Button):
+    """카테고리 선택 뷰로 돌아가는 버튼."""
+    def __init__(self):
+        super().__init__(label="🔙 뒤로가기", style=discord.ButtonStyle.danger, row=4, custom_id="back_to_category_button")
+    
+    async def callback(self, interaction: discord.Interaction):
+        await interaction.response.edit_message(
+            content="👇 아래 버튼을 눌러 `아르카나` 또는 `MBTI` 역할을 선택하세요!",
+            view=CategorySelectView()
+        )
+
+async def reconcile_role_message(rt: GuildRuntime, guild: discord.Guild):
+    """역할 선택 초기 메시지에 뷰를 다시 붙이거나, 없으면 새로 보냅니다."""
+    role_channel = guild.get_channel(rt.config.role_select_channel_id) if rt.config.role_select_channel_id else None
+    if not role_channel:
+        return
+
+    state = rt.state
+    if state["initial_message_id"]:
+        try:
+            # fetch 없이 바로 수정합니다. 메시지가 없으면 NotFound가 발생합니다.
+            await role_channel.get_partial_message(state["initial_message_id"]).edit(view=CategorySelectView())
+            log.info("✅ 기존 역할 선택 초기 메시지 (%s)에 뷰 재등록 완료.", state["initial_message_id"], guild_id=rt.guild_id)
+        except discord.NotFound:
+            log.warning("⚠️ 저장된 역할 선택 초기 메시지 (%s)를 찾을 수 없습니다. 새로 전송합니다.", state["initial_message_id"], guild_id=rt.guild_id)
+            state["initial_message_id"] = None
+            rt.store.meta_changed("initial_message_id", None)
+        except Exception as e:
+            log.error("역할 선택 초기 메시지 확인 중 오류 발생: %s", e, guild_id=rt.guild_id)
+            state["initial_message_id"] = None
+            rt.store.meta_changed("initial_message_id", None)
+
+    if not state["initial_message_id"]:
+        try:
+            msg = await role_channel.send(
+                "👇 아래 버튼을 눌러 `아르카나` 또는 `MBTI` 역할을 선택하세요!",
+                view=CategorySelectView()
+            )
+            state["initial_message_id"] = msg.id
+            rt.store.meta_changed("initial_message_id", msg.id)
+            log.info("✅ 새로운 역할 선택 초기 메시지 (%s) 전송 완료.", msg.id, guild_id=rt.guild_id)
+        except Exception as e:
+            log.error("역할 선택 초기 메시지 전송 오류: %s", e, guild_id=rt.guild_id)
+
+
+## 역할 일괄 부여/제거 (관리자)
+
+
+# 동시에 처리할 멤버 수와 역할 변경 사이 최소 간격(초). 요청 제한(429)은 디스패처가 경로를 멈춰 처리합니다.
+BULK_ROLE_CONCURRENCY = 2
+BULK_ROLE_INTERVAL = 0.5
+# 진행 상황 메시지 갱신 간격(초)과 진행 상황 저장 간격(처리한 멤버 수)
+BULK_PROGRESS_INTERVAL = 5.0
+BULK_CHECKPOINT_EVERY = 20
+
+BULK_ACTIONS = {"부여": "add", "제거": "remove"}
+BULK_ACTION_NAMES = {"add": "부여", "remove": "제거"}
+# 대상 키워드 (그 밖에는 역할 이름/멘션/ID로 그 역할을 가진 멤버)
+BULK_TARGETS = ("전체", "미인증", "인증")
+
+# 길드 ID -> 실행 중인 일괄 작업 Task
+bulk_role_tasks = {}
+
+async def select_bulk_targets(guild: discord.Guild, config: GuildConfig, job: dict) -> list:
+    """작업 대상 중 아직 바꿀 것이 남은 멤버 목록을 멤버 캐시에서 고릅니다.
+
+    이미 원하는 상태인 멤버는 빠지므로, 재시작 후 다시 고르면 남은 멤버만 나옵니다.
+    """
+    role_id, target = job["role_id"], job["target"]
+    want = job["action"] == "add"
+    if target == "전체":
+        matches = lambda role_ids: True
+    elif target == "미인증":
+        matches = lambda role_ids: config.verified_role_id not in role_ids
+    elif target == "인증":
+        matches = lambda role_ids: config.verified_role_id in role_ids
+    else:
+        target_role_id = int(target)
+        matches = lambda role_ids: target_role_id in role_ids
+
+    members = []
+    async for member in iter_guild_members(guild):
+        if member.bot:
+            continue
+        role_ids = {role.id for role in member.roles}
+        if matches(role_ids) and (role_id in role_ids) != want:
+            members.append(member)
+    return members
+
+def format_bulk_progress(guild: discord.Guild, job: dict, finished: str = None) -> str:
+    role = guild.get_role(job["role_id"])
+    target = job["target"] if job["target"] in BULK_TARGETS else f"<@&{job['target']}> 보유"
+    processed = job["done"] + job["failed"]
+    head = finished or f"⏳ 진행 중 {processed}/{job['total']}"
+    return (
+        f"{head}\n역할 일괄 {BULK_ACTION_NAMES[job['action']]}: {role.mention if role else job['role_id']} → {target} 멤버\n"
+        f"완료 {job['done']}명 · 실패 {job['failed']}명 · 남음 {max(0, job['total'] - processed)}명"
+    )
+
+async def report_bulk_progress(rt: GuildRuntime, guild: discord.Guild, finished: str = None):
+    """진행 상황 메시지를 고칩니다. 메시지가 없으면 새로 보냅니다."""
+    job = rt.state["bulk_role_job"]
+    channel = guild.get_channel(job["channel_id"])
+    if not channel:
+        return
+    text = format_bulk_progress(guild, job, finished)
+    try:
+        if job.get("message_id"):
+            message = channel.get_partial_message(job["message_id"])
+            await outbound.call(PRIORITY_LOG, f"channel:{channel.id}", lambda: message.edit(content=text),
+                                merge_key=("bulk", guild.id))
+        else:
+            message = await outbound.call(PRIORITY_LOG, f"channel:{channel.id}", lambda: channel.send(text))
+            job["message_id"] = message.id
+            rt.store.meta_changed("bulk_role_job", job)
+    except (discord.HTTPException, OutboundDropped) as e:
+        log.warning("⚠️ 역할 일괄 작업 진행 상황 메시지 갱신 실패: %s", e, guild_id=rt.guild_id)
+
+async def run_bulk_role_job(rt: GuildRuntime, guild: discord.Guild):
+    """저장된 일괄 작업을 끝까지 처리합니다. 재시작하면 남은 멤버부터 이어서 합니다."""
+    job = rt.state["bulk_role_job"]
+    role = guild.get_role(job["role_id"])
+    if role is None:
+        rt.state["bulk_role_job"] = None
+        rt.store.meta_changed("bulk_role_job", None)
+        log.warning("⚠️ 역할 일괄 작업의 역할 (%s)이 없어 작업을 취소합니다.", job["role_id"], guild_id=rt.guild_id)
+        return
+
+    pending = await select_bulk_targets(guild, rt.config, job)
+    job["total"] = job["done"] + job["failed"] + len(pending)
+    rt.store.meta_changed("bulk_role_job", job)
+    log.info("🔁 역할 일괄 작업 시작/재개: 남은 멤버 %d명", len(pending), guild_id=rt.guild_id)
+    await report_bulk_progress(rt, guild)
+
+    started = time.perf_counter()
+    next_slot = time.monotonic()
+    last_report = time.monotonic()
+    reason = f"역할 일괄 {BULK_ACTION_NAMES[job['action']]}"
+    dropped = False
+
+    async def apply(member: discord.Member):
+        nonlocal next_slot, dropped
+        # 한꺼번에 몰리지 않도록 역할 변경 시작 시각을 BULK_ROLE_INTERVAL 간격으로 나눠 줍니다.
+        now = time.monotonic()
+        wait, next_slot = max(0.0, next_slot - now), max(next_slot, now) + BULK_ROLE_INTERVAL
+        await asyncio.sleep(wait)
+        change = {"add": [role]} if job["action"] == "add" else {"remove": [role]}
+        try:
+            await edit_member_roles(member, priority=PRIORITY_BULK, reason=reason, **change)
+            job["done"] += 1
+        except discord.HTTPException as e:
+            job["failed"] += 1
+            log.warning("⚠️ 역할 일괄 변경 실패: %s", e, guild_id=rt.guild_id, user_id=member.id)
+        except OutboundDropped:
+            # 디스패처가 닫히는 중(종료)이라 보내지 못한 멤버: 실패로 세지 않고 다음 시작 때 다시 고릅니다.
+            dropped = True
+
+    since_checkpoint = 0
+    for start in range(0, len(pending), BULK_ROLE_CONCURRENCY):
+        chunk = pending[start:start + BULK_ROLE_CONCURRENCY]
+        await asyncio.gather(*(apply(member) for member in chunk))
+        if dropped:
+            rt.store.meta_changed("bulk_role_job", job)
+            log.warning("⏸️ 역할 일괄 작업을 멈춥니다. (API 큐가 닫힘) 다음 시작 때 남은 멤버부터 이어서 합니다.", guild_id=rt.guild_id)
+            return
+        since_checkpoint += len(chunk)
+        if since_checkpoint >= BULK_CHECKPOINT_EVERY:
+            since_checkpoint = 0
+            rt.store.meta_changed("bulk_role_job", job)
+        if time.monotonic() - last_report >= BULK_PROGRESS_INTERVAL:
+            last_report = time.monotonic()
+            await report_bulk_progress(rt, guild)
+
+    duration = time.perf_counter() - started
+    await report_bulk_progress(rt, guild, finished=f"✅ 역할 일괄 작업 완료 ({duration:.0f}초)")
+    rt.state["bulk_role_job"] = None
+    rt.store.meta_changed("bulk_role_job", None)
+    metrics.inc("bulk_role_jobs_total", guild=rt.guild_id)
+    log.info("✅ 역할 일괄 작업 완료: 완료 %d명, 실패 %d명", job["done"], job["failed"], guild_id=rt.guild_id, duration=duration)
+
+def start_bulk_role_job(rt: GuildRuntime, guild: discord.Guild):
+    running = bulk_role_tasks.get(guild.id)
+    if running and not running.done():
+        return
+    task = asyncio.create_task(run_bulk_role_job(rt, guild), name=f"bulk-roles-{guild.id}")
+    task.add_done_callback(lambda task: log_bulk_role_job_error(rt, task))
+    bulk_role_tasks[guild.id] = task
+
+def log_bulk_role_job_error(rt: GuildRuntime, task: asyncio.Task):
+    """일괄 작업이 예외로 끝났으면 기록합니다. (진행 상황은 상태에 남아 있어 다음 시작 때 이어서 합니다)"""
+    if task.cancelled() or task.exception() is None:
+        return
+    log.error("❌ 역할 일괄 작업 중 오류 발생: %r", task.exception(), guild_id=rt.guild_id)
+
+async def resume_bulk_role_job(rt: GuildRuntime, guild: discord.Guild):
+    """재시작 전에 진행 중이던 일괄 작업이 있으면 이어서 실행합니다."""
+    if rt.state.get("bulk_role_job"):
+        start_bulk_role_job(rt, guild)
+
+@commands.command(name="역할일괄")
+@commands.has_permissions(administrator=True)
+async def bulk_role_command(ctx, action: str, role: discord.Role = None, *, target: str = "전체"):
+    """(관리자) 여러 멤버에게 역할을 한꺼번에 부여하거나 제거합니다.
+
+    예: `!역할일괄 부여 손님 미인증`, `!역할일괄 제거 손님 인증`, `!역할일괄 제거 ENFP @찡긋`, `!역할일괄 상태`, `!역할일괄 중지`
+    대상: 전체 / 미인증 / 인증 / 역할 (그 역할을 가진 멤버)
+    """
+    rt = get_runtime(ctx.guild)
+    if not ctx.guild or rt is None:
+        await ctx.send("이 명령어는 설정된 서버에서만 사용할 수 있습니다.")
+        return
+    job = rt.state.get("bulk_role_job")
+
+    if action == "상태":
+        await ctx.send(format_bulk_progress(ctx.guild, job) if job else "진행 중인 역할 일괄 작업이 없습니다.")
+        return
+    if action == "중지":
+        if not job:
+            await ctx.send("진행 중인 역할 일괄 작업이 없습니다.")
+            return
+        task = bulk_role_tasks.pop(ctx.guild.id, None)
+        if task:
+            task.cancel()
+        await report_bulk_progress(rt, ctx.guild, finished="🛑 역할 일괄 작업 중지됨")
+        rt.state["bulk_role_job"] = None
+        rt.store.meta_changed("bulk_role_job", None)
+        await ctx.send("🛑 역할 일괄 작업을 중지했습니다.")
+        return
+
+    if action not in BULK_ACTIONS or role is None:
+        await ctx.send("사용법: `!역할일괄 부여|제거 <역할> [전체|미인증|인증|<역할>]`, `!역할일괄 상태`, `!역할일괄 중지`")
+        return
+    if job:
+        await ctx.send("⚠️ 이미 진행 중인 역할 일괄 작업이 있습니다. `!역할일괄 상태`로 확인하거나 `!역할일괄 중지`로 멈춰주세요.")
+        return
+    if target not in BULK_TARGETS:
+        target = str((await commands.RoleConverter().convert(ctx, target)).id)
+
+    job = {
+        "action": BULK_ACTIONS[action], "role_id": role.id, "target": target,
+        "total": 0, "done": 0, "failed": 0,
+        "channel_id": ctx.channel.id, "message_id": None, "requested_by": ctx.author.id,
+    }
+    rt.state["bulk_role_job"] = job
+    rt.store.meta_changed("bulk_role_job", job)
+    start_bulk_role_job(rt, ctx.guild)
+
+
+async def setup(bot):
+    # 봇 재시작 시 Persistent View 등록 (커스텀 ID를 가진 View)
+    bot.add_view(CategorySelectView())
+    bot.add_command(bulk_role_command)
+    guild_reconcilers["역할 선택 메시지"] = reconcile_role_message
+    guild_reconcilers["역할 일괄 작업"] = resume_bulk_role_job
+
+    # 확장을 다시 불러온 경우 멈췄던 일괄 작업을 이어서 실행합니다.
+    if bot.is_ready():
+        for rt in guilds.values():
+            guild = bot.get_guild(rt.guild_id)
+            if guild:
+                await resume_bulk_role_job(rt, guild)
+
+async def teardown(bot):
+    guild_reconcilers.pop("역할 선택 메시지", None)
+    guild_reconcilers.pop("역할 일괄 작업", None)
+    # 진행 상황은 상태에 저장되어 있으므로 멈췄다가 다시 불러올 때 이어서 합니다.
+    for task in bulk_role_tasks.values():
+        task.cancel()
+    bulk_role_tasks.clear()
@@ -0,0 +1,182 @@
+import asyncio
+
+import discord
+from discord.ui import Button, View
+
+from core import (
+    GUILD_CONFIG_FILE, JOIN_SPIKE_WINDOW, WELCOME_BATCH_SIZE, WELCOME_SPIKE_BATCH_WINDOW, GuildRuntime,
+    bot, edit_member_roles, get_runtime, guild_reconcilers, join_handlers, outbound, reply_unconfigured,
+)
+from metrics import registry as metrics
+from log import get_logger
+from outbound import PRIORITY_BULK, PRIORITY_LOG, PRIORITY_ROLE
+
+log = get_logger("verify")
+
+# === 인증 버튼 수정: 질문/답변 추가 ===
+class VerifyButton(Button):
+    def __init__(self, label="✅ 인증하죠", style=discord.ButtonStyle.success, emoji="🪪"):
+        super().__init__(label=label, style=style, emoji=emoji, custom_id="verify_button")
+
+    @metrics.timed("component_latency_seconds", component="VerifyButton")
+    async def callback(self, interaction: discord.Interaction):
+        rt = get_runtime(interaction.guild)
+        if rt is None:
+            return await reply_unconfigured(interaction)
+        config = rt.config
+        verified_role = interaction.guild.get_role(config.verified_role_id)
+        guest_role = interaction.guild.get_role(config.guest_role_id)
+
+        if verified_role in interaction.user.roles:
+            return await interaction.response.send_message("이미 인증된 사용자입니다! 😉", ephemeral=True)
+
+        try:
+            await interaction.user.send(f"**인증 질문:**\n\n{config.verify_question}")
+            await interaction.response.send_message("DM으로 인증 질문을 보냈습니다. DM을 확인하고 코드를 입력해주세요! ✉️", ephemeral=True)
+
+            def check(m):
+                return m.author == interaction.user and m.channel == interaction.user.dm_channel
+
+            try:
+                answer_msg = await bot.wait_for("message", timeout=config.verify_timeout, check=check)
+
+                if answer_msg.content.strip() == config.verify_answer:
+                    member = interaction.user
+                    # 인증 역할 부여와 손님 역할 제거를 한 번의 역할 변경으로 반영합니다.
+                    await edit_member_roles(member, add=[verified_role], remove=[guest_role] if guest_role else ())
+                    
+                    await interaction.user.send("✅ 코드가 확인되었습니다! 성공적으로 인증되었어요! 이제 모든 채널을 이용할 수 있습니다! 🎉")
+                    log_channel = interaction.guild.get_channel(config.verify_log_channel_id)
+                    if log_channel:
+                        log_text = f"🛂 {member.mention} 님이 **찡긋** 역할로 인증되었습니다! (`{member.name}`)"
+                        await outbound.call(PRIORITY_LOG, f"channel:{log_channel.id}", lambda: log_channel.send(log_text))
+                else:
+                    await interaction.user.send("❌ 코드가 틀렸습니다. 다시 인증 버튼을 눌러 시도해주세요. 올바른 코드를 확인해주세요.")
+            except asyncio.TimeoutError:
+                await interaction.user.send(f"⏰ {config.verify_timeout}초 내에 답변이 없어서 인증이 취소되었습니다. 다시 인증 버튼을 눌러 시도해주세요.")
+            except Exception as e:
+                await interaction.user.send(f"인증 중 알 수 없는 오류가 발생했습니다. 잠시 후 다시 시도해주세요. ({e})")
+                log.exception("인증 DM 답변 처리 중 오류: %s", e, guild_id=interaction.guild_id, user_id=interaction.user.id)
+
+        except discord.Forbidden:
+            await interaction.response.send_message(
+                "DM을 보낼 수 없습니다. 개인정보 설정에서 서버 멤버로부터의 DM을 허용해주세요. "
+                "DM 설정 변경 후 다시 인증 버튼을 눌러 시도해주세요.", ephemeral=True
+            )
+        except Exception as e:
+            await interaction.response.send_message(f"인증 질문 전송 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요. ({e})", ephemeral=True)
+            log.exception("인증 질문 DM 전송 오류: %s", e, guild_id=interaction.guild_id, user_id=interaction.user.id)
+
+class VerifyView(View):
+    def __init__(self):
+        super().__init__(timeout=None)
+        self.add_item(VerifyButton())
+
+async def reconcile_verify_message(rt: GuildRuntime, guild: discord.Guild):
+    """인증 채널의 안내 메시지에 뷰를 다시 붙이거나, 없으면 새로 보냅니다."""
+    verify_channel = guild.get_channel(rt.config.verify_channel_id) if rt.config.verify_channel_id else None
+    if not verify_channel:
+        return
+
+    try:
+        found_existing_verify_msg = False
+        async for msg_history in verify_channel.history(limit=5):
+            if msg_history.author == bot.user and "✅ 서버에 오신 걸 환영합니다!" in msg_history.content:
+                found_existing_verify_msg = True
+                log.debug("기존 인증 메시지 발견. 뷰 재등록 시도.", guild_id=guild.id)
+                try:
+                    await msg_history.edit(view=VerifyView())
+                    log.info("✅ 기존 인증 메시지에 뷰 재등록 완료.", guild_id=guild.id)
+                except Exception as e_edit:
+                    log.error("기존 인증 메시지 수정 중 오류 발생: %s", e_edit, guild_id=guild.id)
+                break
+        
+        if not found_existing_verify_msg:
+            await verify_channel.send(
+                "✅ 서버에 오신 걸 환영합니다!\n아래 버튼을 눌러 인증을 완료해주세요.",
+                view=VerifyView()
+            )
+            log.info("✅ 새로운 인증 메시지 전송 완료.", guild_id=guild.id)
+    except Exception as e:
+        log.error("인증 메시지 전송 오류: %s", e, guild_id=guild.id)
+
+
+## 새 멤버 환영 및 인증 안내
+
+
+@metrics.timed("event_latency_seconds", event="on_member_join")
+async def on_member_join(member):
+    """새 멤버를 길드의 입장 큐에 넣습니다. 손님 역할과 환영 메시지는 큐가 나눠서 처리합니다."""
+    guild = member.guild
+    rt = get_runtime(guild)
+    if rt is None:
+        log.warning("⚠️ 설정되지 않은 길드에 멤버가 조인했습니다. %s에 길드를 추가해주세요.", GUILD_CONFIG_FILE, guild_id=guild.id, user_id=member.id)
+        return
+    rt.join_queue.submit(member)
+    metrics.inc("member_joins_total", guild=guild.id)
+
+async def assign_guest_role(rt: GuildRuntime, member: discord.Member, spike: bool):
+    """(입장 큐 작업자) '손님' 역할을 부여합니다. 급증 모드에서는 사용자 요청보다 뒤로 미룹니다."""
+    guild = member.guild
+    guest_role = guild.get_role(rt.config.guest_role_id) if rt.config.guest_role_id else None
+    if guest_role:
+        await edit_member_roles(member, add=[guest_role], priority=PRIORITY_BULK if spike else PRIORITY_ROLE)
+        if not spike:
+            log.debug("'손님' 역할 부여 완료", guild_id=guild.id, user_id=member.id)
+    elif not spike:
+        log.warning("⚠️ '손님' 역할 (ID: %s)을 찾을 수 없습니다. 역할 ID를 확인해주세요.", rt.config.guest_role_id, guild_id=guild.id)
+
+async def send_welcome(rt: GuildRuntime, members: list, spike: bool):
+    """(입장 큐) 모아 둔 새 멤버들을 한 메시지로 환영합니다. 급증 모드에서는 짧은 안내만 보냅니다."""
+    config = rt.config
+    guild = members[0].guild
+    welcome_channel = guild.get_channel(config.welcome_channel_id) if config.welcome_channel_id else None
+    if not welcome_channel:
+        log.warning("⚠️ 환영 메시지를 보낼 채널 (ID: %s)을 찾을 수 없습니다. 채널 ID를 확인해주세요.", config.welcome_channel_id, guild_id=guild.id)
+        return
+
+    mentions = " ".join(member.mention for member in members[:WELCOME_BATCH_SIZE])
+    others = len(members) - WELCOME_BATCH_SIZE
+    if others > 0:
+        mentions += f" 외 {others}명"
+    if spike:
+        welcome_message = f"👋 {mentions} 님, 환영합니다! <#{config.verify_channel_id}> 채널에서 인증해주세요."
+    else:
+        welcome_message = (
+            f"{mentions} 님, {guild.name} 디스코드 서버에 오신 것을 환영합니다! ✨\n\n"
+            f"저희 서버는 **인증**을 해야 모든 채널을 이용할 수 있습니다. 🧐\n"
+            f"현재는 **손님** 역할이 부여되어 일부 채널만 볼 수 있어요.\n\n"
+            f"1. 먼저 <#{config.verify_channel_id}> 채널로 이동하여 **`인증하죠`** 버튼을 눌러 멤버가 되어주세요! 🪪\n"
+            f"2. 인증 완료 후 <#{config.role_select_channel_id}> 채널에서 **아르카나 및 MBTI 역할**을 선택해주세요! 🎭\n\n"
+            "즐거운 시간 되세요! 😄"
+        )
+    await outbound.call(PRIORITY_LOG, f"channel:{welcome_channel.id}", lambda: welcome_channel.send(welcome_message))
+    log.debug("환영 메시지 전송 완료 (%d명)", len(members), guild_id=guild.id)
+
+async def report_join_spike(rt: GuildRuntime, active: bool, rate: int):
+    """입장 급증 모드가 켜지고 꺼질 때 인증 로그 채널에 알립니다."""
+    guild = bot.get_guild(rt.guild_id)
+    log_channel = guild.get_channel(rt.config.verify_log_channel_id) if guild else None
+    if not log_channel:
+        return
+    if active:
+        text = (f"🚨 입장 급증 감지: 최근 {JOIN_SPIKE_WINDOW:g}초에 {rate}명이 들어왔습니다. "
+                f"환영 메시지를 {WELCOME_SPIKE_BATCH_WINDOW:g}초마다 한 번으로 줄이고 손님 역할은 순서대로 부여합니다.")
+    else:
+        text = f"✅ 입장 급증이 끝나 일반 모드로 돌아왔습니다. (대기 중인 입장 {len(rt.join_queue)}명)"
+    try:
+        await outbound.call(PRIORITY_LOG, f"channel:{log_channel.id}", lambda: log_channel.send(text))
+    except Exception as e:
+        log.error("입장 급증 알림 전송 실패: %s", e, guild_id=rt.guild_id)
+
+
+async def setup(bot):
+    bot.add_view(VerifyView())
+    bot.add_listener(on_member_join)
+    join_handlers.update({"assign": assign_guest_role, "welcome": send_welcome, "spike": report_join_spike})
+    guild_reconcilers["인증 메시지"] = reconcile_verify_message
+
+async def teardown(bot):
+    for name in ("assign", "welcome", "spike"):
+        join_handlers.pop(name, None)
+    guild_reconcilers.pop("인증 메시지", None)
@@ -0,0 +1,126 @@
+import os
+import json
+
+from storage import atomic_write_text
+
+from log import get_logger
+
+log = get_logger("config")
+
+# 길드 설정 항목과 기본값 (채널/역할 ID는 반드시 길드마다 지정)
+CONFIG_FIELDS = {
+    "role_select_channel_id": None,
+    "verify_channel_id": None,
+    "verified_role_id": None,
+    "guest_role_id": None,
+    "verify_log_channel_id": None,
+    "welcome_channel_id": None,
+    "verify_question": "안내받은 코드를 입력하세요.",
+    "verify_answer": None,
+    "verify_timeout": 60,
+    "bot_nickname": "찡긋봇",
+}
+
+
+class GuildConfig:
+    """길드 하나의 채널/역할/인증 설정."""
+
+    def __init__(self, guild_id: int, data: dict):
+        self.guild_id = int(guild_id)
+        for field, default in CONFIG_FIELDS.items():
+            value = data.get(field, default)
+            if field.endswith("_id") and value is not None:
+                value = int(value)
+            setattr(self, field, value)
+        self.name = data.get("name", str(guild_id))
+        # {"JOB": {이름: 역할 ID}, "MBTI": {이름: 역할 ID}}
+        self.role_ids = {
+            category: {name: int(role_id) for name, role_id in roles.items()}
+            for category, roles in data.get("role_ids", {}).items()
+        }
+        self.role_ids.setdefault("JOB", {})
+        self.role_ids.setdefault("MBTI", {})
+        self.emojis = dict(data.get("emojis", {}))
+
+        # 로드할 때 한 번 만들어 두는 역할 ID 인덱스. 멤버 역할 확인을 이름 비교 대신 ID 집합 조회(O(1))로 합니다.
+        self.role_id_sets = {}         # 카테고리 -> 역할 ID 집합
+        self.category_by_role_id = {}  # 역할 ID -> 카테고리
+        self.role_name_by_id = {}      # 역할 ID -> 이름
+        for category, roles in self.role_ids.items():
+            self.role_id_sets[category] = frozenset(roles.values())
+            for name, role_id in roles.items():
+                self.category_by_role_id[role_id] = category
+                self.role_name_by_id[role_id] = name
+
+    @property
+    def job_role_names(self) -> list:
+        return list(self.role_ids["JOB"].keys())
+
+    def __eq__(self, other):
+        return isinstance(other, GuildConfig) and self.guild_id == other.guild_id and self.to_dict() == other.to_dict()
+
+    def to_dict(self) -> dict:
+        data = {"name": self.name}
+        for field in CONFIG_FIELDS:
+            data[field] = getattr(self, field)
+        data["role_ids"] = self.role_ids
+        if self.emojis:
+            data["emojis"] = self.emojis
+        return data
+
+
+class GuildConfigStore:
+    """길드별 설정을 JSON 파일에서 읽어 오는 저장소.
+
+    파일 형식: {"guilds": {"<길드 ID>": {...설정...}}}
+    파일이 없으면 defaults로 새로 만들어 두므로, 관리자가 그 파일을 고쳐 길드를 추가할 수 있습니다.
+    """
+
+    def __init__(self, path: str, defaults: dict = None):
+        self.path = path
+        self.defaults = defaults or {}
+        self.configs = {}
+
+    def load(self) -> dict:
+        """설정 파일을 읽고 {길드 ID: GuildConfig}를 반환합니다."""
+        if os.path.exists(self.path):
+            raw = self._read()
+            log.info("✅ 길드 설정 %d개 로드됨 (%s)", len(raw), self.path)
+        else:
+            raw = self.defaults
+            self.save_raw(raw)
+            log.info("ℹ️ %s 파일이 없어 기본 길드 설정으로 새로 만들었습니다.", self.path)
+        self.configs = self._parse(raw)
+        return self.configs
+
+    def reload(self) -> tuple:
+        """설정 파일을 다시 읽고 (이전 설정, 새 설정)을 반환합니다.
+
+        파일이 없거나 형식이 잘못되었으면 ValueError를 발생시키고 기존 설정을 그대로 둡니다.
+        """
+        try:
+            configs = self._parse(self._read())
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            raise ValueError(f"{self.path}을(를) 읽을 수 없습니다: {e}") from e
+        old, self.configs = self.configs, configs
+        return old, configs
+
+    def _read(self) -> dict:
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f).get("guilds", {})
+
+    @staticmethod
+    def _parse(raw: dict) -> dict:
+        return {int(guild_id): GuildConfig(guild_id, data) for guild_id, data in raw.items()}
+
+    def save_raw(self, raw: dict):
+        atomic_write_text(self.path, json.dumps({"guilds": raw}, ensure_ascii=False, indent=2))
+
+    def save(self):
+        self.save_raw({str(guild_id): config.to_dict() for guild_id, config in self.configs.items()})
+
+    def get(self, guild_id: int):
+        return self.configs.get(int(guild_id))
+
+    def guild_ids(self) -> list:
+        return list(self.configs)
@@ -0,0 +1,159 @@
+import os
+import json
+import copy
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from log import get_logger
+from storage import atomic_write_text
+
+log = get_logger("history")
+
+# 요일 이름 (datetime.weekday() 순서)
+WEEKDAYS = ("월", "화", "수", "목", "금", "토", "일")
+
+
+def empty_aggregates() -> dict:
+    """비어 있는 통계. 키는 JSON에 그대로 저장되도록 모두 문자열입니다."""
+    return {
+        "parties": 0,          # 끝난 파티 수
+        "participants": 0,     # 참여자 수 합계 (평균 인원 계산용)
+        "dungeons": {},        # 던전 -> 파티 수
+        "hours": {},           # 시작 시각(0~23시, KST) -> 파티 수
+        "weekdays": {},        # 요일(0=월) -> 파티 수
+        "arcana": {},          # 아르카나 -> 참여 횟수
+        "owners": {},          # 모집자 ID -> 파티 수
+        "sizes": {},           # 참여 인원 -> 파티 수
+        "offset": 0,           # 이 통계에 반영된 기록 파일의 바이트 위치
+    }
+
+
+def _bump(counter: dict, key, amount: int = 1):
+    key = str(key)
+    counter[key] = counter.get(key, 0) + amount
+
+
+class PartyHistory:
+    """끝난 파티 기록(한 줄에 JSON 하나)과, 기록할 때마다 함께 갱신하는 누적 통계.
+
+    `!파티통계`는 누적 통계만 읽으므로 기록이 몇 년 치 쌓여도 응답 시간이 같습니다.
+    기록 파일에 먼저 한 줄을 추가하고 통계 파일을 (반영한 바이트 위치와 함께) 저장하므로,
+    그 사이에 죽어도 다음 시작 때 통계에 빠진 기록만 다시 읽어 맞춥니다.
+    메모리의 통계는 기록 파일에 줄이 실제로 추가된 뒤에만 바뀝니다.
+    """
+
+    def __init__(self, records_path: str, stats_path: str, tz=timezone.utc):
+        self.records_path = records_path
+        self.stats_path = stats_path
+        self.tz = tz
+        self.aggregates = empty_aggregates()
+        # 쓰기 순서를 보장하기 위해 기록마다 스레드 하나만 사용합니다.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-writer")
+        self._write_lock = asyncio.Lock()
+
+    def load(self):
+        """저장된 통계를 읽고, 통계에 아직 반영되지 않은 기록이 있으면 이어서 반영합니다."""
+        try:
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                self.aggregates = dict(empty_aggregates(), **json.load(f))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            log.error("❌ 파티 통계 파일을 읽지 못해 기록에서 다시 만듭니다: %s", e)
+            self.aggregates = empty_aggregates()
+
+        if not os.path.exists(self.records_path):
+            return
+        if os.path.getsize(self.records_path) < self.aggregates["offset"]:
+            # 기록 파일이 잘렸거나 바뀌었으면 처음부터 다시 셉니다.
+            self.aggregates = empty_aggregates()
+        replayed = 0
+        with open(self.records_path, "rb") as f:
+            f.seek(self.aggregates["offset"])
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # 쓰다 만 마지막 줄
+                try:
+                    self._apply(self.aggregates, json.loads(raw))
+                    replayed += 1
+                except ValueError:
+                    log.warning("⚠️ 파티 기록의 잘못된 줄을 건너뜁니다.")
+                self.aggregates["offset"] += len(raw)
+        if self.aggregates["offset"] < os.path.getsize(self.records_path):
+            # 쓰다 만 꼬리를 잘라 내야 다음 기록이 그 뒤에 붙어 함께 버려지지 않습니다.
+            log.warning("⚠️ %s의 마지막 기록이 손상되어 버립니다.", self.records_path)
+            with open(self.records_path, "r+b") as f:
+                f.truncate(self.aggregates["offset"])
+        if replayed:
+            log.info("📚 파티 기록 %d건을 통계에 다시 반영했습니다.", replayed)
+            atomic_write_text(self.stats_path, json.dumps(self.aggregates, ensure_ascii=False))
+
+    def _apply(self, aggregates: dict, record: dict):
+        """기록 하나를 누적 통계에 더합니다."""
+        participants = record.get("participants", {})
+        aggregates["parties"] += 1
+        aggregates["participants"] += len(participants)
+        _bump(aggregates["dungeons"], record["dungeon"])
+        _bump(aggregates["owners"], record["owner_id"])
+        _bump(aggregates["sizes"], len(participants))
+        if record.get("party_time") is not None:
+            started = datetime.fromtimestamp(record["party_time"], tz=timezone.utc).astimezone(self.tz)
+            _bump(aggregates["hours"], started.hour)
+            _bump(aggregates["weekdays"], started.weekday())
+        for arcana in participants.values():
+            _bump(aggregates["arcana"], arcana)
+
+    async def record(self, thread_id, info: dict):
+        """끝난 파티 하나를 기록하고 통계에 더합니다."""
+        party_time = info.get("party_time")
+        record = {
+            "thread_id": str(thread_id),
+            "dungeon": info["dungeon"],
+            "date": info.get("date"),
+            "time": info.get("time"),
+            "party_time": party_time.timestamp() if isinstance(party_time, datetime) else party_time,
+            "owner_id": info["owner_id"],
+            "participants": dict(info.get("participants", {})),
+            "size": len(info.get("participants", {})),
+            "ended_at": time.time(),
+        }
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        loop = asyncio.get_running_loop()
+        async with self._write_lock:
+            # 줄 추가가 실패하면 예외가 그대로 올라가고 메모리의 통계는 바뀌지 않습니다.
+            offset = await loop.run_in_executor(self._executor, self._append, line)
+            updated = copy.deepcopy(self.aggregates)
+            self._apply(updated, record)
+            updated["offset"] = offset
+            self.aggregates = updated
+            try:
+                snapshot = json.dumps(updated, ensure_ascii=False)
+                await loop.run_in_executor(self._executor, atomic_write_text, self.stats_path, snapshot)
+            except OSError as e:
+                # 기록은 이미 남았으므로 통계 파일은 다음 기록이나 재시작 때 맞춰집니다.
+                log.warning("⚠️ 파티 통계 파일 저장 실패: %s", e)
+
+    def _append(self, line: bytes) -> int:
+        """기록 파일 끝에 한 줄을 추가하고 파일 끝 위치를 반환합니다. 실패하면 추가하던 부분을 잘라 냅니다."""
+        with open(self.records_path, "ab") as f:
+            start = f.seek(0, os.SEEK_END)
+            try:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                f.truncate(start)
+                raise
+            return start + len(line)
+
+    # --- 조회 (누적 통계만 읽음) ---
+    def top(self, key: str, limit: int = 5) -> list:
+        """누적 통계 하나에서 많은 순으로 (키, 횟수) 목록을 반환합니다."""
+        counter = self.aggregates[key]
+        return sorted(counter.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+    def average_size(self) -> float:
+        parties = self.aggregates["parties"]
+        return self.aggregates["participants"] / parties if parties else 0.0
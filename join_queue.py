@@ -0,0 +1,199 @@
+import time
+import asyncio
+from collections import deque
+
+from log import get_logger
+
+log = get_logger("join_queue")
+
+
+class JoinQueue:
+    """새로 들어온 멤버를 줄 세워 처리하는 길드별 입장 파이프라인.
+
+    - 입장 이벤트는 큐에 넣기만 하고 바로 끝나므로, 입장이 몰려도 이벤트 처리가 밀리지 않습니다.
+    - 손님 역할은 작업자 `concurrency`개가 나눠서 부여합니다. (동시 API 호출 수 제한)
+    - 환영 메시지는 `batch_window`초 동안 들어온 멤버를 모아 한 메시지에 최대 `batch_size`명씩 멘션합니다.
+    - `spike_window`초 안에 `spike_threshold`명 이상 들어오면 급증 모드로 바꿉니다. 급증 모드에서는
+      처리 함수에 spike=True가 전달되고(저렴한 방식으로 처리), 환영 메시지는 `spike_batch_window`초마다
+      한 번만 보냅니다. 입장 속도가 기준의 절반 아래로 `spike_cooldown`초 동안 유지되면 돌아옵니다.
+      (입장이 끊겨도 풀리도록 급증 모드에서는 `check_interval`초마다 따로 확인합니다.)
+
+    처리 함수: `assign(member, spike)`는 손님 역할 부여, `welcome(members, spike)`는 환영 메시지,
+    `on_spike(active, rate)`는 급증 모드가 켜지고 꺼질 때, `on_processed(seconds)`는 멤버 한 명의
+    처리가 끝날 때 (큐에 넣은 뒤 걸린 시간과 함께) 호출됩니다.
+    """
+
+    def __init__(self, assign, welcome, on_spike=None, on_processed=None, *, concurrency: int = 4, batch_size: int = 20,
+                 batch_window: float = 3.0, spike_batch_window: float = 15.0, spike_threshold: int = 10,
+                 spike_window: float = 10.0, spike_cooldown: float = 60.0):
+        self.assign = assign
+        self.welcome = welcome
+        self.on_spike = on_spike
+        self.on_processed = on_processed
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.spike_batch_window = spike_batch_window
+        self.spike_threshold = spike_threshold
+        self.spike_window = spike_window
+        self.spike_cooldown = spike_cooldown
+
+        self._pending = deque()          # (멤버, 넣은 시각) - 역할 부여 대기
+        self._has_pending = asyncio.Event()
+        self._welcome = []               # 환영 메시지 대기 멤버
+        self._has_welcome = asyncio.Event()
+        self._arrivals = deque()         # 최근 spike_window초 안의 입장 시각
+        self._tasks = []
+        self._active = 0
+
+        self.spike = False
+        self._spike_calm_since = None    # 급증 모드에서 입장 속도가 기준 아래로 내려간 시각
+
+        # 통계용 카운터
+        self.joined = 0
+        self.assigned = 0
+        self.failed = 0
+        self.welcomed = 0
+        self.welcome_messages = 0
+        self.spikes = 0
+        self.max_wait = 0.0
+
+    # 급증 모드 해제를 확인하는 주기 (초)
+    check_interval = 1.0
+
+    def __len__(self):
+        return len(self._pending)
+
+    # --- 시작 / 종료 ---
+    def start(self):
+        """작업자와 환영 메시지 작업을 시작합니다. (이벤트 루프 안에서 호출)"""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker(), name=f"join-worker-{i}") for i in range(self.concurrency)]
+        self._tasks.append(loop.create_task(self._welcomer(), name="join-welcomer"))
+        self._tasks.append(loop.create_task(self._spike_watch(), name="join-spike-watch"))
+
+    async def drain(self, timeout: float) -> bool:
+        """대기 중인 역할 부여가 끝날 때까지 최대 timeout초 기다립니다. 모두 끝났으면 True."""
+        deadline = time.monotonic() + timeout
+        while self._pending or self._active:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks = []
+
+    # --- 입장 ---
+    def submit(self, member):
+        """새 멤버를 큐에 넣습니다. 바로 반환합니다."""
+        now = time.monotonic()
+        self.joined += 1
+        self._arrivals.append(now)
+        self._update_spike(now)
+        self._pending.append((member, now))
+        self._has_pending.set()
+        self._welcome.append(member)
+        self._has_welcome.set()
+
+    def _update_spike(self, now: float):
+        while self._arrivals and now - self._arrivals[0] > self.spike_window:
+            self._arrivals.popleft()
+        rate = len(self._arrivals)
+        if not self.spike:
+            if rate >= self.spike_threshold:
+                self.spike = True
+                self.spikes += 1
+                self._spike_calm_since = None
+                log.warning("🚨 입장 급증 감지: %d초에 %d명, 급증 모드로 전환합니다.", self.spike_window, rate)
+                if self.on_spike:
+                    self.on_spike(True, rate)
+            return
+        if rate * 2 >= self.spike_threshold:
+            self._spike_calm_since = None
+        elif self._spike_calm_since is None:
+            self._spike_calm_since = now
+        elif now - self._spike_calm_since >= self.spike_cooldown:
+            self.spike = False
+            log.info("✅ 입장 급증 종료: 일반 모드로 돌아갑니다. (대기 %d명)", len(self._pending))
+            if self.on_spike:
+                self.on_spike(False, rate)
+
+    async def _spike_watch(self):
+        """급증 모드일 때 입장이 끊겨도 쿨다운이 지나면 일반 모드로 돌아오도록 주기적으로 확인합니다."""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            if self.spike:
+                self._update_spike(time.monotonic())
+
+    # --- 작업자 ---
+    async def _worker(self):
+        while True:
+            while not self._pending:
+                self._has_pending.clear()
+                await self._has_pending.wait()
+            member, enqueued_at = self._pending.popleft()
+            self._active += 1
+            try:
+                await self.assign(member, self.spike)
+                self.assigned += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                log.exception("❌ 입장 처리 실패: %s", e, guild_id=member.guild.id, user_id=member.id)
+            finally:
+                self._active -= 1
+                waited = time.monotonic() - enqueued_at
+                self.max_wait = max(self.max_wait, waited)
+                if self.on_processed:
+                    self.on_processed(waited)
+
+    async def _welcomer(self):
+        while True:
+            await self._has_welcome.wait()
+            await asyncio.sleep(self.spike_batch_window if self.spike else self.batch_window)
+            self._update_spike(time.monotonic())
+            batch, self._welcome = self._welcome, []
+            self._has_welcome.clear()
+            spike = self.spike
+            # 급증 모드에서는 창마다 메시지 한 개만 보냅니다. (멘션은 batch_size명까지, 나머지는 인원 수로)
+            chunks = [batch] if spike else [batch[i:i + self.batch_size] for i in range(0, len(batch), self.batch_size)]
+            for chunk in chunks:
+                try:
+                    await self.welcome(chunk, spike)
+                    self.welcome_messages += 1
+                    self.welcomed += len(chunk)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    log.exception("❌ 환영 메시지 전송 실패: %s", e)
+
+    # --- 통계 ---
+    def stats(self) -> dict:
+        """현재 상태를 반환합니다. 읽기만 하고 급증 모드를 바꾸지 않습니다."""
+        now = time.monotonic()
+        return {
+            "depth": len(self._pending),
+            "active": self._active,
+            "oldest_wait": now - self._pending[0][1] if self._pending else 0.0,
+            "max_wait": self.max_wait,
+            "welcome_pending": len(self._welcome),
+            "rate": sum(1 for arrived in self._arrivals if now - arrived <= self.spike_window),
+            "spike": self.spike,
+            "spikes": self.spikes,
+            "joined": self.joined,
+            "assigned": self.assigned,
+            "failed": self.failed,
+            "welcomed": self.welcomed,
+            "welcome_messages": self.welcome_messages,
+        }
@@ -0,0 +1,182 @@
+import os
+import time
+import socket
+import sqlite3
+import asyncio
+
+from log import get_logger
+
+log = get_logger("lease")
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lease (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    acquired_at REAL NOT NULL
+);
+"""
+
+
+def default_holder_id() -> str:
+    """이 프로세스를 구분하는 ID (호스트:PID)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaderLease:
+    """SQLite 행 하나로 구현한 리더 임대(lease).
+
+    같은 파일을 보는 여러 프로세스 중 임대를 가진 하나만 리더가 됩니다. 리더는 `ttl`초보다
+    자주(`heartbeat`초마다) 만료 시각을 연장하고, 연장하지 못한 채 만료되면 대기 중인
+    프로세스가 다음 확인 때 임대를 가져갑니다. 정상 종료 시 `release()`로 바로 넘겨줍니다.
+
+    획득/연장은 `BEGIN IMMEDIATE` 트랜잭션 안에서 "비어 있거나, 만료됐거나, 내 것"일 때만
+    쓰므로 두 프로세스가 동시에 리더가 되지 않습니다. 시각은 프로세스 사이에 공유되는 벽시계(time.time)를 씁니다.
+
+    임대 파일이 잠겨 있거나 이벤트 루프가 멈춰 `ttl`초 동안 연장하지 못하면, DB에 닿지 않더라도
+    스스로 리더에서 내려옵니다. (그 사이 대기 프로세스가 임대를 가져갔을 수 있으므로)
+    """
+
+    def __init__(self, path: str, name: str = "bot", holder: str = None, ttl: float = 6.0, heartbeat: float = 2.0):
+        if heartbeat >= ttl:
+            raise ValueError("heartbeat는 ttl보다 짧아야 합니다.")
+        self.path = path
+        self.name = name
+        self.holder = holder or default_holder_id()
+        self.ttl = ttl
+        self.heartbeat = heartbeat
+        self.is_leader = False
+        # 리더 자격을 잃으면 호출됩니다. (async def on_lost())
+        self.on_lost = None
+        self._task = None
+        self._conn = None
+        self._last_renewed = 0.0  # 마지막으로 연장에 성공한 시도를 시작한 시각 (monotonic)
+
+        # 통계용
+        self.acquired_at = None
+        self.renew_count = 0
+        self.wait_duration = 0.0
+
+    # --- SQLite (스레드에서 실행) ---
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=self.heartbeat, check_same_thread=False, isolation_level=None)
+            self._conn.executescript(LEASE_SCHEMA)
+        return self._conn
+
+    def _try_acquire(self) -> bool:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT holder, expires_at FROM lease WHERE name = ?", (self.name,)).fetchone()
+            if row and row[0] != self.holder and row[1] > now:
+                conn.execute("COMMIT")
+                return False
+            acquired_at = now if not row or row[0] != self.holder else None
+            conn.execute(
+                "INSERT INTO lease (name, holder, expires_at, acquired_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at, "
+                "acquired_at = COALESCE(?, lease.acquired_at)",
+                (self.name, self.holder, now + self.ttl, now, acquired_at),
+            )
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _renew(self) -> bool:
+        cur = self._connect().execute(
+            "UPDATE lease SET expires_at = ? WHERE name = ? AND holder = ? AND expires_at > ?",
+            (time.time() + self.ttl, self.name, self.holder, time.time()),
+        )
+        return cur.rowcount == 1
+
+    def _release(self):
+        self._connect().execute("DELETE FROM lease WHERE name = ? AND holder = ?", (self.name, self.holder))
+
+    def current(self):
+        """현재 임대 정보 (holder, 남은 초)를 반환합니다. 없으면 None."""
+        row = self._connect().execute("SELECT holder, expires_at FROM lease WHERE name = ?", (self.name,)).fetchone()
+        return (row[0], row[1] - time.time()) if row else None
+
+    # --- 비동기 API ---
+    async def acquire(self):
+        """리더가 될 때까지 기다립니다. 다른 리더가 있으면 대기(standby) 상태로 `heartbeat`초마다 다시 시도합니다."""
+        started = time.monotonic()
+        announced = False
+        while True:
+            attempt_started = time.monotonic()
+            if await asyncio.to_thread(self._try_acquire):
+                break
+            if not announced:
+                holder = await asyncio.to_thread(self.current)
+                log.info("⏳ 다른 프로세스(%s)가 리더입니다. 대기 상태로 임대를 기다립니다.", holder[0] if holder else "?")
+                announced = True
+            await asyncio.sleep(self.heartbeat)
+        self._last_renewed = attempt_started
+        self.is_leader = True
+        self.acquired_at = time.time()
+        self.wait_duration = time.monotonic() - started
+        log.info("👑 리더 임대 획득: %s", self.holder, duration=self.wait_duration)
+
+    def start(self):
+        """임대 연장 작업을 시작합니다. (acquire 후, 이벤트 루프 안에서 호출)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def _expired(self) -> bool:
+        """마지막 연장 후 ttl이 지났는지. (이 프로세스 기준으로 임대가 이미 만료되었을 수 있음)"""
+        return time.monotonic() - self._last_renewed >= self.ttl
+
+    async def _run(self):
+        while self.is_leader:
+            await asyncio.sleep(self.heartbeat)
+            attempt_started = time.monotonic()
+            renewed = None
+            if not self._expired():
+                try:
+                    # 연장이 만료 시각을 넘겨 끝나지 않도록, 남은 시간까지만 기다립니다.
+                    remaining = self.ttl - (attempt_started - self._last_renewed)
+                    renewed = await asyncio.wait_for(asyncio.to_thread(self._renew), timeout=remaining)
+                except (sqlite3.Error, asyncio.TimeoutError) as e:
+                    # 잠깐의 잠금 경합 등은 다음 연장에서 다시 시도합니다. ttl이 지나면 아래에서 내려옵니다.
+                    log.warning("⚠️ 리더 임대 연장 실패: %s", e or "시간 초과")
+            if renewed:
+                self._last_renewed = attempt_started
+                self.renew_count += 1
+                continue
+            if renewed is None and not self._expired():
+                continue
+            await self._step_down("연장 실패" if renewed is False else f"{self.ttl:.0f}초 동안 연장하지 못함")
+
+    async def _step_down(self, reason: str):
+        """리더 자격을 내려놓고 on_lost를 부릅니다. DB에 닿지 않아도 이 프로세스는 더 이상 쓰지 않습니다."""
+        self.is_leader = False
+        log.error("❌ 리더 임대를 잃었습니다 (%s): %s", reason, self.holder)
+        if self.on_lost:
+            await self.on_lost()
+
+    async def release(self):
+        """연장 작업을 멈추고, 아직 리더라면 임대를 바로 내려놓아 대기 중인 프로세스가 이어받게 합니다."""
+        if self._task and self._task is not asyncio.current_task():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            await asyncio.to_thread(self._release)
+            log.info("👋 리더 임대 반납: %s", self.holder)
+
+    def stats(self) -> dict:
+        return {
+            "holder": self.holder,
+            "is_leader": self.is_leader,
+            "held_for": time.time() - self.acquired_at if self.is_leader and self.acquired_at else 0.0,
+            "renewals": self.renew_count,
+            "wait_duration": self.wait_duration,
+        }
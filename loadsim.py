@@ -0,0 +1,916 @@
+"""찡긋봇 부하 시뮬레이터.
+
+디스코드에 접속하지 않고 봇(core.py와 extensions/)의 실제 핸들러(역할 버튼, 인증 버튼, 파티 참여 드롭다운,
+`!모집`, 입장 이벤트)를 그대로 실행합니다.
+
+- REST: `bot.http.request`와 인터랙션 응답용 웹훅 어댑터를 프로세스 안의 가짜 서버(FakeDiscord)로
+  바꿉니다. 요청마다 지연 시간을 주고, 확률 또는 경로별 한도로 429를 만들어 냅니다.
+- 게이트웨이: discord.py의 ConnectionState 파서에 GUILD_CREATE, INTERACTION_CREATE,
+  MESSAGE_CREATE, GUILD_MEMBER_ADD 등의 페이로드를 직접 넣습니다. 역할 변경이나 스레드 생성처럼
+  실제 디스코드가 게이트웨이 이벤트를 돌려보내는 경우 가짜 서버도 똑같이 돌려보냅니다.
+
+시나리오별로 핸들러 지연 시간(p50/p99), 인터랙션 응답(ack) 지연, 인터랙션당 REST 호출 수,
+429 횟수, 이벤트 루프 지연을 보고합니다.
+
+사용법:
+    python loadsim.py                                   # 모든 시나리오
+    python loadsim.py raid role-toggle --count 500 --rate 100
+    python loadsim.py party --latency 0.1 --ratelimit-prob 0.05 --retry-after 0.5
+    python loadsim.py mixed --bucket 5/5 --json loadsim_results.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import itertools
+import contextlib
+from collections import deque
+from datetime import datetime, timezone
+
+import discord
+from discord.http import Route
+from discord.webhook import async_ as webhook_async
+
+from log import ROOT_LOGGER, ConsoleFormatter, StdoutHandler
+
+SCENARIOS = ("join-storm", "raid", "role-toggle", "verify", "party", "mixed")
+
+APPLICATION_ID = 900000000000000001
+BOT_USER_ID = 900000000000000002
+PARTY_CHANNEL_ID = 900000000000000003
+INTERACTION_DEADLINE = 3.0  # 디스코드는 3초 안에 응답하지 않은 인터랙션을 실패로 처리합니다.
+
+
+class FakeResponse:
+    """discord.HTTPException 생성에 필요한 최소한의 응답 객체."""
+    def __init__(self, status: int, reason: str):
+        self.status = status
+        self.reason = reason
+
+
+def percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(samples) -> dict:
+    return {
+        "count": len(samples),
+        "p50": percentile(samples, 0.50),
+        "p99": percentile(samples, 0.99),
+        "max": max(samples, default=0.0),
+    }
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# === 가짜 디스코드 서버 ===
+class FakeDiscord:
+    """REST 요청에 응답하고, 필요한 게이트웨이 이벤트를 돌려보내는 가짜 디스코드 서버."""
+
+    def __init__(self, guild_id: int, latency: float = 0.05, jitter: float = 0.5,
+                 ratelimit_prob: float = 0.0, retry_after: float = 1.0, bucket=None, seed: int = 0):
+        self.guild_id = guild_id
+        self.latency = latency
+        self.jitter = jitter
+        self.ratelimit_prob = ratelimit_prob
+        self.retry_after = retry_after
+        self.bucket = bucket                    # (한도, 초) 또는 None
+        self.rng = random.Random(seed)
+        self.state = None                       # ConnectionState (연결 후 설정)
+        self.max_ratelimit_timeout = 30.0
+
+        self._ids = itertools.count(1)
+        self.bot_user = self.user_payload(BOT_USER_ID, "찡긋봇", bot=True)
+        self.members = {}                       # 사용자 ID -> {"user", "roles", "nick", "joined_at"}
+        self.messages = {}                      # 메시지 ID -> 채널 ID
+        self.dm_channels = {}                   # 사용자 ID -> DM 채널 ID
+        self.dm_users = {}                      # DM 채널 ID -> 사용자 ID
+        self.interaction_started = {}           # 인터랙션 토큰 -> 시작 시각
+        self._message_waiters = []              # (조건, Future)
+        self._response_waiters = {}             # 인터랙션 토큰 -> Future
+        self._windows = {}                      # 버킷 키 -> 최근 요청 시각들
+
+        self.reset_counters()
+
+    # --- 카운터 ---
+    def reset_counters(self):
+        self.rest_calls = 0
+        self.rest_by_route = {}
+        self.callbacks = 0
+        self.injected_429 = 0
+        self.raised_ratelimited = 0
+        self.ack_latencies = []
+        self.late_acks = 0
+        self.inflight = 0
+
+    # --- 페이로드 ---
+    def snowflake(self) -> int:
+        return discord.utils.time_snowflake(datetime.now(timezone.utc)) + next(self._ids)
+
+    @staticmethod
+    def user_payload(user_id: int, name: str, bot: bool = False) -> dict:
+        return {"id": str(user_id), "username": name, "global_name": name, "discriminator": "0", "avatar": None, "bot": bot}
+
+    def member_payload(self, user_id: int) -> dict:
+        member = self.members[user_id]
+        return {
+            "user": member["user"],
+            "roles": [str(role_id) for role_id in member["roles"]],
+            "nick": member["nick"],
+            "joined_at": member["joined_at"],
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+            "pending": False,
+            "avatar": None,
+            "premium_since": None,
+        }
+
+    def add_member(self, user_id: int, name: str, roles=()) -> dict:
+        self.members[user_id] = {"user": self.user_payload(user_id, name), "roles": set(roles), "nick": None, "joined_at": now_iso()}
+        return self.member_payload(user_id)
+
+    def message_payload(self, channel_id: int, content: str = "", embeds=(), components=(), author=None,
+                        message_id: int = None, member=None) -> dict:
+        payload = {
+            "id": str(message_id or self.snowflake()),
+            "channel_id": str(channel_id),
+            "author": author or self.bot_user,
+            "content": content,
+            "timestamp": now_iso(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": list(embeds),
+            "components": list(components),
+            "pinned": False,
+            "type": 0,
+        }
+        if channel_id not in self.dm_users:
+            payload["guild_id"] = str(self.guild_id)
+        if member is not None:
+            payload["member"] = member
+        self.messages[int(payload["id"])] = channel_id
+        return payload
+
+    def guild_payload(self, roles: dict, channels: dict) -> dict:
+        """roles: {ID: 이름}, channels: {ID: 이름}"""
+        return {
+            "id": str(self.guild_id),
+            "name": "찡긋 (시뮬레이션)",
+            "icon": None,
+            "owner_id": str(BOT_USER_ID),
+            "roles": [
+                {"id": str(role_id), "name": name, "color": 0, "hoist": False, "position": i,
+                 "permissions": "8" if role_id == self.guild_id else "0", "managed": False, "mentionable": False}
+                for i, (role_id, name) in enumerate(roles.items())
+            ],
+            "channels": [
+                {"id": str(channel_id), "type": 0, "name": name, "position": i, "permission_overwrites": [],
+                 "guild_id": str(self.guild_id), "nsfw": False, "parent_id": None, "rate_limit_per_user": 0}
+                for i, (channel_id, name) in enumerate(channels.items())
+            ],
+            "members": [self.member_payload(user_id) for user_id in self.members],
+            "member_count": len(self.members),
+            "threads": [],
+            "emojis": [],
+            "stickers": [],
+            "features": [],
+            "large": False,
+            "unavailable": False,
+            "verification_level": 0,
+            "default_message_notifications": 0,
+            "explicit_content_filter": 0,
+            "mfa_level": 0,
+            "premium_tier": 0,
+            "system_channel_flags": 0,
+            "preferred_locale": "ko",
+        }
+
+    # --- 게이트웨이 ---
+    def dispatch(self, event: str, payload: dict):
+        """게이트웨이 이벤트 하나를 봇에 전달합니다."""
+        self.state.parsers[event](payload)
+
+    def dispatch_soon(self, event: str, payload: dict):
+        asyncio.get_running_loop().call_soon(self.dispatch, event, payload)
+
+    def emit_member_update(self, user_id: int):
+        payload = self.member_payload(user_id)
+        payload["guild_id"] = str(self.guild_id)
+        self.dispatch_soon("GUILD_MEMBER_UPDATE", payload)
+
+    # --- 대기 ---
+    def expect_message(self, predicate) -> asyncio.Future:
+        """봇이 보내는 메시지 중 predicate(페이로드)를 만족하는 첫 메시지를 기다리는 Future."""
+        future = asyncio.get_running_loop().create_future()
+        self._message_waiters.append((predicate, future))
+        return future
+
+    def expect_response(self, token: str) -> asyncio.Future:
+        """인터랙션에 대한 첫 응답(콜백)을 기다리는 Future. 결과는 (응답 종류, 데이터)."""
+        future = asyncio.get_running_loop().create_future()
+        self._response_waiters[token] = future
+        return future
+
+    def _notify_message(self, payload: dict):
+        if not self._message_waiters:
+            return
+        remaining = []
+        for predicate, future in self._message_waiters:
+            if future.done():
+                continue
+            if predicate(payload):
+                future.set_result(payload)
+            else:
+                remaining.append((predicate, future))
+        self._message_waiters = remaining
+
+    # --- 지연 / 429 ---
+    async def _delay(self):
+        if self.latency > 0:
+            spread = self.latency * self.jitter
+            await asyncio.sleep(max(0.0, self.rng.uniform(self.latency - spread, self.latency + spread)))
+
+    def _ratelimit(self, route: Route) -> float:
+        """이번 요청이 429를 받아야 하면 retry_after를, 아니면 0을 반환합니다."""
+        if self.bucket:
+            limit, per = self.bucket
+            key = (route.method, route.path, route.channel_id, route.guild_id)
+            window = self._windows.setdefault(key, deque())
+            now = time.monotonic()
+            while window and now - window[0] >= per:
+                window.popleft()
+            if len(window) >= limit:
+                return per - (now - window[0])
+            window.append(now)
+        if self.ratelimit_prob and self.rng.random() < self.ratelimit_prob:
+            return self.retry_after
+        return 0.0
+
+    # --- REST (bot.http.request 대체) ---
+    async def request(self, route: Route, *, files=None, form=None, **kwargs):
+        """discord.py HTTPClient.request와 같은 방식으로 429를 처리합니다.
+
+        retry_after가 max_ratelimit_timeout보다 길면 discord.RateLimited를, 아니면 기다렸다가 다시 보냅니다.
+        """
+        name = f"{route.method} {route.path}"
+        self.inflight += 1
+        try:
+            while True:
+                self.rest_calls += 1
+                self.rest_by_route[name] = self.rest_by_route.get(name, 0) + 1
+                await self._delay()
+                retry_after = self._ratelimit(route)
+                if not retry_after:
+                    break
+                self.injected_429 += 1
+                if retry_after > self.max_ratelimit_timeout:
+                    self.raised_ratelimited += 1
+                    raise discord.RateLimited(retry_after)
+                await asyncio.sleep(retry_after)
+
+            payload = kwargs.get("json")
+            if payload is None and form:
+                payload = next((json.loads(part["value"]) for part in form if part.get("name") == "payload_json"), None)
+            return self._handle(route, payload or {}, kwargs.get("params") or {})
+        finally:
+            self.inflight -= 1
+
+    def _not_found(self, text: str):
+        return discord.NotFound(FakeResponse(404, "Not Found"), {"message": text, "code": 10008})
+
+    def _handle(self, route: Route, payload: dict, params: dict):
+        method, path = route.method, route.path
+        parts = route.url[len(Route.BASE):].split("/")
+
+        if path == "/users/@me":
+            return self.bot_user
+        if path == "/oauth2/applications/@me":
+            return {
+                "id": str(APPLICATION_ID), "name": "찡긋봇", "icon": None, "description": "", "rpc_origins": [],
+                "bot_public": False, "bot_require_code_grant": False, "owner": self.user_payload(1, "owner"),
+                "verify_key": "0", "flags": 0,
+            }
+        if path.startswith("/applications/"):
+            return []
+        if path == "/users/@me/channels":
+            user_id = int(payload["recipient_id"])
+            channel_id = self.dm_channels.get(user_id)
+            if channel_id is None:
+                channel_id = self.dm_channels[user_id] = self.snowflake()
+                self.dm_users[channel_id] = user_id
+            return {"id": str(channel_id), "type": 1, "last_message_id": None, "recipients": [self.members[user_id]["user"]]}
+
+        if path == "/guilds/{guild_id}/members/{user_id}/roles/{role_id}":
+            user_id, role_id = int(parts[4]), int(parts[6])
+            member = self.members.get(user_id)
+            if member is None:
+                raise self._not_found("Unknown Member")
+            if method == "PUT":
+                member["roles"].add(role_id)
+            else:
+                member["roles"].discard(role_id)
+            self.emit_member_update(user_id)
+            return None
+        if path == "/guilds/{guild_id}/members" and method == "GET":
+            after, limit = int(params.get("after", 0)), int(params.get("limit", 1000))
+            user_ids = sorted(user_id for user_id in self.members if user_id > after)[:limit]
+            return [self.member_payload(user_id) for user_id in user_ids]
+        if path == "/guilds/{guild_id}/members/{user_id}":
+            user_id = int(parts[4])
+            member = self.members.get(user_id)
+            if member is None:
+                raise self._not_found("Unknown Member")
+            if method == "GET":
+                return self.member_payload(user_id)
+            if "roles" in payload:
+                member["roles"] = {int(role_id) for role_id in payload["roles"]}
+            if "nick" in payload:
+                member["nick"] = payload["nick"]
+            self.emit_member_update(user_id)
+            return self.member_payload(user_id)
+        if path == "/guilds/{guild_id}/members/@me":
+            return {}
+
+        if path == "/channels/{channel_id}/messages" and method == "POST":
+            message = self.message_payload(route.channel_id, payload.get("content") or "", payload.get("embeds") or (),
+                                           payload.get("components") or ())
+            self._notify_message(message)
+            return message
+        if path == "/channels/{channel_id}/messages/{message_id}":
+            message_id = int(parts[4])
+            if message_id not in self.messages:
+                raise self._not_found("Unknown Message")
+            if method == "DELETE":
+                self.messages.pop(message_id, None)
+                return None
+            if method == "PATCH":
+                return self.message_payload(route.channel_id, payload.get("content") or "", payload.get("embeds") or (),
+                                            payload.get("components") or (), message_id=message_id)
+            return self.message_payload(route.channel_id, message_id=message_id)
+        if path == "/channels/{channel_id}/pins/{message_id}":
+            return None
+        if path == "/channels/{channel_id}/threads" and method == "POST":
+            thread_id = self.snowflake()
+            thread = {
+                "id": str(thread_id), "guild_id": str(self.guild_id), "parent_id": str(route.channel_id),
+                "owner_id": str(BOT_USER_ID), "name": payload.get("name", "thread"), "type": 11,
+                "last_message_id": None, "rate_limit_per_user": 0, "message_count": 0, "member_count": 1,
+                "flags": 0,
+                "thread_metadata": {"archived": False, "auto_archive_duration": payload.get("auto_archive_duration", 1440),
+                                    "archive_timestamp": now_iso(), "locked": False},
+            }
+            # 실제 디스코드처럼 THREAD_CREATE도 게이트웨이로 보냅니다.
+            self.dispatch_soon("THREAD_CREATE", dict(thread, newly_created=True))
+            return thread
+        if path == "/channels/{channel_id}":
+            if method == "DELETE":
+                return {"id": str(route.channel_id), "type": 11}
+            return {"id": str(route.channel_id), "type": 0, "guild_id": str(self.guild_id), "name": "channel", "position": 0,
+                    "permission_overwrites": []}
+        return {}
+
+    # --- 인터랙션 응답 / 후속 메시지 (웹훅 어댑터) ---
+    async def webhook_request(self, route: Route, payload=None, multipart=None):
+        if payload is None and multipart:
+            payload = next((json.loads(part["value"]) for part in multipart if part.get("name") == "payload_json"), None)
+        payload = payload or {}
+        self.inflight += 1
+        try:
+            await self._delay()
+        finally:
+            self.inflight -= 1
+
+        token = route.webhook_token
+        if route.path.endswith("/callback"):
+            self.callbacks += 1
+            started = self.interaction_started.pop(token, None)
+            if started is not None:
+                elapsed = time.perf_counter() - started
+                self.ack_latencies.append(elapsed)
+                if elapsed > INTERACTION_DEADLINE:
+                    self.late_acks += 1
+            future = self._response_waiters.pop(token, None)
+            if future and not future.done():
+                future.set_result((payload.get("type"), payload.get("data") or {}))
+            return None
+
+        self.rest_calls += 1
+        name = f"{route.method} {route.path}"
+        self.rest_by_route[name] = self.rest_by_route.get(name, 0) + 1
+        if route.method == "DELETE":
+            return None
+        data = payload.get("data", payload)
+        message = self.message_payload(PARTY_CHANNEL_ID, data.get("content") or "", data.get("embeds") or (),
+                                       data.get("components") or ())
+        self._notify_message(dict(message, webhook_token=token))
+        return message
+
+
+class FakeWebhookAdapter(webhook_async.AsyncWebhookAdapter):
+    """인터랙션 응답과 후속 메시지를 가짜 서버로 보내는 어댑터."""
+
+    def __init__(self, fake: FakeDiscord):
+        super().__init__()
+        self.fake = fake
+
+    async def request(self, route, session, *, payload=None, multipart=None, **kwargs):
+        return await self.fake.webhook_request(route, payload=payload, multipart=multipart)
+
+
+# === 시뮬레이터 ===
+class Simulator:
+    """core.py의 봇(확장 포함)을 가짜 서버에 연결하고 사용자 행동을 만들어 내는 드라이버."""
+
+    def __init__(self, core, fake: FakeDiscord, members: int, seed: int):
+        self.core = core
+        self.bot = core.bot
+        self.fake = fake
+        self.rng = random.Random(seed)
+        self.initial_members = members
+        self.verified = []          # 인증된 멤버 ID
+        self.guests = []            # 손님 멤버 ID
+        self.parties = []           # 파티 스레드 ID
+        self.interactions = 0
+        self.joins = 0
+        self.flow_latencies = {}    # 흐름 이름 -> [초]
+        self.handler_latencies = {} # 핸들러 이름 -> [초]
+        self.loop_lag = []
+        self.errors = []
+        self._user_ids = itertools.count(800000000000000000)
+        self.role_message_id = fake.snowflake()
+        self.verify_message_id = fake.snowflake()
+        self._lag_task = None
+        self.rt = None              # 시뮬레이션 길드의 GuildRuntime (start에서 설정)
+
+    # --- 준비 ---
+    def _capture_handler_latencies(self):
+        """봇이 기록하는 핸들러 지연 시간을 표본 그대로도 모읍니다."""
+        registry = self.core.metrics
+        original = registry.observe
+        names = ("component_latency_seconds", "command_latency_seconds", "event_latency_seconds")
+
+        def observe(name, value, **labels):
+            if name in names:
+                label = labels.get("component") or labels.get("command") or labels.get("event")
+                self.handler_latencies.setdefault(label, []).append(value)
+            original(name, value, **labels)
+
+        registry.observe = observe
+
+    def _capture_errors(self):
+        sim = self
+
+        class ErrorCounter(logging.Handler):
+            def emit(self, record):
+                sim.errors.append(record.getMessage() + (f": {record.exc_info[1]!r}" if record.exc_info else ""))
+
+        logger = logging.getLogger("discord")
+        logger.addHandler(ErrorCounter(level=logging.ERROR))
+        logger.propagate = False
+
+        # 봇 로그는 예전 print처럼 (시뮬레이터가 바꿔 끼운) stdout으로 보냅니다. --verbose가 아니면 감춰집니다.
+        bot_logger = logging.getLogger(ROOT_LOGGER)
+        console = StdoutHandler()
+        console.setFormatter(ConsoleFormatter())
+        bot_logger.addHandler(console)
+        bot_logger.propagate = False
+
+    async def start(self):
+        core, bot, fake = self.core, self.bot, self.fake
+        webhook_async.async_context.set(FakeWebhookAdapter(fake))
+        bot.http.request = fake.request
+        fake.max_ratelimit_timeout = bot.http.max_ratelimit_timeout
+        self._capture_handler_latencies()
+        self._capture_errors()
+        # 로그인(가짜 REST) -> core.setup_hook 실행, 이어서 리더가 된 것처럼 길드 상태를 읽고 작업을 시작
+        await bot.login("simulated-token")
+        await core.start_guilds()
+        self.rt = core.get_runtime(core.YOUR_GUILD_ID)
+        fake.state = bot._connection
+
+        roles = {core.YOUR_GUILD_ID: "@everyone", core.VERIFIED_ROLE_ID: "찡긋", core.GUEST_ROLE_ID: "손님"}
+        for category in core.ROLE_IDS.values():
+            for name, role_id in category.items():
+                roles[role_id] = name
+        channels = {
+            core.ROLE_SELECT_CHANNEL_ID: "역할-선택",
+            core.VERIFY_CHANNEL_ID: "인증",
+            core.VERIFY_LOG_CHANNEL_ID: "인증-로그",
+            core.WELCOME_CHANNEL_ID: "환영",
+            PARTY_CHANNEL_ID: "파티-모집",
+        }
+        fake.members[BOT_USER_ID] = {"user": fake.bot_user, "roles": set(), "nick": None, "joined_at": now_iso()}
+        job_roles = list(core.ROLE_IDS["JOB"].values())
+        mbti_roles = list(core.ROLE_IDS["MBTI"].values())
+        for _ in range(self.initial_members):
+            user_id = next(self._user_ids)
+            if self.rng.random() < 0.8:
+                member_roles = {core.VERIFIED_ROLE_ID, self.rng.choice(mbti_roles)}
+                member_roles.update(self.rng.sample(job_roles, self.rng.randint(0, 3)))
+                self.verified.append(user_id)
+            else:
+                member_roles = {core.GUEST_ROLE_ID}
+                self.guests.append(user_id)
+            fake.add_member(user_id, f"멤버{user_id % 100000}", member_roles)
+
+        fake.dispatch("GUILD_CREATE", fake.guild_payload(roles, channels))
+        guild = bot.get_guild(core.YOUR_GUILD_ID)
+        await core.ensure_mbti_index(self.rt, guild)
+        fake.messages[self.role_message_id] = core.ROLE_SELECT_CHANNEL_ID
+        fake.messages[self.verify_message_id] = core.VERIFY_CHANNEL_ID
+        self._lag_task = asyncio.get_running_loop().create_task(self._monitor_loop_lag())
+
+    async def stop(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+        await self.core.outbound.close()
+        for rt in self.core.guilds.values():
+            await rt.scheduler.close()
+            await rt.join_queue.close()
+            await rt.store.close()
+        await self.bot.close()
+
+    async def _monitor_loop_lag(self, interval: float = 0.01):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.loop_lag.append(max(0.0, time.perf_counter() - started - interval))
+
+    # --- 게이트웨이 페이로드 ---
+    def _interaction(self, user_id: int, channel_id: int, data: dict, kind: int = 3, message: dict = None,
+                     channel_type: int = 0) -> str:
+        interaction_id = self.fake.snowflake()
+        token = f"token-{interaction_id}"
+        payload = {
+            "id": str(interaction_id),
+            "application_id": str(APPLICATION_ID),
+            "type": kind,
+            "token": token,
+            "version": 1,
+            "guild_id": str(self.core.YOUR_GUILD_ID),
+            "channel_id": str(channel_id),
+            "channel": {"id": str(channel_id), "type": channel_type, "guild_id": str(self.core.YOUR_GUILD_ID)},
+            "member": dict(self.fake.member_payload(user_id), permissions="0"),
+            "data": data,
+            "app_permissions": "8",
+            "locale": "ko",
+            "guild_locale": "ko",
+        }
+        if message is not None:
+            payload["message"] = message
+        self.interactions += 1
+        self.fake.interaction_started[token] = time.perf_counter()
+        self.fake.dispatch("INTERACTION_CREATE", payload)
+        return token
+
+    def _click(self, user_id: int, channel_id: int, message_id: int, custom_id: str, values=None, channel_type: int = 0) -> str:
+        data = {"custom_id": custom_id, "component_type": 2 if values is None else 3}
+        if values is not None:
+            data["values"] = values
+        message = self.fake.message_payload(channel_id, message_id=message_id)
+        return self._interaction(user_id, channel_id, data, message=message, channel_type=channel_type)
+
+    def _record_flow(self, name: str, started: float):
+        self.flow_latencies.setdefault(name, []).append(time.perf_counter() - started)
+
+    # --- 사용자 행동 ---
+    async def member_join(self) -> int:
+        user_id = next(self._user_ids)
+        payload = self.fake.add_member(user_id, f"새멤버{user_id % 100000}")
+        payload["guild_id"] = str(self.core.YOUR_GUILD_ID)
+        self.joins += 1
+        self.fake.dispatch("GUILD_MEMBER_ADD", payload)
+        self.guests.append(user_id)
+        return user_id
+
+    async def toggle_role(self):
+        """인증된 멤버가 카테고리를 고른 뒤 역할 버튼 하나를 누릅니다."""
+        core = self.core
+        user_id = self.rng.choice(self.verified)
+        category = "MBTI" if self.rng.random() < 0.4 else "JOB"
+        started = time.perf_counter()
+        token = self._click(user_id, core.ROLE_SELECT_CHANNEL_ID, self.role_message_id,
+                            "mbti_select_button" if category == "MBTI" else "job_select_button")
+        await asyncio.wait_for(self.fake.expect_response(token), timeout=30)
+        role_name = self.rng.choice(list(core.ROLE_IDS[category]))
+        token = self._click(user_id, core.ROLE_SELECT_CHANNEL_ID, self.role_message_id, f"{category}_{role_name}_button")
+        await asyncio.wait_for(self.fake.expect_response(token), timeout=60)
+        self._record_flow("role_toggle", started)
+
+    async def verify(self, user_id: int = None, correct: bool = None):
+        """손님이 인증 버튼을 누르고 DM으로 코드를 답합니다."""
+        core, fake = self.core, self.fake
+        if user_id is None:
+            if not self.guests:
+                return
+            user_id = self.guests.pop(self.rng.randrange(len(self.guests)))
+        if correct is None:
+            correct = self.rng.random() < 0.9
+
+        def dm_from_bot(text):
+            return lambda message: fake.dm_users.get(int(message["channel_id"])) == user_id and text(message["content"])
+
+        started = time.perf_counter()
+        question = fake.expect_message(dm_from_bot(lambda content: "인증 질문" in content))
+        self._click(user_id, core.VERIFY_CHANNEL_ID, self.verify_message_id, "verify_button")
+        await asyncio.wait_for(question, timeout=60)
+        await asyncio.sleep(self.rng.uniform(0.2, 1.0))  # 사람이 코드를 입력하는 시간
+
+        result = fake.expect_message(dm_from_bot(lambda content: content.startswith(("✅", "❌"))))
+        dm_channel_id = fake.dm_channels[user_id]
+        fake.dispatch("MESSAGE_CREATE", fake.message_payload(
+            dm_channel_id, self.rt.config.verify_answer if correct else "00000000", author=fake.members[user_id]["user"]))
+        reply = await asyncio.wait_for(result, timeout=60)
+        self._record_flow("verify", started)
+        if reply["content"].startswith("✅"):
+            self.verified.append(user_id)
+        else:
+            self.guests.append(user_id)
+
+    async def recruit(self):
+        """인증된 멤버가 `!모집` -> 입력 버튼 -> 폼 제출로 파티를 만듭니다."""
+        core, fake = self.core, self.fake
+        user_id = self.rng.choice(self.verified)
+        mention = f"<@{user_id}>"
+        started = time.perf_counter()
+
+        button_message = fake.expect_message(
+            lambda message: message["channel_id"] == str(PARTY_CHANNEL_ID) and message["content"].startswith(mention) and message["components"])
+        fake.dispatch("MESSAGE_CREATE", fake.message_payload(
+            PARTY_CHANNEL_ID, "!모집", author=fake.members[user_id]["user"], member=fake.member_payload(user_id)))
+        message = await asyncio.wait_for(button_message, timeout=60)
+
+        custom_id = message["components"][0]["components"][0]["custom_id"]
+        token = self._click(user_id, PARTY_CHANNEL_ID, int(message["id"]), custom_id)
+        kind, modal = await asyncio.wait_for(fake.expect_response(token), timeout=60)
+
+        values = [f"던전{self.rng.randint(1, 12)}", f"{self.rng.randint(1, 12)}/{self.rng.randint(1, 28)}",
+                  f"{self.rng.randint(0, 23):02d}:{self.rng.choice((0, 30)):02d}"]
+        components = [
+            {"type": 1, "components": [{"type": 4, "custom_id": row["components"][0]["custom_id"], "value": value}]}
+            for row, value in zip(modal["components"], values)
+        ]
+        token = f"token-{fake.snowflake()}"
+        followup = fake.expect_message(lambda message: message.get("webhook_token") == token)
+        interaction_id = int(token.split("-")[1])
+        self.interactions += 1
+        fake.interaction_started[token] = time.perf_counter()
+        fake.dispatch("INTERACTION_CREATE", {
+            "id": str(interaction_id), "application_id": str(APPLICATION_ID), "type": 5, "token": token, "version": 1,
+            "guild_id": str(core.YOUR_GUILD_ID), "channel_id": str(PARTY_CHANNEL_ID),
+            "channel": {"id": str(PARTY_CHANNEL_ID), "type": 0, "guild_id": str(core.YOUR_GUILD_ID)},
+            "member": dict(fake.member_payload(user_id), permissions="0"),
+            "data": {"custom_id": modal["custom_id"], "components": components},
+            "locale": "ko",
+        })
+        await asyncio.wait_for(followup, timeout=60)
+        self._record_flow("recruit", started)
+        thread_id = max(int(thread_id) for thread_id in self.rt.party_infos) if self.rt.party_infos else None
+        if thread_id:
+            self.parties.append(thread_id)
+
+    async def party_select(self):
+        """인증된 멤버가 파티 드롭다운에서 아르카나를 고르거나 참여를 취소합니다."""
+        core = self.core
+        if not self.parties:
+            return
+        thread_id = self.rng.choice(self.parties)
+        info = self.rt.party_infos.get(str(thread_id))
+        if not info or not info.get("embed_msg_id"):
+            return
+        user_id = self.rng.choice(self.verified)
+        value = "참여 취소" if self.rng.random() < 0.1 else self.rng.choice(list(core.ROLE_IDS["JOB"]))
+        started = time.perf_counter()
+        token = self._click(user_id, thread_id, info["embed_msg_id"], "party_role_select", values=[value], channel_type=11)
+        await asyncio.wait_for(self.fake.expect_response(token), timeout=60)
+        self._record_flow("party_select", started)
+
+    # --- 트래픽 생성 ---
+    async def traffic(self, action, count: int, rate: float):
+        """action을 평균 초당 rate번(포아송 도착) 총 count번 시작하고 모두 끝날 때까지 기다립니다."""
+        tasks = []
+        for _ in range(count):
+            tasks.append(asyncio.get_running_loop().create_task(action()))
+            if rate > 0:
+                await asyncio.sleep(self.rng.expovariate(rate))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.errors.append(f"{action.__name__}: {result!r}")
+
+    async def drain(self, timeout: float = 30.0):
+        """지연된 임베드 수정, 입장 큐, 디스패처 큐, 진행 중인 REST 호출이 모두 끝날 때까지 기다립니다."""
+        core = self.core
+        deadline = time.monotonic() + timeout
+        await asyncio.sleep(0.05)
+        def busy():
+            joins = self.rt.join_queue.stats()
+            return (self.rt.party_embed_update_tasks or core.outbound.stats()["total_depth"] or self.fake.inflight
+                    or joins["depth"] or joins["active"] or joins["welcome_pending"])
+
+        while time.monotonic() < deadline:
+            if not busy():
+                await asyncio.sleep(0.1)
+                if not busy():
+                    return
+            await asyncio.sleep(0.05)
+
+    # --- 시나리오 ---
+    async def run_scenario(self, name: str, count: int, rate: float, drain: float = 30.0) -> dict:
+        fake, core = self.fake, self.core
+        fake.reset_counters()
+        self.interactions = 0
+        self.joins = 0
+        self.flow_latencies = {}
+        self.handler_latencies = {}
+        self.loop_lag = []
+        self.errors = []
+        outbound_before = core.outbound.stats()
+        started = time.perf_counter()
+
+        if name == "join-storm":
+            await self.traffic(self.member_join, count, rate)
+        elif name == "raid":
+            # 아주 빠른 입장 폭주 직후 새 멤버들이 한꺼번에 인증을 시도합니다.
+            joined = []
+
+            async def raid_join():
+                joined.append(await self.member_join())
+
+            await self.traffic(raid_join, count, rate * 10)
+
+            async def raid_verify():
+                user_id = joined.pop()
+                self.guests.remove(user_id)
+                await self.verify(user_id, correct=self.rng.random() < 0.5)
+
+            await self.traffic(raid_verify, len(joined), rate * 5)
+        elif name == "role-toggle":
+            await self.traffic(self.toggle_role, count, rate)
+        elif name == "verify":
+            await self.traffic(self.verify, min(count, len(self.guests)), rate)
+        elif name == "party":
+            await self.traffic(self.recruit, max(1, count // 50), rate / 5)
+            await self.drain()
+            await self.traffic(self.party_select, count, rate)
+        elif name == "mixed":
+            await self.traffic(self.recruit, max(1, count // 100), rate / 5)
+            await asyncio.gather(
+                self.traffic(self.member_join, count // 4, rate / 4),
+                self.traffic(self.toggle_role, count // 4, rate / 4),
+                self.traffic(self.verify, min(count // 4, len(self.guests)), rate / 4),
+                self.traffic(self.party_select, count // 4, rate / 4),
+            )
+        else:
+            raise ValueError(f"알 수 없는 시나리오입니다: {name}")
+
+        await self.drain(drain)
+        elapsed = time.perf_counter() - started
+        outbound_after = core.outbound.stats()
+        events = self.interactions + self.joins
+        return {
+            "scenario": name,
+            "duration": elapsed,
+            "interactions": self.interactions,
+            "events": events,
+            "unfinished_joins": self.joins - len(self.handler_latencies.get("join_queue", [])),
+            "handlers": {label: summarize(samples) for label, samples in sorted(self.handler_latencies.items())},
+            "flows": {label: summarize(samples) for label, samples in sorted(self.flow_latencies.items())},
+            "ack": dict(summarize(fake.ack_latencies), late=fake.late_acks),
+            "rest_calls": fake.rest_calls,
+            "rest_per_event": fake.rest_calls / events if events else 0.0,
+            "rest_by_route": dict(sorted(fake.rest_by_route.items(), key=lambda item: -item[1])),
+            "interaction_callbacks": fake.callbacks,
+            "injected_429": fake.injected_429,
+            "raised_ratelimited": fake.raised_ratelimited,
+            "outbound": {
+                key: outbound_after[key] - outbound_before[key] for key in ("dropped", "merged", "rate_limited")
+            },
+            "loop_lag": summarize(self.loop_lag),
+            "errors": len(self.errors),
+            "error_samples": self.errors[:5],
+        }
+
+
+def format_report(result: dict) -> str:
+    ms = lambda seconds: f"{seconds * 1000:.1f}ms"
+    lines = [
+        f"📊 {result['scenario']} — {result['duration']:.1f}초, 인터랙션 {result['interactions']}건, 이벤트 합계 {result['events']}건",
+    ]
+    for title, group in (("핸들러", result["handlers"]), ("사용자 흐름", result["flows"])):
+        for label, stats in group.items():
+            lines.append(f"   {title} {label:<20} n={stats['count']:<5} p50={ms(stats['p50']):>9} p99={ms(stats['p99']):>9} max={ms(stats['max']):>9}")
+    ack = result["ack"]
+    lines.append(f"   인터랙션 응답         p50={ms(ack['p50'])} p99={ms(ack['p99'])} 3초 초과={ack['late']}건")
+    lines.append(f"   REST 호출 {result['rest_calls']}회 (이벤트당 {result['rest_per_event']:.2f}회), 인터랙션 응답 {result['interaction_callbacks']}회")
+    top_routes = list(result["rest_by_route"].items())[:5]
+    if top_routes:
+        lines.append("   상위 경로: " + ", ".join(f"{route}={count}" for route, count in top_routes))
+    lines.append(f"   429 {result['injected_429']}회 (RateLimited 발생 {result['raised_ratelimited']}회), "
+                 f"디스패처 버림 {result['outbound']['dropped']} / 합침 {result['outbound']['merged']}")
+    lag = result["loop_lag"]
+    lines.append(f"   이벤트 루프 지연      p50={ms(lag['p50'])} p99={ms(lag['p99'])} max={ms(lag['max'])}")
+    if result["unfinished_joins"]:
+        lines.append(f"   ⚠️ 시간 안에 끝나지 않은 입장 처리 {result['unfinished_joins']}건")
+    if result["errors"]:
+        lines.append(f"   ❌ 오류 {result['errors']}건: " + " | ".join(result["error_samples"]))
+    return "\n".join(lines)
+
+
+async def run(args) -> list:
+    if args.low_memory:
+        os.environ["LOW_MEMORY_MODE"] = "1"
+    with contextlib.redirect_stdout(io.StringIO()):
+        import core
+    fake = FakeDiscord(core.YOUR_GUILD_ID, latency=args.latency, jitter=args.jitter, ratelimit_prob=args.ratelimit_prob,
+                       retry_after=args.retry_after, bucket=args.bucket, seed=args.seed)
+    if args.max_ratelimit_timeout is not None:
+        core.bot.http.max_ratelimit_timeout = args.max_ratelimit_timeout
+    sim = Simulator(core, fake, members=args.members, seed=args.seed)
+
+    output = sys.stdout if args.verbose else io.StringIO()
+    results = []
+    memory_before = core.process_memory_bytes()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        await sim.start()
+    startup = time.perf_counter() - started
+    memory_after = core.process_memory_bytes()
+    cached = len(core.bot.get_guild(core.YOUR_GUILD_ID).members)
+    memory = f"RSS {memory_after / 1024 / 1024:.1f}MB (+{(memory_after - memory_before) / 1024 / 1024:.1f}MB)" if memory_after else "RSS 알 수 없음"
+    print(f"🧠 {'저메모리' if core.LOW_MEMORY_MODE else '전체 캐시'} 모드 시작 {startup * 1000:.0f}ms · {memory} · 캐시 멤버 {cached}명")
+    try:
+        for name in args.scenarios:
+            with contextlib.redirect_stdout(output):
+                result = await sim.run_scenario(name, args.count, args.rate, args.drain)
+            results.append(result)
+            print(format_report(result))
+    finally:
+        with contextlib.redirect_stdout(output):
+            await sim.stop()
+    return results
+
+
+def parse_bucket(text: str):
+    limit, per = text.split("/")
+    return int(limit), float(per)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="찡긋봇 부하 시뮬레이터 (네트워크 없이 실행)")
+    parser.add_argument("scenarios", nargs="*", help=f"실행할 시나리오 (기본: 전부) {', '.join(SCENARIOS)}")
+    parser.add_argument("--count", type=int, default=200, help="시나리오별 사용자 행동 수")
+    parser.add_argument("--rate", type=float, default=50.0, help="초당 평균 도착 수 (0이면 한꺼번에)")
+    parser.add_argument("--members", type=int, default=500, help="시작 시 서버 멤버 수")
+    parser.add_argument("--latency", type=float, default=0.05, help="REST 평균 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="지연 편차 비율 (0.5 = ±50%%)")
+    parser.add_argument("--ratelimit-prob", type=float, default=0.0, help="요청마다 429를 받을 확률")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="확률로 만든 429의 retry_after (초)")
+    parser.add_argument("--bucket", type=parse_bucket, default=None, help="경로별 한도, 예: 5/5 (5초에 5회)")
+    parser.add_argument("--max-ratelimit-timeout", type=float, default=None,
+                        help="이보다 긴 429는 discord.RateLimited로 올립니다 (기본: 봇 설정값)")
+    parser.add_argument("--drain", type=float, default=30.0, help="시나리오 끝에 남은 작업을 기다리는 최대 시간 (초)")
+    parser.add_argument("--low-memory", action="store_true", help="저메모리 모드(LOW_MEMORY_MODE=1)로 실행합니다")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    parser.add_argument("--verbose", action="store_true", help="봇 로그를 그대로 출력합니다")
+    args = parser.parse_args()
+    args.scenarios = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(unknown)}")
+
+    # 상태 파일이 작업 폴더를 더럽히지 않도록 임시 폴더에서 실행합니다.
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            results = asyncio.run(run(args))
+        finally:
+            os.chdir(cwd)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"created_at": now_iso(), "args": {k: v for k, v in vars(args).items() if k != "json"}, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"✅ 결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main_cli()
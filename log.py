@@ -0,0 +1,188 @@
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+
+# 봇 로거 이름. 모듈별 로거는 `nerdbot.party`처럼 이 아래에 만듭니다.
+ROOT_LOGGER = "nerdbot"
+# 기본 로그 수준 (DEBUG/INFO/WARNING/ERROR). `!디버그 켜기`나 제어 명령 `debug on`으로 실행 중에 바꿀 수 있습니다.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# 파일 로그 (한 줄에 JSON 하나). 비워 두면 파일에 쓰지 않습니다.
+LOG_FILE = os.getenv("LOG_FILE", "bot.log")
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+# 기록 시각, 수준, 로거 이름, 메시지 외에 붙일 수 있는 구조화 필드 (순서대로 출력)
+FIELD_ORDER = ("guild_id", "thread_id", "user_id", "duration")
+
+_listener = None
+
+
+class StructuredLogger:
+    """`log.info("메시지", thread_id=..., duration=...)`처럼 필드를 키워드로 받는 로거.
+
+    수준이 꺼져 있으면 isEnabledFor 확인(캐시된 dict 조회) 한 번으로 끝나므로,
+    자주 불리는 DEBUG 로그도 꺼 두면 비용이 거의 없습니다.
+    문자열 조립 비용까지 없애려면 `%s` 인자를 쓰거나 `if log.debug_enabled:`로 감쌉니다.
+    """
+
+    __slots__ = ("logger",)
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    @property
+    def debug_enabled(self) -> bool:
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def _emit(self, level: int, msg: str, args, fields: dict, exc_info=None):
+        self.logger._log(level, msg, args, exc_info=exc_info, extra={"fields": fields} if fields else None, stacklevel=3)
+
+    def debug(self, msg: str, *args, **fields):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emit(logging.DEBUG, msg, args, fields)
+
+    def info(self, msg: str, *args, **fields):
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emit(logging.INFO, msg, args, fields)
+
+    def warning(self, msg: str, *args, **fields):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emit(logging.WARNING, msg, args, fields)
+
+    def error(self, msg: str, *args, **fields):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, msg, args, fields)
+
+    def exception(self, msg: str, *args, **fields):
+        """오류 메시지와 함께 현재 처리 중인 예외의 트레이스백을 남깁니다."""
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, msg, args, fields, exc_info=True)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"))
+
+
+def _field_items(record: logging.LogRecord):
+    fields = getattr(record, "fields", None)
+    if not fields:
+        return []
+    ordered = [(key, fields[key]) for key in FIELD_ORDER if key in fields]
+    return ordered + [(key, value) for key, value in fields.items() if key not in FIELD_ORDER]
+
+
+def _format_value(key: str, value) -> str:
+    if key == "duration" and isinstance(value, float):
+        return f"{value * 1000:.1f}ms"
+    return str(value)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """`2025-07-10 20:30:00 INFO    nerdbot.party: 메시지 thread_id=... duration=12.3ms`"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        items = _field_items(record)
+        if not items:
+            return text
+        line, sep, rest = text.partition("\n")
+        return line + " " + " ".join(f"{key}={_format_value(key, value)}" for key, value in items) + sep + rest
+
+
+class JsonFormatter(logging.Formatter):
+    """한 줄에 JSON 하나. 필드는 최상위 키로 들어갑니다."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in _field_items(record):
+            entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """큐에 넣기 전에 메시지와 트레이스백만 문자열로 만들어 두고, 필드는 그대로 넘깁니다."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class StdoutHandler(logging.StreamHandler):
+    """출력하는 시점의 sys.stdout에 씁니다. (부하 시뮬레이터처럼 stdout을 바꿔 끼우는 도구에서도 따라감)"""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+def setup_logging(level: str = LOG_LEVEL, log_file: str = LOG_FILE):
+    """봇과 discord.py의 로그를 큐로 받아 별도 스레드에서 콘솔/파일에 씁니다.
+
+    이벤트 루프에서는 큐에 넣기만 하므로, stdout이나 디스크가 느려도 루프가 멈추지 않습니다.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    console = StdoutHandler()
+    console.setFormatter(ConsoleFormatter())
+    handlers = [console]
+    if log_file:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8",
+        )
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    logging.getLogger(ROOT_LOGGER).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """큐에 남은 로그를 모두 쓰고 작업 스레드를 멈춥니다."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def set_debug(enabled: bool):
+    """봇 로거의 DEBUG 로그를 켜거나 끕니다. (로거의 수준 캐시도 함께 비워짐)"""
+    base = LOG_LEVEL if LOG_LEVEL != "DEBUG" else "INFO"
+    logging.getLogger(ROOT_LOGGER).setLevel(logging.DEBUG if enabled else base)
+
+
+def debug_enabled() -> bool:
+    return logging.getLogger(ROOT_LOGGER).isEnabledFor(logging.DEBUG)
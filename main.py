@@ -1,996 +1,100 @@
 import os
-import json
+import sys
+import signal
 import asyncio
-from datetime import datetime, timedelta, timezone
-from dotenv import load_dotenv
-import discord
-from discord.ext import commands, tasks
-from discord.ui import Button, View, Select
-import pytz
+import threading
 
-# === .env 로드 ===
-load_dotenv()
-TOKEN = os.getenv("DISCORD_TOKEN")
+from core import (
+    TOKEN, SHUTDOWN_DRAIN_TIMEOUT, STATE_DIR, bot, graceful_shutdown, guilds, handle_control_line, leader_lease, start_guilds,
+)
+from log import get_logger, setup_logging, shutdown_logging
 
-if not TOKEN:
-    print("❌ DISCORD_TOKEN을 .env 파일에서 불러오지 못했습니다!")
-    exit(1)
-else:
-    print("✅ DISCORD_TOKEN 정상 로드됨")
+log = get_logger("main")
 
-# === 설정 ===
-YOUR_GUILD_ID = 1388092210519605361 
-ROLE_SELECT_CHANNEL_ID = 1388211020576587786
-VERIFY_CHANNEL_ID = 1391373955507552296
-VERIFIED_ROLE_ID = 1390356825454416094
-GUEST_ROLE_ID = 1393038834106892379
-VERIFY_LOG_CHANNEL_ID = 1391756822763012190
-WELCOME_CHANNEL_ID = 1390643886656847983 
+# 설정하면 표준 입력으로 제어 명령(`reload extensions.party`, `shutdown`)을 받습니다. (watcher.py가 설정)
+CONTROL_STDIN = os.getenv("BOT_CONTROL_STDIN") == "1"
 
-# --- 인증 질문/답변 설정 ---
-VERIFY_QUESTION = "찡긋 디스코드 채널에 오신것을 환영합니다.\n안내받은 코드를 입력하세요.\n(코드가 없을 경우 승인이 불가합니다.)"
-VERIFY_ANSWER = "20211113"
-VERIFY_TIMEOUT = 60 # 답변 대기 시간 (초)
 
-# 역할 ID 목록 (직업 역할 + MBTI 역할)
-ROLE_IDS = {
-    "JOB": {
-        "세이크리드 가드": 1388109175703470241,
-        "다크 메이지": 1388109120141262858,
-        "세인트 바드": 1388109253000036384,
-        "블래스트 랜서": 1388109274315489404,
-        "엘레멘탈 나이트": 1388109205453537311,
-        "알케믹 스팅어": 1389897468761870428,
-        "포비든 알케미스트": 1389897592061558908,
-        "배리어블 거너": 1389897731463581736,
-    },
-    "MBTI": {
-        "ISTJ": 1391719641327599717,
-        "ISFJ": 1391789705716306063,
-        "INFJ": 1391789913942524095,
-        "INTJ": 1391788061448208524,
-        "ISTP": 1392017470323298334,
-        "ISFP": 1391789971702288536,
-        "INFP": 1391715412504350730,
-        "INTP": 1391790057798504570,
-        "ESTP": 1391790142464987156,
-        "ESFP": 1391790201902334133,
-        "ENFP": 1391790284131532800,
-        "ENTP": 1391790424829722794,
-        "ESTJ": 1391790662554484906,
-        "ESFJ": 1391790746016682056,
-        "ENFJ": 1391719175600345180,
-        "ENTJ": 1391790926036209835,
-    }
-}
-
-# 모든 역할 이름 통합 (RoleSelectView에서 사용)
-ALL_ROLE_NAMES = {k: v for category in ROLE_IDS.values() for k, v in category.items()}
-
-# MBTI 역할 이름만 따로 리스트로 정의 (통계 계산 및 단일 선택 처리 시 유용)
-MBTI_ROLE_NAMES = list(ROLE_IDS["MBTI"].keys())
-
-# 역할 버튼 이모지 맵
-EMOJI_MAP = {
-    "세이크리드 가드": "🛡️", "다크 메이지": "🔮", "세인트 바드": "🎵",
-    "블래스트 랜서": "⚔️", "엘레멘탈 나이트": "🗡️", "알케믹 스팅어": "🧪",
-    "포비든 알케미스트": "☠️", "배리어블 거너": "🔫",
-    "ISTJ": "🧱", "ISFJ": "💖", "INFJ": "💡", "INTJ": "🧠",
-    "ISTP": "🛠️", "ISFP": "🎨", "INFP": "🌸", "INTP": "🤔",
-    "ESTP": "⚡", "ESFP": "🥳", "ENFP": "🌈", "ENTP": "💡",
-    "ESTJ": "🏛️", "ESFJ": "🤝", "ENFJ": "🌟", "ENTJ": "👑",
-}
-
-# 상태 저장을 위한 파일명
-DATA_FILE = "state.json" 
-
-# 봇의 현재 상태를 저장할 딕셔너리 (전역 변수)
-state = {"role_message_id": None, "party_infos": {}, "initial_message_id": None}
-
-# KST 시간대 정의 (UTC+9)
-KST = pytz.timezone('Asia/Seoul')
-
-# === 상태 로드 및 저장 함수 ===
-def save_state():
-    """현재 봇의 상태를 JSON 파일로 저장합니다."""
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        serializable_state = state.copy()
-        party_infos_copy = {}
-        for thread_id, info in serializable_state.get('party_infos', {}).items():
-            info_copy = info.copy()
-            if 'reminder_time' in info_copy and isinstance(info_copy['reminder_time'], datetime):
-                info_copy['reminder_time'] = info_copy['reminder_time'].timestamp()
-            if 'party_time' in info_copy and isinstance(info_copy['party_time'], datetime):
-                info_copy['party_time'] = info_copy['party_time'].timestamp()
-            party_infos_copy[thread_id] = info_copy
-        serializable_state['party_infos'] = party_infos_copy
-        json.dump(serializable_state, f, ensure_ascii=False, indent=4)
-
-def load_state():
-    """JSON 파일에서 봇의 상태를 불러옵니다."""
-    global state
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            try:
-                loaded = json.load(f)
-                if 'party_infos' in loaded:
-                    for thread_id, info in loaded['party_infos'].items():
-                        if 'reminder_time' in info and info['reminder_time'] is not None:
-                            info['reminder_time'] = datetime.fromtimestamp(info['reminder_time'], tz=timezone.utc)
-                        if 'party_time' in info and info['party_time'] is not None:
-                            info['party_time'] = datetime.fromtimestamp(info['party_time'], tz=timezone.utc)
-                
-                state = {
-                    "role_message_id": loaded.get("role_message_id"),
-                    "party_infos": loaded.get("party_infos", {}),
-                    "initial_message_id": loaded.get("initial_message_id")
-                }
-                print("✅ 상태 파일 로드 완료")
-            except json.JSONDecodeError:
-                print("❌ state.json 파일이 손상되었거나 비어 있습니다. 초기화합니다.")
-                state = {"role_message_id": None, "party_infos": {}, "initial_message_id": None}
-            except Exception as e:
-                print(f"❌ state 로드 중 알 수 없는 오류 발생: {e}. 상태를 초기화합니다.")
-                state = {"role_message_id": None, "party_infos": {}, "initial_message_id": None}
-    else:
-        print("ℹ️ state.json 파일이 없습니다. 새로운 상태를 생성합니다.")
-
-# === 인텐트 및 봇 초기화 ===
-intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
-
-# === 역할 선택 UI ===
-
-class RoleSelectButton(Button):
-    """카테고리별 역할을 선택하거나 해제하는 버튼."""
-    def __init__(self, role_name, emoji, role_type):
-        super().__init__(
-            label=role_name,
-            style=discord.ButtonStyle.secondary,
-            emoji=emoji,
-            custom_id=f"{role_type}_{role_name}_button"
-        )
-        self.role_name = role_name
-        self.role_type = role_type
-
-    async def callback(self, interaction: discord.Interaction):
-        role_id = ROLE_IDS[self.role_type].get(self.role_name)
-        if not role_id:
-            return await interaction.response.send_message(f"'{self.role_name}' 역할 ID를 찾을 수 없습니다.", ephemeral=True)
-
-        role = interaction.guild.get_role(role_id)
-        if not role:
-            return await interaction.response.send_message(f"'{self.role_name}' 역할을 서버에서 찾을 수 없습니다.", ephemeral=True)
-
-        if role in interaction.user.roles:
-            await interaction.user.remove_roles(role)
-            await interaction.response.send_message(f"'{self.role_name}' 역할이 제거되었습니다.", ephemeral=True)
-        else:
-            if self.role_type == "MBTI":
-                for existing_role in interaction.user.roles:
-                    if existing_role.name in MBTI_ROLE_NAMES:
-                        await interaction.user.remove_roles(existing_role)
-                        break
-            
-            await interaction.user.add_roles(role)
-            await interaction.response.send_message(f"'{self.role_name}' 역할이 추가되었습니다.", ephemeral=True)
-
-
-class CategorySelectView(View):
-    """아르카나/MBTI 카테고리를 선택하는 초기 뷰."""
-    def __init__(self):
-        super().__init__(timeout=None)
-
-    @discord.ui.button(label="아르카나 선택", style=discord.ButtonStyle.primary, custom_id="job_select_button", emoji="💫")
-    async def job_select_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(
-            content="👇 원하는 **아르카나 역할**을 선택하거나, `MBTI 선택` 버튼을 눌러주세요.",
-            view=RoleButtonsView("JOB")
-        )
-
-    @discord.ui.button(label="MBTI 선택", style=discord.ButtonStyle.success, custom_id="mbti_select_button", emoji="🎭")
-    async def mbti_select_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(
-            content="👇 원하는 **MBTI 역할**을 선택하거나, `아르카나 선택` 버튼을 눌러주세요.",
-            view=RoleButtonsView("MBTI")
-        )
-
-class RoleButtonsView(View):
-    """선택된 카테고리(아르카나 또는 MBTI)에 해당하는 역할 버튼들을 보여주는 뷰."""
-    def __init__(self, role_category: str):
-        super().__init__(timeout=None)
-        self.role_category = role_category
-        
-        roles_to_display = ROLE_IDS[self.role_category]
-
-        for role_name in roles_to_display.keys():
-            self.add_item(RoleSelectButton(role_name, EMOJI_MAP.get(role_name, "❓"), self.role_category))
-        
-        self.add_item(BackToCategoryButton())
-
-class BackToCategoryButton(Button):
-    """카테고리 선택 뷰로 돌아가는 버튼."""
-    def __init__(self):
-        super().__init__(label="🔙 뒤로가기", style=discord.ButtonStyle.danger, row=4, custom_id="back_to_category_button")
-    
-    async def callback(self, interaction: discord.Interaction):
-        await interaction.response.edit_message(
-            content="👇 아래 버튼을 눌러 `아르카나` 또는 `MBTI` 역할을 선택하세요!",
-            view=CategorySelectView()
-        )
-
-# === 인증 버튼 수정: 질문/답변 추가 ===
-class VerifyButton(Button):
-    def __init__(self, label="✅ 인증하죠", style=discord.ButtonStyle.success, emoji="🪪"):
-        super().__init__(label=label, style=style, emoji=emoji, custom_id="verify_button")
-
-    async def callback(self, interaction: discord.Interaction):
-        verified_role = interaction.guild.get_role(VERIFIED_ROLE_ID)
-        guest_role = interaction.guild.get_role(GUEST_ROLE_ID)
-
-        if verified_role in interaction.user.roles:
-            return await interaction.response.send_message("이미 인증된 사용자입니다! 😉", ephemeral=True)
-
-        try:
-            await interaction.user.send(f"**인증 질문:**\n\n{VERIFY_QUESTION}")
-            await interaction.response.send_message("DM으로 인증 질문을 보냈습니다. DM을 확인하고 코드를 입력해주세요! ✉️", ephemeral=True)
-
-            def check(m):
-                return m.author == interaction.user and m.channel == interaction.user.dm_channel
-
-            try:
-                answer_msg = await bot.wait_for("message", timeout=VERIFY_TIMEOUT, check=check)
-
-                if answer_msg.content.strip() == VERIFY_ANSWER:
-                    await interaction.user.add_roles(verified_role)
-                    if guest_role and guest_role in interaction.user.roles:
-                        await interaction.user.remove_roles(guest_role)
-                    
-                    await interaction.user.send("✅ 코드가 확인되었습니다! 성공적으로 인증되었어요! 이제 모든 채널을 이용할 수 있습니다! 🎉")
-                    log_channel = interaction.guild.get_channel(VERIFY_LOG_CHANNEL_ID)
-                    if log_channel:
-                        await log_channel.send(f"🛂 {interaction.user.mention} 님이 **찡긋** 역할로 인증되었습니다! (`{interaction.user.name}`)")
-                else:
-                    await interaction.user.send("❌ 코드가 틀렸습니다. 다시 인증 버튼을 눌러 시도해주세요. 올바른 코드를 확인해주세요.")
-            except asyncio.TimeoutError:
-                await interaction.user.send(f"⏰ {VERIFY_TIMEOUT}초 내에 답변이 없어서 인증이 취소되었습니다. 다시 인증 버튼을 눌러 시도해주세요.")
-            except Exception as e:
-                await interaction.user.send(f"인증 중 알 수 없는 오류가 발생했습니다. 잠시 후 다시 시도해주세요. ({e})")
-                print(f"인증 DM 답변 처리 중 오류: {e}")
-
-        except discord.Forbidden:
-            await interaction.response.send_message(
-                "DM을 보낼 수 없습니다. 개인정보 설정에서 서버 멤버로부터의 DM을 허용해주세요. "
-                "DM 설정 변경 후 다시 인증 버튼을 눌러 시도해주세요.", ephemeral=True
-            )
-        except Exception as e:
-            await interaction.response.send_message(f"인증 질문 전송 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요. ({e})", ephemeral=True)
-            print(f"인증 질문 DM 전송 오류: {e}")
-
-class VerifyView(View):
-    def __init__(self):
-        super().__init__(timeout=None)
-        self.add_item(VerifyButton())
-
-# === 파티 모집 기능 ===
-
-class PartyRoleSelect(Select):
-    """파티 참여자가 자신의 아르카나를 선택하고 참여하는 드롭다운 메뉴."""
-    def __init__(self):
-        options = [
-            discord.SelectOption(label=role, emoji=EMOJI_MAP.get(role, "❓"))
-            for role in ROLE_IDS["JOB"].keys()
-        ] + [discord.SelectOption(label="참여 취소", emoji="❌")]
-        super().__init__(placeholder="아르카나를 선택하거나 참여 취소하세요!", min_values=1, max_values=1, options=options, custom_id="party_role_select")
-
-    async def callback(self, interaction: discord.Interaction):
-        thread_id = interaction.channel.id
-        info = state["party_infos"].get(str(thread_id))
-        if not info:
-            return await interaction.response.send_message("⚠️ 파티 정보를 찾을 수 없습니다.", ephemeral=True)
-
-        user = interaction.user
-        selected = self.values[0]
-
-        if selected == "참여 취소":
-            if str(user.id) in info["participants"]:
-                info["participants"].pop(str(user.id), None)
-                await interaction.response.send_message("파티 참여가 취소되었습니다.", ephemeral=True)
-            else:
-                await interaction.response.send_message("아직 이 파티에 참여하지 않았습니다.", ephemeral=True)
+def make_shutdown_handler(main_task: asyncio.Task):
+    """종료 요청(SIGTERM/SIGINT 또는 `shutdown` 제어 명령)을 처리하는 함수를 만듭니다."""
+    def request_shutdown(reason: str):
+        if leader_lease.is_leader:
+            # 접속 중이면 진행 중인 처리를 마무리하고 접속을 끊습니다. 저장과 임대 반납은 run_bot의 finally에서 합니다.
+            asyncio.ensure_future(graceful_shutdown(reason))
         else:
-            info["participants"][str(user.id)] = selected
-            await interaction.response.send_message(f"'{selected}' 역할로 파티에 참여했습니다!", ephemeral=True)
-
-        save_state()
-        await update_party_embed(thread_id)
-
-class PartyEditButton(Button):
-    """파티 모집자가 파티 정보를 수정할 수 있는 버튼."""
-    def __init__(self, label="✏️ 파티 정보 수정", style=discord.ButtonStyle.primary):
-        super().__init__(label=label, style=style, custom_id="party_edit_button")
-
-    async def callback(self, interaction: discord.Interaction):
-        thread_id = interaction.channel.id
-        info = state["party_infos"].get(str(thread_id))
-        if not info:
-            return await interaction.response.send_message("⚠️ 파티 정보를 찾을 수 없습니다.", ephemeral=True)
-
-        owner_id = info.get("owner_id")
-        if interaction.user.id != owner_id:
-            return await interaction.response.send_message("⛔ 당신은 이 파티의 모집자가 아닙니다.", ephemeral=True)
-
-        await interaction.response.send_message("새로운 파티 정보를 입력해주세요. 예: `던전명 7/10 20:30`", ephemeral=True)
-
-        def check(m): return m.author == interaction.user and m.channel == interaction.channel
-
-        try:
-            msg = await bot.wait_for("message", timeout=60.0, check=check)
-            content_parts = msg.content.strip().split()
-            if len(content_parts) < 3:
-                await interaction.followup.send("⚠️ 입력 형식이 올바르지 않습니다. (예: `던전명 7/10 20:30`)", ephemeral=True)
-                return
-
-            dungeon = content_parts[0]
-            date_str = content_parts[1]
-            time_str = content_parts[2]
-
-            current_year = datetime.now(KST).year
-            party_time_utc = None
-            try:
-                parsed_dt_kst = KST.localize(datetime.strptime(f"{current_year}-{date_str} {time_str}", "%Y-%m/%d %H:%M"))
-                
-                if parsed_dt_kst < datetime.now(KST):
-                    parsed_dt_kst = KST.localize(datetime.strptime(f"{current_year + 1}-{date_str} {time_str}", "%Y-%m/%d %H:%M"))
-                    
-                party_time_utc = parsed_dt_kst.astimezone(timezone.utc)
-                
-            except ValueError:
-                raise ValueError("날짜/시간 형식이 올바르지 않거나 유효하지 않은 날짜입니다. (예: 7/10 20:30)")
-            
-            if not party_time_utc:
-                raise ValueError("파티 시간 설정에 실패했습니다. 형식과 날짜를 다시 확인해주세요.")
-
-            reminder_time_utc = party_time_utc - timedelta(minutes=10)
-
-            info.update({
-                "dungeon": dungeon, 
-                "date": date_str, 
-                "time": time_str, 
-                "reminder_time": reminder_time_utc,
-                "party_time": party_time_utc,
-            })
-            save_state()
-            await update_party_embed(thread_id)
-            await interaction.followup.send("✅ 파티 정보가 성공적으로 수정되었습니다!", ephemeral=True)
-
-            bot.loop.create_task(schedule_thread_deletion(thread_id, party_time_utc))
-
-        except asyncio.TimeoutError:
-            await interaction.followup.send("⏰ 시간 초과로 수정이 취소되었습니다.", ephemeral=True)
-        except ValueError as e:
-            await interaction.followup.send(f"⚠️ {e}", ephemeral=True)
-        except Exception as e:
-            await interaction.followup.send(f"⚠️ 오류 발생: {e}", ephemeral=True)
-
-class PartyView(View):
-    """파티 모집 임베드에 포함될 뷰 (역할 선택 및 수정 버튼)."""
-    def __init__(self):
-        super().__init__(timeout=None) # 봇 재시작 시에도 뷰가 유지되도록 설정
-        self.add_item(PartyRoleSelect())
-        self.add_item(PartyEditButton())
-
-async def update_party_embed(thread_id: int):
-    """주어진 스레드 ID의 파티 모집 임베드 메시지를 업데이트합니다."""
-    info = state["party_infos"].get(str(thread_id))
-    if not info:
-        print(f"DEBUG: update_party_embed - 파티 정보 없음 for thread_id {thread_id}")
-        return
-
-    thread = bot.get_channel(thread_id)
-    if not thread or not isinstance(thread, discord.Thread):
-        print(f"DEBUG: update_party_embed - 스레드 채널을 찾을 수 없거나 스레드가 아님 for {thread_id}")
-        if str(thread_id) in state["party_infos"]:
-            del state["party_infos"][str(thread_id)]
-            save_state()
-        return
-
-    try:
-        embed_msg = await thread.fetch_message(info["embed_msg_id"])
-    except discord.NotFound:
-        print(f"DEBUG: update_party_embed - 임베드 메시지 ({info['embed_msg_id']})를 찾을 수 없음. 스레드 {thread_id}")
-        return
-    except Exception as e:
-        print(f"DEBUG: update_party_embed - 임베드 메시지 가져오기 실패: {e} for thread {thread_id}")
-        return
-
-    participants_str = "아직 없음"
-    if info["participants"]:
-        participants_list = []
-        for user_id_str, role_name in info["participants"].items():
-            user = thread.guild.get_member(int(user_id_str))
-            if user:
-                participants_list.append(f"• {user.display_name} ({role_name})")
-            else:
-                participants_list.append(f"• (알 수 없음) ({role_name})")
-        participants_str = "\n".join(participants_list)
-
-    new_embed = discord.Embed(
-        title=f"🎯 파티 모집중! - {info['dungeon']}",
-        description=(
-            f"📍 던전: **{info['dungeon']}**\n"
-            f"📅 날짜: **{info['date']}**\n"
-            f"⏰ 시간: **{info['time']}**\n\n"
-            f"**🧑‍🤝‍🧑 현재 참여자: {len(info['participants'])}명**\n{participants_str}\n\n"
-            "---"
-        ),
-        color=0x00ff00
-    )
-    owner_member = thread.guild.get_member(info['owner_id'])
-    if owner_member:
-        new_embed.set_footer(text=f"모집자: {owner_member.display_name}", icon_url=owner_member.avatar.url if owner_member.avatar else discord.Embed.Empty)
-
-    try:
-        await embed_msg.edit(embed=new_embed)
-        print(f"DEBUG: 스레드 {thread_id} 임베드 업데이트 완료.")
-    except Exception as e:
-        print(f"DEBUG: 스레드 {thread_id} 임베드 업데이트 실패: {e}")
-
-async def schedule_thread_deletion(thread_id: int, delete_time_utc: datetime):
-    """지정된 시간에 스레드를 삭제하도록 예약합니다."""
-    
-    now_utc = datetime.now(timezone.utc)
-    time_to_wait = (delete_time_utc - now_utc).total_seconds()
-
-    if time_to_wait <= 0:
-        print(f"⚠️ 스레드 {thread_id} 삭제 시간이 현재 시간보다 빠르거나 같습니다. 즉시 삭제를 시도합니다.")
-        try:
-            thread_channel = bot.get_channel(thread_id)
-            if thread_channel and isinstance(thread_channel, discord.Thread):
-                await thread_channel.delete()
-                print(f"✅ 스레드 {thread_id}가 즉시 삭제되었습니다.")
-                if str(thread_id) in state["party_infos"]:
-                    del state["party_infos"][str(thread_id)]
-                    save_state()
-            else:
-                print(f"⚠️ 스레드 {thread_id}를 찾을 수 없거나 스레드 객체가 아닙니다. (이미 삭제되었을 수 있음)")
-                if str(thread_id) in state["party_infos"]:
-                    del state["party_infos"][str(thread_id)]
-                    save_state()
-        except discord.NotFound:
-            print(f"⚠️ 스레드 {thread_id}를 찾을 수 없어 삭제할 수 없습니다. (이미 삭제되었을 수 있음)")
-            if str(thread_id) in state["party_infos"]:
-                del state["party_infos"][str(thread_id)]
-                save_state()
-        except Exception as e:
-            print(f"❌ 스레드 {thread_id} 즉시 삭제 중 오류 발생: {e}")
-        return
-
-    print(f"⏳ 스레드 {thread_id}는 {time_to_wait:.0f}초 후 (UTC: {delete_time_utc.isoformat()}) 삭제될 예정입니다.")
-    
-    await asyncio.sleep(time_to_wait)
-
-    try:
-        thread_channel = bot.get_channel(thread_id)
-        if thread_channel and isinstance(thread_channel, discord.Thread):
-            await thread_channel.delete()
-            print(f"✅ 스레드 {thread_id}가 모집 시간 종료로 인해 삭제되었습니다.")
-            if str(thread_id) in state["party_infos"]:
-                del state["party_infos"][str(thread_id)]
-                save_state()
-        else:
-            print(f"⚠️ 스레드 {thread_id}를 찾을 수 없거나 이미 삭제되었습니다.")
-            if str(thread_id) in state["party_infos"]:
-                del state["party_infos"][str(thread_id)]
-                save_state()
-    except discord.NotFound:
-        print(f"⚠️ 스레드 {thread_id}를 찾을 수 없어 삭제할 수 없습니다. (이미 삭제되었을 수 있음)")
-        if str(thread_id) in state["party_infos"]:
-            del state["party_infos"][str(thread_id)]
-            save_state()
-    except Exception as e:
-        print(f"❌ 스레드 {thread_id} 삭제 중 오류 발생: {e}")
-
-# === 명령어: 파티 모집 ===
-@bot.command()
-async def 모집(ctx):
-    try:
-        await ctx.message.delete()
-    except discord.Forbidden:
-        print(f"❌ '{ctx.guild.name}' 길드에서 메시지 삭제 권한이 없습니다.")
-    except Exception as e:
-        print(f"⚠️ 메시지 삭제 중 오류 발생: {e}")
-
-    if not ctx.guild:
-        await ctx.send("이 명령어는 서버 채널에서만 사용할 수 있습니다.")
-        return
-
-    verified_role = ctx.guild.get_role(VERIFIED_ROLE_ID)
-    if not verified_role or verified_role not in ctx.author.roles:
-        await ctx.send("⛔ 파티 모집은 `찡긋` 역할을 가진 멤버만 가능합니다. 먼저 인증을 완료해주세요!", delete_after=10)
-        return
-
-    def check(m): return m.author == ctx.author and m.channel == ctx.channel
-    
-    bot_question_msg = await ctx.send("📥 파티 정보를 한 줄로 입력해주세요. 예: `브리레흐1-3관 7/6 20:00`", delete_after=15)
-    
-    try:
-        msg = await bot.wait_for("message", timeout=30.0, check=check)
-        
-        try:
-            await msg.delete()
-            await bot_question_msg.delete() 
-        except discord.Forbidden:
-            print(f"❌ '{ctx.guild.name}' 길드에서 사용자 메시지 또는 봇 질문 메시지 삭제 권한이 없습니다.")
-        except Exception as e:
-            print(f"⚠️ 사용자 메시지/봇 질문 메시지 삭제 중 오류 발생: {e}")
-
-        content_parts = msg.content.strip().split()
-        if len(content_parts) < 3:
-            await ctx.send("⚠️ 입력 형식이 올바르지 않습니다. (예: `던전명 7/6 20:00`)", delete_after=10)
-            return
-
-        dungeon = content_parts[0]
-        date_str = content_parts[1]
-        time_str = content_parts[2]
-
-        current_year = datetime.now(KST).year
-        party_time_utc = None
-        try:
-            parsed_dt_kst = KST.localize(datetime.strptime(f"{current_year}-{date_str} {time_str}", "%Y-%m/%d %H:%M"))
-            
-            if parsed_dt_kst < datetime.now(KST):
-                parsed_dt_kst = KST.localize(datetime.strptime(f"{current_year + 1}-{date_str} {time_str}", "%Y-%m/%d %H:%M"))
-                
-            party_time_utc = parsed_dt_kst.astimezone(timezone.utc)
-            
-        except ValueError:
-            raise ValueError("날짜/시간 형식이 올바르지 않거나 유효하지 않은 날짜입니다. (예: 7/6 20:00)")
-        
-        if not party_time_utc:
-            raise ValueError("파티 시간 설정에 실패했습니다. 형식과 날짜를 다시 확인해주세요.")
+            # 임대를 기다리는 대기 프로세스는 정리할 것이 없으므로 바로 끝냅니다.
+            log.info("🛑 종료 요청 (%s): 대기 중이므로 바로 종료합니다.", reason)
+            main_task.cancel()
+    return request_shutdown
 
-        reminder_time_utc = party_time_utc - timedelta(minutes=10)
 
-    except asyncio.TimeoutError:
+def install_signal_handlers(loop: asyncio.AbstractEventLoop, request_shutdown):
+    """SIGTERM/SIGINT를 받으면 바로 죽지 않고 정상 종료 절차를 밟습니다. (Windows는 `shutdown` 제어 명령 사용)"""
+    for sig in (signal.SIGTERM, signal.SIGINT):
         try:
-            await bot_question_msg.delete()
-        except Exception:
+            loop.add_signal_handler(sig, request_shutdown, sig.name)
+        except (NotImplementedError, RuntimeError):
             pass
-        await ctx.send("⏰ 시간 초과로 파티 생성이 취소되었습니다.", delete_after=10)
-        return
-    except ValueError as e:
-        try:
-            await bot_question_msg.delete()
-        except Exception:
-            pass
-        await ctx.send(f"⚠️ {e}", delete_after=10)
-        return
-    except Exception as e:
-        try:
-            await bot_question_msg.delete()
-        except Exception:
-            pass
-        await ctx.send(f"⚠️ 파티 정보 입력 중 오류 발생: {e}", delete_after=10)
-        return
-
-    thread = None
-    try:
-        thread = await ctx.channel.create_thread(
-            name=f"[{dungeon}] {date_str} {time_str} - {ctx.author.display_name}님의 파티 모집",
-            type=discord.ChannelType.public_thread,
-            auto_archive_duration=60,
-        )
-        print(f"DEBUG: 스레드 '{thread.name}' (ID: {thread.id}) 생성 성공.")
-    except discord.Forbidden:
-        await ctx.send("❌ 스레드를 생성할 권한이 없습니다. 봇의 권한을 확인해주세요.", delete_after=15)
-        print(f"ERROR: 길드 '{ctx.guild.name}'에서 스레드 생성 권한 부족.")
-        return
-    except Exception as e:
-        await ctx.send(f"❌ 스레드 생성 중 오류 발생: {e}", delete_after=15)
-        print(f"ERROR: 스레드 생성 중 예상치 못한 오류 발생: {e}")
-        return
-
-    party_info = {
-        "dungeon": dungeon,
-        "date": date_str,
-        "time": time_str,
-        "reminder_time": reminder_time_utc,
-        "party_time": party_time_utc,
-        "participants": {},
-        "embed_msg_id": None,
-        "owner_id": ctx.author.id,
-    }
-
-    state["party_infos"][str(thread.id)] = party_info
-    save_state()
-
-    initial_embed = discord.Embed(
-        title=f"🎯 파티 모집중! - {dungeon}",
-        description=(
-            f"📍 던전: **{dungeon}**\n"
-            f"📅 날짜: **{date_str}**\n"
-            f"⏰ 시간: **{time_str}**\n\n"
-            f"**🧑‍🤝‍🧑 현재 참여자: 0명**\n(아직 없음)\n\n"
-            "---"
-        ),
-        color=0x00ff00
-    )
-    owner_member = ctx.guild.get_member(party_info['owner_id'])
-    if owner_member:
-        initial_embed.set_footer(text=f"모집자: {owner_member.display_name}", icon_url=owner_member.avatar.url if owner_member.avatar else discord.Embed.Empty)
-
-    embed_msg = await thread.send(embed=initial_embed)
-    await embed_msg.pin()
-    party_info["embed_msg_id"] = embed_msg.id
-    save_state()
-
-    await embed_msg.edit(view=PartyView()) # embed_msg에 View를 연결
-    await ctx.send(f"{ctx.author.mention}님, 파티 모집 스레드가 생성되었습니다: {thread.mention}", delete_after=10)
-
-    bot.loop.create_task(schedule_thread_deletion(thread.id, party_time_utc))
-
-
-## MBTI 통계 및 확인 기능
-
-
-@bot.command()
-async def mbti통계(ctx):
-    """서버 내 MBTI 역할 통계를 보여줍니다."""
-    guild = ctx.guild
-    if not guild:
-        await ctx.send("이 명령어는 서버에서만 사용할 수 있습니다.")
-        return
-
-    mbti_roles_dict = {name: guild.get_role(ROLE_IDS["MBTI"][name]) for name in MBTI_ROLE_NAMES if name in ROLE_IDS["MBTI"]}
-    mbti_roles_dict = {name: role for name, role in mbti_roles_dict.items() if role}
-
-    if not mbti_roles_dict:
-        await ctx.send("서버에 설정된 MBTI 역할이 없습니다. `ROLE_IDS['MBTI']` 또는 `MBTI_ROLE_NAMES`를 확인해주세요.")
-        return
-
-    mbti_counts = {name: 0 for name in MBTI_ROLE_NAMES}
-    
-    members = []
-    async for member in guild.fetch_members(limit=None):
-        members.append(member)
-
-    for member in members:
-        for role in member.roles:
-            if role.name in mbti_counts:
-                mbti_counts[role.name] += 1
-    
-    sorted_mbti_counts = sorted(mbti_counts.items(), key=lambda item: item[1], reverse=True)
-
-    embed = discord.Embed(
-        title="📊 서버 MBTI 통계",
-        description="현재 서버 멤버들의 MBTI 역할 분포입니다.",
-        color=0x7289DA
-    )
-
-    total_mbti_users = 0
-    for mbti, count in sorted_mbti_counts:
-        if count > 0:
-            embed.add_field(name=mbti, value=f"{count}명", inline=True)
-            total_mbti_users += count
-    
-    if total_mbti_users == 0:
-        embed.description = "아직 MBTI 역할을 선택한 사용자가 없습니다."
-
-    embed.set_footer(text=f"총 MBTI 선택 사용자: {total_mbti_users}명")
-    await ctx.send(embed=embed)
-
-
-@bot.command()
-async def mbti확인(ctx, mbti_type: str):
-    """특정 MBTI 역할을 가진 멤버 목록을 보여줍니다. (예: !mbti확인 ENFP)"""
-    mbti_type = mbti_type.upper()
-
-    if mbti_type not in MBTI_ROLE_NAMES:
-        await ctx.send(f"⚠️ '{mbti_type}'는 유효한 MBTI 역할이 아닙니다. 정확한 MBTI 유형을 입력해주세요. (예: ISTJ, ENFP)")
-        return
-
-    role_id = ROLE_IDS["MBTI"].get(mbti_type)
-    if not role_id:
-        await ctx.send(f"'{mbti_type}' 역할 ID를 `ROLE_IDS['MBTI']`에서 찾을 수 없습니다. 설정을 확인해주세요.")
-        return
-
-    mbti_role = ctx.guild.get_role(role_id)
-    if not mbti_role:
-        await ctx.send(f"'{mbti_type}' 역할이 서버에 존재하지 않습니다. `ROLE_IDS` 설정을 확인해주세요.")
-        return
-
-    members_with_role = []
-    async for member in ctx.guild.fetch_members(limit=None):
-        if mbti_role in member.roles:
-            members_with_role.append(member.display_name)
-    
-    embed = discord.Embed(
-        title=f"👥 {mbti_type} 유형 멤버 목록",
-        color=0x7289DA
-    )
-
-    if members_with_role:
-        description_text = "\n".join(members_with_role)
-        if len(description_text) > 1900:
-            description_text = description_text[:1900] + "\n...(이하 생략)"
-        embed.description = description_text
-        embed.set_footer(text=f"총 {len(members_with_role)}명")
-    else:
-        embed.description = f"현재 '{mbti_type}' 역할을 가진 멤버가 없습니다."
-
-    await ctx.send(embed=embed)
-
-
-## 봇 도움말 기능
 
 
-@bot.command(name="도움말", aliases=["help", "명령어"])
-async def show_help(ctx):
-    """봇의 사용 가능한 명령어 목록을 보여줍니다."""
-    
-    embed = discord.Embed(
-        title="✨ 찡긋봇 명령어 도움말 ✨",
-        description="찡긋봇이 제공하는 명령어는 다음과 같습니다:",
-        color=0x7289DA
-    )
-
-    embed.add_field(
-        name="🎉 파티 모집",
-        value="`!모집` - 새로운 파티 모집 스레드를 생성합니다.\n(스레드 내에서 파티 참여/수정 버튼 이용)",
-        inline=False
-    )
-
-    embed.add_field(
-        name="📊 MBTI 통계",
-        value="`!mbti통계` - 서버 내 MBTI 역할 분포를 보여줍니다.\n"
-              "`!mbti확인 [MBTI유형]` - 특정 MBTI 역할을 가진 멤버 목록을 보여줍니다. (예: `!mbti확인 ENFP`)",
-        inline=False
-    )
-    
-    embed.add_field(
-        name="📌 역할 선택 및 인증",
-        value=f"역할 선택은 <#{ROLE_SELECT_CHANNEL_ID}> 채널에서, 인증은 <#{VERIFY_CHANNEL_ID}> 채널에서 버튼을 통해 진행할 수 있습니다.",
-        inline=False
-    )
-
-    embed.set_footer(text=f"문의사항은 서버 관리자에게 문의해주세요. | 봇 버전: v0.1")
-    embed.set_thumbnail(url=bot.user.avatar.url if bot.user.avatar else discord.Embed.Empty)
-
-    await ctx.send(embed=embed)
-
-
-## 배경 작업 (리마인더, 스레드 자동 보관)
-
-
-@tasks.loop(minutes=1)
-async def reminder_loop():
-    """매 1분마다 파티 리마인더 알림을 확인하고 스레드를 자동 보관합니다."""
-    await bot.wait_until_ready()
-    now_utc = datetime.now(timezone.utc)
-    print(f"DEBUG: Reminder loop started at {now_utc.isoformat()}")
-    
-    print(f"DEBUG: Current party_infos in state: {list(state['party_infos'].keys())}")
-
-    for thread_id_str, info in list(state["party_infos"].items()):
-        thread_id = int(thread_id_str)
-        print(f"DEBUG: Processing party for thread ID: {thread_id_str}")
-        
-        thread = bot.get_channel(thread_id)
-        
-        if not thread or not isinstance(thread, discord.Thread):
-            print(f"DEBUG: 스레드 {thread_id}를 찾을 수 없거나 스레드 객체가 아닙니다. (type: {type(thread)}) 파티 정보에서 제거합니다.")
-            if str(thread_id) in state["party_infos"]:
-                del state["party_infos"][str(thread_id)]
-                save_state()
-            continue
-
-        party_time_utc = info.get("party_time") 
-
-        if party_time_utc:
-            if not thread.archived and party_time_utc + timedelta(hours=1) < now_utc:
-                try:
-                    await thread.edit(archived=True, reason="파티 모집 시간 1시간 경과, 스레드 자동 보관")
-                    print(f"✅ 스레드 '{thread.name}' (ID: {thread_id_str}) 자동 보관 처리됨.")
-                except discord.Forbidden:
-                    print(f"❌ 스레드 '{thread.name}' (ID: {thread_id_str}) 보관 권한이 없습니다. 봇 권한을 확인해주세요.")
-                except Exception as e:
-                    print(f"❌ 스레드 '{thread.name}' (ID: {thread_id_str}) 보관 중 오류 발생: {e}")
-
-        reminder_dt_utc = info.get("reminder_time") 
-        
-        if reminder_dt_utc is None:
-            continue
-
-        print(f"DEBUG: 스레드 {thread_id_str} - Reminder: {reminder_dt_utc.isoformat()}, Now: {now_utc.isoformat()}")
-        
-        time_until_reminder = reminder_dt_utc - now_utc
-        print(f"DEBUG: 스레드 {thread_id_str} - Time until reminder: {time_until_reminder}")
-        
-        if timedelta(minutes=0) <= time_until_reminder < timedelta(minutes=1) or (reminder_dt_utc < now_utc and time_until_reminder > timedelta(minutes=-1)):
-            guild = bot.get_guild(YOUR_GUILD_ID)
-            if not guild:
-                print(f"경고: 길드 ID {YOUR_GUILD_ID}를 찾을 수 없습니다. (리마인더 루프)")
-                info["reminder_time"] = None
-                save_state()
-                continue
-
-            mentions = []
-            for user_id_str in info.get("participants", {}).keys():
-                member = guild.get_member(int(user_id_str))
-                if member:
-                    mentions.append(member.mention)
-            
-            if thread and isinstance(thread, discord.Thread):
-                try:
-                    await thread.send(
-                        f"⏰ **리마인더 알림!**\n{' '.join(mentions)}\n"
-                        f"`{info['dungeon']}` 던전이 10분 후에 시작됩니다! **({info['date']} {info['time']})**"
-                    )
-                    info["reminder_time"] = None
-                    save_state()
-                    print(f"✅ 리마인더 전송 완료: 스레드 {thread_id_str} - {info['dungeon']}")
-                except discord.Forbidden:
-                    print(f"❌ 리마인더 전송 실패: 스레드 {thread_id_str}에 메시지 보낼 권한이 없습니다.")
-                    info["reminder_time"] = None
-                    save_state()
-                except Exception as e:
-                    print(f"❌ 리마인더 전송 실패 (스레드 {thread_id_str}): {e}")
+def start_control_reader(loop: asyncio.AbstractEventLoop, request_shutdown):
+    """표준 입력을 읽는 스레드를 띄워 한 줄마다 이벤트 루프에서 제어 명령을 처리합니다. (Windows에서도 동작)"""
+    def read_lines():
+        for line in sys.stdin:
+            if line.strip() == "shutdown":
+                loop.call_soon_threadsafe(request_shutdown, "shutdown 명령")
             else:
-                print(f"경고: 스레드 ID {thread_id_str}를 찾을 수 없거나 이미 삭제되었습니다. 리마인더 알림을 보낼 수 없습니다.")
-                info["reminder_time"] = None
-                save_state()
-        
-        elif reminder_dt_utc < now_utc - timedelta(minutes=5) and reminder_dt_utc is not None:
-            print(f"DEBUG: 스레드 {thread_id_str} - 리마인더 시간이 너무 오래 지났습니다. 초기화.")
-            info["reminder_time"] = None
-            save_state()
-
+                asyncio.run_coroutine_threadsafe(handle_control_line(line), loop)
 
-## 새 멤버 환영 및 인증 안내
+    threading.Thread(target=read_lines, name="control-stdin", daemon=True).start()
 
 
-@bot.event
-async def on_member_join(member):
-    """새 멤버가 서버에 들어올 때 '손님' 역할을 부여하고 환영 메시지를 보냅니다."""
-    guild = member.guild
-    if guild.id == YOUR_GUILD_ID:
-        guest_role = guild.get_role(GUEST_ROLE_ID)
-        if guest_role:
-            await member.add_roles(guest_role)
-            print(f"✅ {member.display_name} 님에게 '손님' 역할 부여 완료.")
-        else:
-            print(f"⚠️ '손님' 역할 (ID: {GUEST_ROLE_ID})을 찾을 수 없습니다. 역할 ID를 확인해주세요.")
-
-        welcome_channel = guild.get_channel(WELCOME_CHANNEL_ID)
-        if welcome_channel:
-            welcome_message = (
-                f"{member.mention} 님, 찡긋 길드 디스코드 서버에 오신 것을 환영합니다! ✨\n\n"
-                f"저희 서버는 **인증**을 해야 모든 채널을 이용할 수 있습니다. 🧐\n"
-                f"현재는 **손님** 역할이 부여되어 일부 채널만 볼 수 있어요.\n\n"
-                f"1. 먼저 <#{VERIFY_CHANNEL_ID}> 채널로 이동하여 **`인증하죠`** 버튼을 눌러 **`찡긋`** 멤버가 되어주세요! 🪪\n"
-                f"2. 인증 완료 후 <#{ROLE_SELECT_CHANNEL_ID}> 채널에서 **아르카나 및 MBTI 역할**을 선택해주세요! 🎭\n\n"
-                "즐거운 시간 되세요! 😄"
-            )
-            await welcome_channel.send(welcome_message)
-            print(f"✅ {member.display_name} 님께 환영 메시지 전송 완료. (채널: {welcome_channel.name})")
-        else:
-            print(f"⚠️ 환영 메시지를 보낼 채널 (ID: {WELCOME_CHANNEL_ID})을 찾을 수 없습니다. 채널 ID를 확인해주세요.")
+# === 봇 실행 ===
+async def run_bot():
+    """로그인과 확장 로드를 미리 해 둔 채 리더 임대를 기다리고, 얻으면 상태를 읽은 뒤 게이트웨이에 접속합니다.
+
+    대기(standby) 프로세스는 게이트웨이에 접속하지 않으므로 이벤트를 중복 처리하지 않고,
+    리더가 종료하며 임대를 반납하거나 만료되면 몇 초 안에 이어받습니다. 이어받을 때 남은 일은
+    길드 상태 읽기와 게이트웨이 접속(READY와 시작 정리 작업 포함)뿐입니다. 게이트웨이 세션은 넘겨받을 수
+    없으므로 그 사이(보통 수 초) 들어온 이벤트는 디스코드가 다시 보내 주지 않습니다. (완전한 무중단은 아님)
+    상태는 임대를 얻은 뒤에 읽어야 이전 리더가 마지막으로 저장한 내용을 이어받습니다.
+    """
+    # 봇과 discord.py 로그를 큐로 넘겨 별도 스레드에서 콘솔/파일(LOG_FILE)에 씁니다.
+    setup_logging()
+    loop = asyncio.get_running_loop()
+    request_shutdown = make_shutdown_handler(asyncio.current_task())
+    install_signal_handlers(loop, request_shutdown)
+    if CONTROL_STDIN:
+        start_control_reader(loop, request_shutdown)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    try:
+        async with bot:
+            # 임대를 기다리는 동안 로그인, 확장 로드, 슬래시 명령어 등록을 미리 해 둡니다. (setup_hook)
+            await bot.login(TOKEN)
+            await leader_lease.acquire()
+            leader_lease.start()
+            await start_guilds()
+            await bot.connect()
+    finally:
+        # 종료 시 아직 저장되지 않은 변경을 길드마다 마지막으로 저장합니다. (리더일 때만)
+        for rt in guilds.values():
+            # 정상 종료 절차를 거쳤으면 이미 멈춘 상태이고, 아니면 실행 중인 마감 작업을 잠시 기다립니다.
+            await rt.scheduler.close(timeout=SHUTDOWN_DRAIN_TIMEOUT)
+            await rt.join_queue.close()
+            await rt.store.close(flush=leader_lease.is_leader)
+            log.info("💾 상태 저장 통계: %s", rt.store.stats(), guild_id=rt.guild_id)
+        await leader_lease.release()
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    if not TOKEN:
+        print("❌ DISCORD_TOKEN을 .env 파일에서 불러오지 못했습니다!")
+        exit(1)
     else:
-        print(f"⚠️ 봇이 설정된 길드 ({YOUR_GUILD_ID})가 아닌 다른 길드에 멤버가 조인했습니다.")
-
-
-## 봇 실행 시 초기화 로직
-
-
-@bot.event
-async def on_ready():
-    """봇이 로그인되어 준비되면 실행되는 초기화 작업들."""
-    print(f"✅ 봇 로그인 완료: {bot.user}")
-    guild = bot.get_guild(YOUR_GUILD_ID)
-
-    if guild:
-        try:
-            await guild.me.edit(nick="찡긋봇")
-        except Exception as e:
-            print(f"닉네임 변경 실패: {e}")
-
-        # 봇 재시작 시 Persistent View 등록 (커스텀 ID를 가진 View)
-        bot.add_view(CategorySelectView())
-        bot.add_view(VerifyView())
-        bot.add_view(PartyView())
-
-        role_channel = guild.get_channel(ROLE_SELECT_CHANNEL_ID)
-        if role_channel:
-            if state["initial_message_id"]:
-                try:
-                    initial_msg = await role_channel.fetch_message(state["initial_message_id"])
-                    await initial_msg.edit(view=CategorySelectView())
-                    print(f"✅ 기존 역할 선택 초기 메시지 ({state['initial_message_id']})에 뷰 재등록 완료.")
-                except discord.NotFound:
-                    print(f"⚠️ 저장된 역할 선택 초기 메시지 ({state['initial_message_id']})를 찾을 수 없습니다. 새로 전송합니다.")
-                    state["initial_message_id"] = None
-                    save_state()
-                except Exception as e:
-                    print(f"역할 선택 초기 메시지 확인 중 오류 발생: {e}")
-                    state["initial_message_id"] = None
-                    save_state()
-
-            if not state["initial_message_id"]:
-                try:
-                    msg = await role_channel.send(
-                        "👇 아래 버튼을 눌러 `아르카나` 또는 `MBTI` 역할을 선택하세요!",
-                        view=CategorySelectView()
-                    )
-                    state["initial_message_id"] = msg.id
-                    save_state()
-                    print(f"✅ 새로운 역할 선택 초기 메시지 ({msg.id}) 전송 완료.")
-                except Exception as e:
-                    print(f"역할 선택 초기 메시지 전송 오류: {e}")
+        print("✅ DISCORD_TOKEN 정상 로드됨")
 
-        verify_channel = guild.get_channel(VERIFY_CHANNEL_ID)
-        if verify_channel:
-            try:
-                found_existing_verify_msg = False
-                async for msg_history in verify_channel.history(limit=5):
-                    if msg_history.author == bot.user and "✅ 서버에 오신 걸 환영합니다!" in msg_history.content:
-                        found_existing_verify_msg = True
-                        print("✅ 기존 인증 메시지 발견. 뷰 재등록 시도.")
-                        try:
-                            await msg_history.edit(view=VerifyView())
-                            print("✅ 기존 인증 메시지에 뷰 재등록 완료.")
-                        except Exception as e_edit:
-                            print(f"기존 인증 메시지 수정 중 오류 발생: {e_edit}")
-                        break
-                
-                if not found_existing_verify_msg:
-                    await verify_channel.send(
-                        "✅ 서버에 오신 걸 환영합니다!\n아래 버튼을 눌러 인증을 완료해주세요.",
-                        view=VerifyView()
-                    )
-                    print("✅ 새로운 인증 메시지 전송 완료.")
-            except Exception as e:
-                print(f"인증 메시지 전송 오류: {e}")
-
-        for thread_id_str, info in list(state["party_infos"].items()):
-            thread_id = int(thread_id_str)
-            
-            thread = guild.get_channel(thread_id)
-            if not thread or not isinstance(thread, discord.Thread):
-                print(f"⚠️ 스레드 {thread_id}를 찾을 수 없거나 스레드가 아님. 상태에서 제거합니다.")
-                del state["party_infos"][thread_id_str]
-                save_state()
-                continue
-            
-            if info.get("embed_msg_id"):
-                try:
-                    embed_msg = await thread.fetch_message(info["embed_msg_id"])
-                    
-                    await embed_msg.edit(view=PartyView())
-                    
-                    await update_party_embed(thread_id)
-                    print(f"✅ 스레드 {thread_id} 임베드 정보 최신화 및 뷰 재등록 완료.")
-
-                except discord.NotFound:
-                    print(f"⚠️ 스레드 {thread_id}의 임베드 메시지를 찾을 수 없습니다. 상태에서 제거합니다.")
-                    del state["party_infos"][thread_id_str]
-                    save_state()
-                except Exception as e:
-                    print(f"❌ 스레드 {thread_id} 메시지 처리 중 오류 발생: {e}")
-
-            party_time = info.get("party_time")
-            if party_time and isinstance(party_time, datetime) and party_time > datetime.now(timezone.utc):
-                bot.loop.create_task(schedule_thread_deletion(thread_id, party_time))
-                print(f"✅ 스레드 {thread_id} 삭제 스케줄링 재개 완료.")
-            else:
-                print(f"⚠️ 스레드 {thread_id}의 파티 시간 정보가 유효하지 않거나 이미 지났습니다. 스케줄링 건너뜀.")
-                bot.loop.create_task(schedule_thread_deletion(thread_id, datetime.now(timezone.utc)))
-
-
-    reminder_loop.start()
-
-# === 봇 실행 ===
-load_state()
-bot.run(TOKEN)
\ No newline at end of file
+    try:
+        asyncio.run(run_bot())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
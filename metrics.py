@@ -0,0 +1,162 @@
+import time
+import asyncio
+import functools
+
+from log import get_logger
+
+log = get_logger("metrics")
+
+# 지연 시간 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """누적 구간별 개수와 합계를 보관하는 간단한 히스토그램."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """구간 경계로 근사한 분위수. 마지막 구간을 넘으면 최댓값을 반환합니다."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= target:
+                return bound
+        return self.max
+
+
+class MetricsRegistry:
+    """카운터, 게이지, 히스토그램을 이름 + 라벨 단위로 모아 두는 저장소."""
+
+    def __init__(self):
+        self.counters = {}      # 이름 -> {라벨 키: 값}
+        self.histograms = {}    # 이름 -> {라벨 키: Histogram}
+        self.gauges = {}        # 이름 -> {라벨 키: 값}
+        self.collectors = []    # 렌더링 직전에 게이지를 채우는 함수들
+        self.started_at = time.time()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _label_key(labels)
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = Histogram()
+        hist.observe(value)
+
+    def set_gauge(self, name: str, value: float, **labels):
+        self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def register_collector(self, collector):
+        """collector(registry)는 값을 읽을 때마다 호출되어 게이지를 최신 값으로 채웁니다."""
+        self.collectors.append(collector)
+        return collector
+
+    def collect(self):
+        for collector in self.collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                log.exception("❌ 지표 수집 중 오류 발생 (%s): %s", getattr(collector, "__name__", collector), e)
+
+    def timed(self, name: str, **labels):
+        """async 함수의 실행 시간을 히스토그램에 기록하는 데코레이터."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started, **labels)
+            return wrapper
+        return decorator
+
+    def render_prometheus(self) -> str:
+        """Prometheus 텍스트 형식으로 모든 지표를 출력합니다."""
+        self.collect()
+        lines = []
+        for name, series in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in series.items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in series.items():
+                running = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    running += count
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': bound})} {running}")
+                lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {hist.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {hist.sum}")
+                lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9108):
+        """`GET /metrics`에 Prometheus 텍스트를 돌려주는 아주 작은 HTTP 서버를 시작합니다."""
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+                while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                    pass
+                parts = request_line.decode("latin-1").split()
+                if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                    status, body = "200 OK", self.render_prometheus().encode("utf-8")
+                else:
+                    status, body = "404 Not Found", b"not found\n"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+            except Exception:
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        log.info("✅ 지표 엔드포인트 시작: http://%s:%s/metrics", host, port)
+        return server
+
+
+# 봇 전체에서 함께 쓰는 기본 저장소
+registry = MetricsRegistry()
@@ -0,0 +1,276 @@
+import time
+import heapq
+import asyncio
+import itertools
+
+import discord
+
+from log import get_logger
+
+log = get_logger("outbound")
+
+# 우선순위 (숫자가 작을수록 먼저 처리)
+PRIORITY_REMINDER = 0   # 파티 리마인더 (시간이 중요)
+PRIORITY_ROLE = 1       # 역할 부여/제거
+PRIORITY_THREAD = 2     # 스레드 삭제/보관
+PRIORITY_LOG = 3        # 환영 메시지, 인증 로그
+PRIORITY_BULK = 4       # 관리자 역할 일괄 작업 (사용자 요청보다 뒤, 버리지 않음)
+PRIORITY_EMBED = 5      # 파티 임베드 수정 (보기용, 밀리면 버려도 됨)
+
+PRIORITY_NAMES = {
+    PRIORITY_REMINDER: "reminder",
+    PRIORITY_ROLE: "role",
+    PRIORITY_THREAD: "thread",
+    PRIORITY_LOG: "log",
+    PRIORITY_BULK: "bulk",
+    PRIORITY_EMBED: "embed",
+}
+
+
+class OutboundDropped(Exception):
+    """큐가 밀려서 낮은 우선순위 작업이 버려졌을 때 발생합니다."""
+
+
+class _Job:
+    __slots__ = ("priority", "route", "factory", "merge_key", "future", "enqueued_at", "seq")
+
+    def __init__(self, priority, route, factory, merge_key, future, seq):
+        self.priority = priority
+        self.route = route
+        self.factory = factory
+        self.merge_key = merge_key
+        self.future = future
+        self.enqueued_at = time.monotonic()
+        self.seq = seq
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class OutboundDispatcher:
+    """디스코드 API로 나가는 호출을 우선순위 큐로 모아 처리하는 디스패처.
+
+    - 우선순위가 높은 작업(리마인더 등)이 항상 먼저 실행됩니다.
+    - 같은 경로(route, 예: 채널 하나)에 대한 동시 호출 수를 제한합니다. 경로가 가득 찼거나 멈춘 작업은
+      작업자를 붙잡지 않고 경로별로 따로 보관했다가, 자리가 나거나 멈춤이 풀리면 큐에 다시 넣습니다.
+      그래서 한 경로가 막혀도 다른 경로의 작업은 바로 실행됩니다.
+    - 429로 `discord.RateLimited`가 발생하면 해당 경로를 retry_after 동안 멈추고 작업을 다시 넣습니다.
+    - 같은 merge_key의 작업이 대기 중이면 새 작업으로 합쳐지고, 큐가 밀리면 낮은 우선순위 작업은 버려집니다.
+    """
+
+    def __init__(self, workers: int = 4, route_concurrency: int = 1, backlog_limit: int = 50,
+                 droppable_priority: int = PRIORITY_EMBED):
+        self.workers = workers
+        self.route_concurrency = route_concurrency
+        self.backlog_limit = backlog_limit
+        self.droppable_priority = droppable_priority
+
+        self._heap = []
+        self._merge = {}            # merge_key -> 대기 중인 작업
+        self._route_active = {}     # route -> 실행 중인 작업 수
+        self._parked = {}           # route -> 경로가 가득 찼거나 멈춰서 보관 중인 작업 (힙)
+        self._paused_until = {}     # route -> 재개 시각 (monotonic)
+        self._resume_handles = {}   # route -> 멈춤이 끝날 때 보관 작업을 되돌리는 타이머
+        self._counter = itertools.count()
+        self._available = asyncio.Event()
+        self._tasks = []
+        self._active = 0            # 지금 실행 중인 작업 수
+
+        # 통계용 카운터
+        self.started = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.executed = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.wait_total = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self.wait_max = {name: 0.0 for name in PRIORITY_NAMES.values()}
+        self.route_calls = {}
+        self.dropped = 0
+        self.merged = 0
+        self.rate_limited = 0
+
+    def start(self):
+        """작업자들을 시작합니다. (이벤트 루프 안에서 호출)"""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        """작업자들을 멈춥니다. 대기 중인 작업은 OutboundDropped로 끝납니다."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for handle in self._resume_handles.values():
+            handle.cancel()
+        self._resume_handles.clear()
+        pending = self._heap + [job for parked in self._parked.values() for job in parked]
+        self._heap = []
+        self._parked.clear()
+        for job in pending:
+            if not job.future.done():
+                job.future.set_exception(OutboundDropped("디스패처 종료"))
+                job.future.exception()  # 아무도 기다리지 않아도 경고가 나지 않도록 확인 처리
+        self._merge.clear()
+
+    async def drain(self, timeout: float) -> bool:
+        """큐가 비고 실행 중인 작업이 끝날 때까지 최대 timeout초 기다립니다. 모두 끝났으면 True."""
+        deadline = time.monotonic() + timeout
+        while self._heap or self._active or self._parked:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def submit(self, priority: int, route: str, factory, merge_key=None) -> asyncio.Future:
+        """factory()가 돌려주는 코루틴을 큐에 넣고, 결과를 받을 Future를 반환합니다.
+
+        factory는 실행 직전에 호출되므로, 합쳐지거나 버려진 작업은 아예 API를 호출하지 않습니다.
+        """
+        loop = asyncio.get_running_loop()
+
+        if merge_key is not None and merge_key in self._merge:
+            # 대기 중인 같은 작업을 새 내용으로 바꾸고, 같은 Future를 함께 기다립니다.
+            job = self._merge[merge_key]
+            job.factory = factory
+            self.merged += 1
+            return job.future
+
+        future = loop.create_future()
+        if self._queued() >= self.backlog_limit and priority >= self.droppable_priority:
+            self.dropped += 1
+            future.set_exception(OutboundDropped(f"큐 적체로 버려짐 ({route})"))
+            return future
+
+        job = _Job(priority, route, factory, merge_key, future, next(self._counter))
+        heapq.heappush(self._heap, job)
+        if merge_key is not None:
+            self._merge[merge_key] = job
+        self._available.set()
+        return future
+
+    async def call(self, priority: int, route: str, factory, merge_key=None):
+        """submit() 후 결과를 기다립니다."""
+        return await self.submit(priority, route, factory, merge_key)
+
+    def _queued(self) -> int:
+        return len(self._heap) + sum(len(parked) for parked in self._parked.values())
+
+    def _route_blocked(self, route: str, now: float) -> bool:
+        return (self._paused_until.get(route, 0) > now
+                or self._route_active.get(route, 0) >= self.route_concurrency)
+
+    def _park(self, job: _Job):
+        heapq.heappush(self._parked.setdefault(job.route, []), job)
+
+    def _release(self, route: str):
+        """경로에 자리가 났거나 멈춤이 끝났으면, 보관 중인 작업을 빈자리만큼 큐에 되돌립니다."""
+        self._resume_handles.pop(route, None)
+        if self._paused_until.get(route, 0) > time.monotonic():
+            return
+        parked = self._parked.get(route)
+        free = self.route_concurrency - self._route_active.get(route, 0)
+        while parked and free > 0:
+            job = heapq.heappop(parked)
+            if job.future.done():
+                continue
+            heapq.heappush(self._heap, job)
+            free -= 1
+        if not parked:
+            self._parked.pop(route, None)
+        self._available.set()
+
+    def _pause(self, route: str, retry_after: float):
+        """경로를 retry_after초 동안 멈추고, 끝나는 시각에 보관 작업을 되돌리도록 예약합니다."""
+        self._paused_until[route] = time.monotonic() + retry_after
+        handle = self._resume_handles.pop(route, None)
+        if handle is not None:
+            handle.cancel()
+        self._resume_handles[route] = asyncio.get_running_loop().call_later(retry_after, self._release, route)
+
+    async def _next_job(self) -> _Job:
+        """바로 실행할 수 있는 작업을 꺼내고 그 경로의 자리를 잡습니다. 막힌 경로의 작업은 보관합니다."""
+        while True:
+            while not self._heap:
+                self._available.clear()
+                await self._available.wait()
+            job = heapq.heappop(self._heap)
+            if job.future.done():
+                continue
+            if self._route_blocked(job.route, time.monotonic()):
+                self._park(job)
+                continue
+            if job.merge_key is not None and self._merge.get(job.merge_key) is job:
+                del self._merge[job.merge_key]
+            self._route_active[job.route] = self._route_active.get(job.route, 0) + 1
+            return job
+
+    async def _worker(self):
+        while True:
+            job = await self._next_job()
+            try:
+                await self._run(job)
+            finally:
+                active = self._route_active[job.route] - 1
+                if active:
+                    self._route_active[job.route] = active
+                else:
+                    del self._route_active[job.route]
+                if job.route in self._parked and job.route not in self._resume_handles:
+                    self._release(job.route)
+
+    async def _run(self, job: _Job):
+        name = PRIORITY_NAMES.get(job.priority, str(job.priority))
+        waited = time.monotonic() - job.enqueued_at
+        self.started[name] = self.started.get(name, 0) + 1
+        self.wait_total[name] = self.wait_total.get(name, 0.0) + waited
+        self.wait_max[name] = max(self.wait_max.get(name, 0.0), waited)
+        self.route_calls[job.route] = self.route_calls.get(job.route, 0) + 1
+
+        self._active += 1
+        try:
+            result = await job.factory()
+        except discord.RateLimited as e:
+            # 경로를 잠시 멈추고, 작업은 멈춤이 끝날 때까지 보관했다가 같은 우선순위로 다시 넣습니다.
+            self.rate_limited += 1
+            self._pause(job.route, e.retry_after)
+            log.warning("⚠️ 요청 제한(429): %s 경로를 %.1f초 동안 멈춥니다.", job.route, e.retry_after)
+            self._park(job)
+            if job.merge_key is not None:
+                self._merge.setdefault(job.merge_key, job)
+            return
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.cancel()
+            raise
+        except Exception as e:
+            if not job.future.done():
+                job.future.set_exception(e)
+            return
+        finally:
+            self._active -= 1
+
+        self.executed[name] = self.executed.get(name, 0) + 1
+        if not job.future.done():
+            job.future.set_result(result)
+
+    def stats(self) -> dict:
+        """큐 깊이, 우선순위별 대기 시간, 버려지거나 합쳐진 작업 수 등을 반환합니다."""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        parked = [job for jobs in self._parked.values() for job in jobs]
+        for job in self._heap + parked:
+            depth[PRIORITY_NAMES.get(job.priority, str(job.priority))] += 1
+        avg_wait = {
+            name: (self.wait_total[name] / count if count else 0.0)
+            for name, count in self.started.items()
+        }
+        return {
+            "depth": depth,
+            "total_depth": len(self._heap) + len(parked),
+            "parked": len(parked),
+            "executed": dict(self.executed),
+            "avg_wait": avg_wait,
+            "max_wait": dict(self.wait_max),
+            "dropped": self.dropped,
+            "merged": self.merged,
+            "rate_limited": self.rate_limited,
+            "paused_routes": sum(1 for until in self._paused_until.values() if until > time.monotonic()),
+        }
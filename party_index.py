@@ -0,0 +1,83 @@
+import bisect
+
+
+def dungeon_key(dungeon: str) -> str:
+    """던전 이름 비교용 키 (대소문자, 공백 무시)."""
+    return "".join(dungeon.split()).casefold()
+
+
+class PartyIndex:
+    """party_infos를 파티 시간 순, 던전별, 모집자별로 찾을 수 있게 만든 인덱스.
+
+    파티를 만들고/고치고/지울 때마다 같이 갱신하므로, `!파티목록`은 파티 수만큼 훑지 않고
+    시간 범위는 이분 탐색으로, 던전/모집자는 dict 조회로 후보를 고릅니다.
+    """
+
+    def __init__(self):
+        self.by_time = []       # (파티 시각 timestamp, 스레드 ID 문자열) 정렬 목록. 시간이 없으면 맨 뒤.
+        self.by_dungeon = {}    # 던전 키 -> 스레드 ID 문자열 집합
+        self.by_owner = {}      # 모집자 ID -> 스레드 ID 문자열 집합
+        self._entries = {}      # 스레드 ID 문자열 -> (timestamp, 던전 키, 모집자 ID)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def rebuild(self, party_infos: dict):
+        self.by_time, self.by_dungeon, self.by_owner, self._entries = [], {}, {}, {}
+        for thread_id_str, info in party_infos.items():
+            self.add(thread_id_str, info)
+
+    def add(self, thread_id, info: dict):
+        """파티를 넣습니다. 이미 있으면 새 정보로 바꿉니다. (파티 정보 수정 시에도 호출)"""
+        key = str(thread_id)
+        if key in self._entries:
+            self.remove(key)
+        party_time = info.get("party_time")
+        timestamp = party_time.timestamp() if party_time else float("inf")
+        entry = (timestamp, dungeon_key(info["dungeon"]), info["owner_id"])
+        self._entries[key] = entry
+        bisect.insort(self.by_time, (timestamp, key))
+        self.by_dungeon.setdefault(entry[1], set()).add(key)
+        self.by_owner.setdefault(entry[2], set()).add(key)
+
+    def remove(self, thread_id):
+        key = str(thread_id)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        timestamp, dungeon, owner_id = entry
+        position = bisect.bisect_left(self.by_time, (timestamp, key))
+        if position < len(self.by_time) and self.by_time[position] == (timestamp, key):
+            del self.by_time[position]
+        for index, value in ((self.by_dungeon, dungeon), (self.by_owner, owner_id)):
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[value]
+
+    def query(self, dungeon: str = None, owner_id: int = None, start: float = None, end: float = None) -> list:
+        """조건에 맞는 파티의 스레드 ID 문자열을 파티 시간 순으로 반환합니다.
+
+        dungeon은 던전 이름의 일부여도 됩니다. start/end는 timestamp (end는 포함하지 않음).
+        """
+        low = float("-inf") if start is None else start
+        high = float("inf") if end is None else end
+        candidates = None
+        if dungeon is not None:
+            wanted = dungeon_key(dungeon)
+            candidates = set()
+            for key, thread_ids in self.by_dungeon.items():
+                if wanted in key:
+                    candidates |= thread_ids
+        if owner_id is not None:
+            owned = self.by_owner.get(owner_id, set())
+            candidates = owned if candidates is None else candidates & owned
+        if candidates is None:
+            # 시간 조건만 있으면 정렬 목록에서 범위만 잘라 냅니다.
+            first = bisect.bisect_left(self.by_time, (low, ""))
+            last = bisect.bisect_left(self.by_time, (high, "")) if end is not None else len(self.by_time)
+            return [key for _, key in self.by_time[first:last]]
+        entries = self._entries
+        rows = sorted((entries[key][0], key) for key in candidates)
+        return [key for timestamp, key in rows if low <= timestamp and (end is None or timestamp < high)]
@@ -0,0 +1,152 @@
+import heapq
+import asyncio
+import itertools
+from datetime import datetime, timezone
+
+from log import get_logger
+
+log = get_logger("scheduler")
+
+
+class DeadlineScheduler:
+    """여러 종류의 마감 시각(리마인더, 보관, 삭제 등)을 하나의 min-heap으로 관리하는 스케줄러.
+
+    작업 하나가 다음 마감 시각까지 정확히 잠들었다가 깨어나므로, 파티 수와 관계없이
+    대기 중 CPU 사용량이 일정합니다. 같은 (종류, 키)로 다시 예약하면 이전 예약은
+    무효 처리되고(지연 삭제) 새 항목만 heap에 들어가므로 재예약은 O(log n)입니다.
+    """
+
+    def __init__(self, handlers: dict):
+        # handlers: {종류: async def handler(key, when)}
+        self.handlers = handlers
+        self._heap = []
+        self._entries = {}  # (종류, 키) -> heap 항목 [when, seq, kind, key, valid]
+        self._counter = itertools.count()
+        self._stale = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()
+
+        # 통계용 카운터
+        self.fired_count = 0
+        self.max_lateness = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, kind: str, key, when: datetime):
+        """(kind, key) 작업을 when(UTC)에 실행하도록 예약합니다. 이미 있으면 시각만 바꿉니다."""
+        if kind not in self.handlers:
+            raise ValueError(f"알 수 없는 예약 종류입니다: {kind}")
+        self._invalidate(kind, key)
+        entry = [when, next(self._counter), kind, key, True]
+        self._entries[(kind, key)] = entry
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            # 가장 이른 마감 시각이 바뀌었으면 대기 중인 작업을 깨워 다시 계산하게 합니다.
+            self._wakeup.set()
+
+    def cancel(self, kind: str, key):
+        """(kind, key) 예약을 취소합니다. 없으면 아무것도 하지 않습니다."""
+        self._invalidate(kind, key)
+
+    def cancel_all(self, key):
+        """key에 걸린 모든 종류의 예약을 취소합니다."""
+        for kind in self.handlers:
+            self._invalidate(kind, key)
+
+    def get(self, kind: str, key):
+        """예약된 시각을 반환합니다. 없으면 None."""
+        entry = self._entries.get((kind, key))
+        return entry[0] if entry else None
+
+    def _invalidate(self, kind, key):
+        entry = self._entries.pop((kind, key), None)
+        if entry is not None:
+            entry[4] = False
+            self._stale += 1
+            if self._stale > 64 and self._stale > len(self._heap) // 2:
+                self._compact()
+
+    def _compact(self):
+        """무효 처리된 항목이 많아지면 heap을 다시 만들어 메모리를 정리합니다."""
+        self._heap = [entry for entry in self._heap if entry[4]]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def start(self):
+        """스케줄러 작업을 시작합니다. (이벤트 루프 안에서 호출)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self, timeout: float = 0.0):
+        """스케줄러 작업을 멈추고 새 마감 작업을 더 시작하지 않습니다.
+
+        실행 중인 핸들러(스레드 삭제와 파티 기록, 리마인더 전송 등)는 최대 timeout초 기다린 뒤
+        그때까지 끝나지 않은 것만 취소합니다.
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        running = set(self._running)
+        if running and timeout > 0:
+            _, running = await asyncio.wait(running, timeout=timeout)
+        if running:
+            log.warning("⚠️ 끝나지 않은 예약 작업 %d건을 취소합니다.", len(running))
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            while self._heap and not self._heap[0][4]:
+                heapq.heappop(self._heap)
+                self._stale -= 1
+
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = (self._heap[0][0] - datetime.now(timezone.utc)).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            entry = heapq.heappop(self._heap)
+            when, _, kind, key, _ = entry
+            del self._entries[(kind, key)]
+            self.fired_count += 1
+            self.max_lateness = max(self.max_lateness, -delay)
+            # 느린 API 호출이 다른 마감 시각을 늦추지 않도록 핸들러는 별도 작업으로 실행합니다.
+            task = asyncio.get_running_loop().create_task(self._fire(kind, key, when))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fire(self, kind, key, when):
+        try:
+            await self.handlers[kind](key, when)
+        except Exception as e:
+            log.exception("❌ 예약 작업 실행 중 오류 발생 (%s): %s", kind, e, thread_id=key)
+
+    def stats(self) -> dict:
+        """예약/실행 현황을 반환합니다."""
+        counts = {kind: 0 for kind in self.handlers}
+        for kind, _ in self._entries:
+            counts[kind] += 1
+        next_deadline = min((entry[0] for entry in self._entries.values()), default=None)
+        return {
+            "scheduled": counts,
+            "heap_size": len(self._heap),
+            "running": len(self._running),
+            "fired": self.fired_count,
+            "max_lateness": self.max_lateness,
+            "next_deadline": next_deadline.isoformat() if next_deadline else None,
+        }
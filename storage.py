@@ -0,0 +1,665 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from log import get_logger
+
+log = get_logger("storage")
+
+
+# 파티 외에 저장하는 값 (meta_changed로 기록)
+META_KEYS = ("role_message_id", "initial_message_id", "bulk_role_job")
+
+
+def empty_state() -> dict:
+    """비어 있는 초기 상태를 반환합니다."""
+    state = {key: None for key in META_KEYS}
+    state["party_infos"] = {}
+    return state
+
+
+# === 직렬화 도우미 ===
+def _to_timestamp(value):
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+def _to_datetime(value):
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+def serialize_party(info: dict) -> dict:
+    """파티 정보 하나를 저장 가능한 사본으로 변환합니다. (datetime -> timestamp)"""
+    info_copy = info.copy()
+    info_copy["participants"] = dict(info.get("participants", {}))
+    if "reminder_time" in info_copy:
+        info_copy["reminder_time"] = _to_timestamp(info_copy["reminder_time"])
+    if "party_time" in info_copy:
+        info_copy["party_time"] = _to_timestamp(info_copy["party_time"])
+    return info_copy
+
+
+def serialize_state(state: dict) -> dict:
+    """메모리 상태를 JSON으로 저장 가능한 사본으로 변환합니다. (datetime -> timestamp)"""
+    serializable_state = state.copy()
+    serializable_state["party_infos"] = {
+        thread_id: serialize_party(info) for thread_id, info in state.get("party_infos", {}).items()
+    }
+    return serializable_state
+
+
+def deserialize_state(loaded: dict) -> dict:
+    """JSON에서 읽어온 상태를 메모리 상태로 변환합니다. (timestamp -> datetime)"""
+    party_infos = loaded.get("party_infos", {})
+    for info in party_infos.values():
+        if info.get("reminder_time") is not None:
+            info["reminder_time"] = _to_datetime(info["reminder_time"])
+        if info.get("party_time") is not None:
+            info["party_time"] = _to_datetime(info["party_time"])
+
+    state = {key: loaded.get(key) for key in META_KEYS}
+    state["party_infos"] = party_infos
+    return state
+
+
+def atomic_write_text(path: str, text: str):
+    """임시 파일에 쓴 뒤 rename 하여, 중간에 죽어도 파일이 잘린 채로 남지 않게 합니다."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".state-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_json_state(path: str) -> dict:
+    """state.json 파일을 읽어 메모리 상태로 변환합니다. 파일이 없거나 손상되었으면 빈 상태를 반환합니다."""
+    if not os.path.exists(path):
+        log.info("ℹ️ %s 파일이 없습니다. 새로운 상태를 생성합니다.", path)
+        return empty_state()
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            loaded = deserialize_state(json.load(f))
+            log.info("✅ 상태 파일 로드 완료 (%s)", path)
+            return loaded
+        except json.JSONDecodeError:
+            log.error("❌ %s 파일이 손상되었거나 비어 있습니다. 초기화합니다.", path)
+        except Exception as e:
+            log.exception("❌ state 로드 중 알 수 없는 오류 발생: %s. 상태를 초기화합니다.", e)
+    return empty_state()
+
+
+# === 저장소 공통 (지연 저장, write-behind) ===
+class StateStore:
+    """상태 저장소의 공통 동작.
+
+    상태 변경 메서드(`party_created`, `participant_joined` 등)는 변경 내용을 큐에 넣고
+    바로 반환하므로 이벤트 루프를 막지 않습니다. 백그라운드 작업이 `min_interval`초에
+    최대 한 번, 쌓인 변경을 모아서(coalescing) 전용 스레드에서 저장합니다.
+    """
+
+    def __init__(self, get_state, min_interval: float = 2.0):
+        self.get_state = get_state
+        self.min_interval = min_interval
+
+        self._ops = []
+        self._pending = 0
+        self._dirty = asyncio.Event()
+        self._task = None
+        self._write_lock = asyncio.Lock()
+        self._last_flush = 0.0
+        # 쓰기 순서를 보장하기 위해 저장소마다 스레드 하나만 사용합니다.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-writer")
+
+        # 통계용 카운터
+        self.flush_count = 0
+        self.mutation_count = 0
+        self.last_flush_coalesced = 0
+        self.max_flush_coalesced = 0
+        self.last_flush_bytes = 0
+        self.last_flush_duration = 0.0
+        # 저장이 끝날 때마다 on_flush(합쳐진 변경 수, 기록한 크기, 소요 시간)를 호출합니다. (지표 수집용)
+        self.on_flush = None
+
+    # --- 상태 변경 기록 ---
+    def _record(self, op):
+        self._ops.append(op)
+        self._pending += 1
+        self.mutation_count += 1
+        self._dirty.set()
+
+    def mark_dirty(self):
+        """종류를 특정하지 않은 상태 변경을 표시합니다. (전체 저장)"""
+        self._record(("dirty", None, None))
+
+    def party_created(self, thread_id, info: dict):
+        self._record(("party_created", str(thread_id), serialize_party(info)))
+
+    def party_edited(self, thread_id, info: dict):
+        self._record(("party_edited", str(thread_id), serialize_party(info)))
+
+    def participant_joined(self, thread_id, user_id, role_name: str):
+        self._record(("participant_joined", str(thread_id), (str(user_id), role_name)))
+
+    def participant_left(self, thread_id, user_id):
+        self._record(("participant_left", str(thread_id), str(user_id)))
+
+    def reminder_fired(self, thread_id):
+        self._record(("reminder_fired", str(thread_id), None))
+
+    def party_removed(self, thread_id):
+        self._record(("party_removed", str(thread_id), None))
+
+    def meta_changed(self, key: str, value):
+        self._record(("meta_changed", key, value))
+
+    # --- 백그라운드 저장 ---
+    def start(self):
+        """백그라운드 저장 작업을 시작합니다. (이벤트 루프 안에서 호출)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            wait = self.min_interval - (time.monotonic() - self._last_flush)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.exception("❌ 상태 저장 중 오류 발생: %s", e)
+                await asyncio.sleep(self.min_interval)
+
+    def _take_batch(self):
+        """이벤트 루프 스레드에서 저장할 내용을 떼어 냅니다. 이후 쓰기는 다른 스레드에서 해도 안전합니다."""
+        ops, pending = self._ops, self._pending
+        self._ops, self._pending = [], 0
+        self._dirty.clear()
+        return ops, pending, self._prepare(ops)
+
+    def _restore_batch(self, ops, pending):
+        self._ops = ops + self._ops
+        self._pending += pending
+        self._dirty.set()
+
+    def _record_flush(self, pending: int, size: int, started: float):
+        self._last_flush = time.monotonic()
+        self.flush_count += 1
+        self.last_flush_coalesced = pending
+        self.max_flush_coalesced = max(self.max_flush_coalesced, pending)
+        self.last_flush_bytes = size
+        self.last_flush_duration = self._last_flush - started
+        if self.on_flush:
+            self.on_flush(pending, size, self.last_flush_duration)
+
+    async def flush(self):
+        """대기 중인 변경이 있으면 지금 바로 저장합니다."""
+        async with self._write_lock:
+            if self._pending == 0:
+                return
+            started = time.monotonic()
+            ops, pending, batch = self._take_batch()
+            try:
+                size = await asyncio.get_running_loop().run_in_executor(self._executor, self._write, batch)
+            except BaseException:
+                # 저장에 실패했거나 취소되었으면 다음 기회에 다시 저장되도록 되돌립니다.
+                self._restore_batch(ops, pending)
+                raise
+            self._record_flush(pending, size, started)
+
+    async def close(self, flush: bool = True):
+        """백그라운드 작업을 멈추고 남은 변경을 마지막으로 저장합니다.
+
+        flush=False면 남은 변경을 버립니다. (리더 자격을 잃어 더 이상 쓰면 안 될 때)
+        """
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+        if flush:
+            await self.flush()
+        else:
+            self._ops, self._pending = [], 0
+            self._dirty.clear()
+
+    def flush_sync(self):
+        """이벤트 루프가 끝난 뒤(종료 시) 남은 변경을 동기적으로 저장합니다."""
+        if self._pending == 0:
+            return
+        started = time.monotonic()
+        ops, pending, batch = self._take_batch()
+        try:
+            size = self._executor.submit(self._write, batch).result()
+        except BaseException:
+            self._restore_batch(ops, pending)
+            raise
+        self._record_flush(pending, size, started)
+
+    def stats(self) -> dict:
+        """저장 횟수와 한 번의 저장에 합쳐진 변경 수 등 통계를 반환합니다."""
+        return {
+            "backend": self.backend,
+            "pending": self._pending,
+            "mutations": self.mutation_count,
+            "flushes": self.flush_count,
+            "last_flush_coalesced": self.last_flush_coalesced,
+            "max_flush_coalesced": self.max_flush_coalesced,
+            "avg_flush_coalesced": (self.mutation_count - self._pending) / self.flush_count if self.flush_count else 0.0,
+            "last_flush_bytes": self.last_flush_bytes,
+            "last_flush_duration": self.last_flush_duration,
+        }
+
+    # --- 백엔드별 구현 ---
+    backend = "base"
+
+    def load(self) -> dict:
+        raise NotImplementedError
+
+    def _prepare(self, ops):
+        """이벤트 루프 스레드에서 호출됩니다. 쓰기 스레드로 넘길 데이터를 만듭니다."""
+        return ops
+
+    def _write(self, batch) -> int:
+        """쓰기 스레드에서 호출됩니다. 기록한 바이트 수(또는 대략적인 크기)를 반환합니다."""
+        raise NotImplementedError
+
+
+class JsonStateStore(StateStore):
+    """전체 상태를 하나의 JSON 파일(state.json)로 저장하는 저장소."""
+
+    backend = "json"
+
+    def __init__(self, path: str, get_state, min_interval: float = 2.0):
+        super().__init__(get_state, min_interval)
+        self.path = path
+
+    def load(self) -> dict:
+        return read_json_state(self.path)
+
+    def _prepare(self, ops):
+        # 어떤 변경이든 전체 상태를 다시 써야 하므로 스냅샷 하나만 만듭니다.
+        return serialize_state(self.get_state())
+
+    def _write(self, snapshot) -> int:
+        text = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"))
+        atomic_write_text(self.path, text)
+        return len(text.encode("utf-8"))
+
+
+# === SQLite 저장소 ===
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS parties (
+    thread_id     INTEGER PRIMARY KEY,
+    dungeon       TEXT,
+    date          TEXT,
+    time          TEXT,
+    reminder_time REAL,
+    party_time    REAL,
+    embed_msg_id  INTEGER,
+    owner_id      INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_parties_owner ON parties(owner_id);
+CREATE INDEX IF NOT EXISTS idx_parties_party_time ON parties(party_time);
+CREATE TABLE IF NOT EXISTS participants (
+    thread_id INTEGER NOT NULL REFERENCES parties(thread_id) ON DELETE CASCADE,
+    user_id   INTEGER NOT NULL,
+    role      TEXT NOT NULL,
+    PRIMARY KEY (thread_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_participants_user ON participants(user_id);
+"""
+
+PARTY_COLUMNS = ("dungeon", "date", "time", "reminder_time", "party_time", "embed_msg_id", "owner_id")
+
+
+def _params_size(params) -> int:
+    """SQL에 넘기는 값들의 크기 (문자열은 UTF-8 바이트 수, 숫자는 8바이트). 저장 크기 지표용."""
+    return sum(len(value.encode("utf-8")) if isinstance(value, str) else 8 for value in params if value is not None)
+
+
+class SqliteStateStore(StateStore):
+    """파티/참여자/메시지 ID를 정규화된 행으로 저장하는 SQLite(WAL) 저장소.
+
+    참여자 한 명이 바뀌면 해당 행 하나만 갱신되므로, 파티 수와 관계없이 저장 비용이 일정합니다.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, get_state, min_interval: float = 2.0, import_json_path: str = None):
+        super().__init__(get_state, min_interval)
+        self.path = path
+        self.import_json_path = import_json_path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    # --- 읽기 ---
+    def _get_meta(self, key: str):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _party_from_row(self, row) -> dict:
+        info = dict(zip(PARTY_COLUMNS, row[1:]))
+        info["reminder_time"] = _to_datetime(info["reminder_time"])
+        info["party_time"] = _to_datetime(info["party_time"])
+        info["participants"] = {}
+        return info
+
+    def load(self) -> dict:
+        if self.import_json_path and not self._get_meta("json_imported"):
+            self.import_json(self.import_json_path)
+
+        loaded = empty_state()
+        for key in META_KEYS:
+            loaded[key] = self._get_meta(key)
+
+        party_infos = {}
+        for row in self.conn.execute(f"SELECT thread_id, {', '.join(PARTY_COLUMNS)} FROM parties"):
+            party_infos[str(row[0])] = self._party_from_row(row)
+        # rowid 순서 = 처음 참여한 순서. 역할만 바꾼 경우에도 순서가 유지됩니다.
+        for thread_id, user_id, role in self.conn.execute(
+            "SELECT thread_id, user_id, role FROM participants ORDER BY rowid"
+        ):
+            info = party_infos.get(str(thread_id))
+            if info is not None:
+                info["participants"][str(user_id)] = role
+        loaded["party_infos"] = party_infos
+        log.info("✅ SQLite 상태 로드 완료 (파티 %d개)", len(party_infos))
+        return loaded
+
+    def parties_by_owner(self, owner_id: int) -> list:
+        """모집자 ID로 파티 스레드 ID 목록을 조회합니다. (owner 인덱스 사용)"""
+        rows = self.conn.execute("SELECT thread_id FROM parties WHERE owner_id = ?", (owner_id,))
+        return [str(row[0]) for row in rows]
+
+    def parties_between(self, start: datetime, end: datetime) -> list:
+        """파티 시간이 [start, end) 구간에 있는 파티 스레드 ID 목록을 시간순으로 조회합니다."""
+        rows = self.conn.execute(
+            "SELECT thread_id FROM parties WHERE party_time >= ? AND party_time < ? ORDER BY party_time",
+            (start.timestamp(), end.timestamp()),
+        )
+        return [str(row[0]) for row in rows]
+
+    def parties_joined_by(self, user_id: int) -> list:
+        """사용자가 참여 중인 파티 스레드 ID 목록을 조회합니다. (participants.user_id 인덱스 사용)"""
+        rows = self.conn.execute("SELECT thread_id FROM participants WHERE user_id = ?", (user_id,))
+        return [str(row[0]) for row in rows]
+
+    # --- 쓰기 ---
+    # 쓰기 함수들은 넘긴 값의 크기(_params_size)를 반환하고, _write가 합쳐 저장 크기로 보고합니다.
+    def _execute(self, cur, sql: str, params=()) -> int:
+        cur.execute(sql, params)
+        return _params_size(params)
+
+    def _upsert_party(self, cur, thread_id: str, info: dict) -> int:
+        values = [info.get(column) for column in PARTY_COLUMNS]
+        return self._execute(
+            cur,
+            f"INSERT INTO parties (thread_id, {', '.join(PARTY_COLUMNS)}) VALUES (?, {', '.join('?' * len(PARTY_COLUMNS))}) "
+            f"ON CONFLICT(thread_id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in PARTY_COLUMNS)}",
+            (int(thread_id), *values),
+        )
+
+    def _set_participant(self, cur, thread_id: str, user_id: str, role_name: str) -> int:
+        return self._execute(
+            cur,
+            "INSERT INTO participants (thread_id, user_id, role) VALUES (?, ?, ?) "
+            "ON CONFLICT(thread_id, user_id) DO UPDATE SET role = excluded.role",
+            (int(thread_id), int(user_id), role_name),
+        )
+
+    def _replace_participants(self, cur, thread_id: str, participants: dict) -> int:
+        size = self._execute(cur, "DELETE FROM participants WHERE thread_id = ?", (int(thread_id),))
+        for user_id, role_name in participants.items():
+            size += self._set_participant(cur, thread_id, user_id, role_name)
+        return size
+
+    def _set_meta(self, cur, key: str, value) -> int:
+        return self._execute(
+            cur,
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value)),
+        )
+
+    def _prepare(self, ops):
+        if any(kind == "dirty" for kind, _, _ in ops):
+            # 종류를 알 수 없는 변경이 섞여 있으면 전체 상태를 다시 맞춥니다.
+            return [("full", None, serialize_state(self.get_state()))]
+        return ops
+
+    def _write(self, ops) -> int:
+        cur = self.conn.cursor()
+        size = 0
+        cur.execute("BEGIN")
+        try:
+            for kind, key, payload in ops:
+                if kind == "full":
+                    size += self._write_full(cur, payload)
+                elif kind in ("party_created", "party_edited"):
+                    size += self._upsert_party(cur, key, payload)
+                    if kind == "party_created":
+                        size += self._replace_participants(cur, key, payload["participants"])
+                elif kind == "participant_joined":
+                    size += self._set_participant(cur, key, *payload)
+                elif kind == "participant_left":
+                    size += self._execute(cur, "DELETE FROM participants WHERE thread_id = ? AND user_id = ?", (int(key), int(payload)))
+                elif kind == "reminder_fired":
+                    size += self._execute(cur, "UPDATE parties SET reminder_time = NULL WHERE thread_id = ?", (int(key),))
+                elif kind == "party_removed":
+                    size += self._execute(cur, "DELETE FROM parties WHERE thread_id = ?", (int(key),))
+                elif kind == "meta_changed":
+                    size += self._set_meta(cur, key, payload)
+            cur.execute("COMMIT")
+        except BaseException:
+            cur.execute("ROLLBACK")
+            raise
+        return size
+
+    def _write_full(self, cur, snapshot: dict) -> int:
+        size = 0
+        for key in META_KEYS:
+            size += self._set_meta(cur, key, snapshot.get(key))
+        # 남길 파티 ID를 임시 테이블에 넣고 나머지를 지웁니다.
+        # (파티마다 바인딩 값을 하나씩 쓰는 NOT IN (?, ...)은 SQLITE_MAX_VARIABLE_NUMBER를 넘을 수 있음)
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS keep_threads (thread_id INTEGER PRIMARY KEY)")
+        cur.execute("DELETE FROM keep_threads")
+        cur.executemany("INSERT INTO keep_threads (thread_id) VALUES (?)", ((int(thread_id),) for thread_id in snapshot["party_infos"]))
+        cur.execute("DELETE FROM parties WHERE thread_id NOT IN (SELECT thread_id FROM keep_threads)")
+        cur.execute("DELETE FROM keep_threads")
+        for thread_id, info in snapshot["party_infos"].items():
+            size += self._upsert_party(cur, thread_id, info)
+            size += self._replace_participants(cur, thread_id, info.get("participants", {}))
+        return size
+
+    def import_json(self, json_path: str):
+        """기존 state.json의 내용을 한 번만 가져옵니다. 이미 가져왔으면 아무것도 하지 않습니다."""
+        if self._get_meta("json_imported"):
+            return
+        cur = self.conn.cursor()
+        if os.path.exists(json_path):
+            snapshot = serialize_state(read_json_state(json_path))
+            cur.execute("BEGIN")
+            try:
+                self._write_full(cur, snapshot)
+                cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)", (json.dumps(time.time()),))
+                cur.execute("COMMIT")
+            except BaseException:
+                cur.execute("ROLLBACK")
+                raise
+            log.info("✅ %s → %s 가져오기 완료 (파티 %d개)", json_path, self.path, len(snapshot["party_infos"]))
+        else:
+            cur.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)", (json.dumps(time.time()),))
+
+
+# === 변경 기록(journal) 저장소 ===
+def apply_op(state: dict, op):
+    """저장된 변경 하나를 메모리 상태에 다시 적용합니다. (journal 재생용)"""
+    kind, key, payload = op
+    party_infos = state["party_infos"]
+    if kind in ("party_created", "party_edited"):
+        info = dict(payload)
+        info["reminder_time"] = _to_datetime(info.get("reminder_time"))
+        info["party_time"] = _to_datetime(info.get("party_time"))
+        existing = party_infos.get(key)
+        if kind == "party_edited" and existing is not None:
+            info["participants"] = existing.get("participants", {})
+        else:
+            info["participants"] = dict(info.get("participants", {}))
+        party_infos[key] = info
+    elif kind == "participant_joined":
+        if key in party_infos:
+            user_id, role_name = payload
+            party_infos[key].setdefault("participants", {})[user_id] = role_name
+    elif kind == "participant_left":
+        if key in party_infos:
+            party_infos[key].get("participants", {}).pop(payload, None)
+    elif kind == "reminder_fired":
+        if key in party_infos:
+            party_infos[key]["reminder_time"] = None
+    elif kind == "party_removed":
+        party_infos.pop(key, None)
+    elif kind == "meta_changed":
+        state[key] = payload
+
+
+class JournalStateStore(StateStore):
+    """모든 상태 변경을 한 줄씩 journal 파일에 덧붙이고, N개마다 스냅샷을 남기는 저장소.
+
+    참여 한 번은 한 줄 추가로 끝나며, 로드 시에는 스냅샷 + 그 이후의 journal을 재생합니다.
+    쓰다가 죽어서 마지막 줄이 잘렸다면 그 한 줄만 버리고 나머지는 복구합니다.
+    """
+
+    backend = "journal"
+
+    def __init__(self, journal_path: str, snapshot_path: str, get_state, min_interval: float = 0.1,
+                 snapshot_every: int = 500, import_json_path: str = None):
+        super().__init__(get_state, min_interval)
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.snapshot_every = snapshot_every
+        self.import_json_path = import_json_path
+        self._seq = 0
+        self._entries_since_snapshot = 0
+        self.snapshot_count = 0
+
+    def load(self) -> dict:
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot.pop("journal_seq", 0)
+            loaded = deserialize_state(snapshot)
+        elif self.import_json_path and os.path.exists(self.import_json_path):
+            # 처음 journal 저장소로 바꿀 때는 기존 state.json에서 시작합니다.
+            loaded = read_json_state(self.import_json_path)
+        else:
+            loaded = empty_state()
+
+        self._seq = snapshot_seq
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            valid_size = 0
+            with open(self.journal_path, "rb") as f:
+                for raw_line in f:
+                    try:
+                        if not raw_line.endswith(b"\n"):
+                            raise ValueError("잘린 줄")
+                        entry = json.loads(raw_line)
+                    except ValueError:
+                        log.warning("⚠️ %s의 마지막 기록이 손상되어 버립니다.", self.journal_path)
+                        break
+                    valid_size += len(raw_line)
+                    if entry["s"] <= snapshot_seq:
+                        continue
+                    apply_op(loaded, (entry["op"], entry["k"], entry["d"]))
+                    self._seq = entry["s"]
+                    replayed += 1
+            if valid_size < os.path.getsize(self.journal_path):
+                # 손상된 꼬리를 잘라 내야 이후 추가되는 기록이 정상적으로 이어집니다.
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(valid_size)
+
+        self._entries_since_snapshot = replayed
+        log.info("✅ journal 상태 로드 완료 (파티 %d개, 재생한 기록 %d개)", len(loaded["party_infos"]), replayed)
+        return loaded
+
+    def _prepare(self, ops):
+        entries = []
+        needs_snapshot = False
+        for kind, key, payload in ops:
+            if kind == "dirty":
+                # 종류를 알 수 없는 변경은 재생할 수 없으므로 스냅샷으로 남깁니다.
+                needs_snapshot = True
+                continue
+            self._seq += 1
+            entries.append(json.dumps({"s": self._seq, "op": kind, "k": key, "d": payload},
+                                      ensure_ascii=False, separators=(",", ":")))
+        self._entries_since_snapshot += len(entries)
+        snapshot = None
+        if needs_snapshot or self._entries_since_snapshot >= self.snapshot_every:
+            # 이벤트 루프 스레드에서 만든 스냅샷이므로 위 기록이 모두 반영된 상태입니다.
+            snapshot = serialize_state(self.get_state())
+            snapshot["journal_seq"] = self._seq
+            self._entries_since_snapshot = 0
+        return entries, snapshot
+
+    def _write(self, batch) -> int:
+        entries, snapshot = batch
+        size = 0
+        if entries:
+            data = ("\n".join(entries) + "\n").encode("utf-8")
+            with open(self.journal_path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            size += len(data)
+        if snapshot is not None:
+            text = json.dumps(snapshot, ensure_ascii=False, separators=(",", ":"))
+            atomic_write_text(self.snapshot_path, text)
+            # 스냅샷에 journal_seq가 기록되어 있으므로, 여기서 죽더라도 재생 시 중복 적용되지 않습니다.
+            open(self.journal_path, "wb").close()
+            self.snapshot_count += 1
+            size += len(text.encode("utf-8"))
+        return size
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["journal_seq"] = self._seq
+        stats["entries_since_snapshot"] = self._entries_since_snapshot
+        stats["snapshots"] = self.snapshot_count
+        return stats
+
+
+def create_store(backend: str, get_state, *, json_path: str, db_path: str, journal_path: str, snapshot_path: str,
+                 min_interval: float = 2.0, journal_interval: float = 0.1, snapshot_every: int = 500) -> StateStore:
+    """설정된 백엔드 이름("json", "sqlite", "journal")에 맞는 상태 저장소를 만듭니다."""
+    if backend == "sqlite":
+        return SqliteStateStore(db_path, get_state, min_interval, import_json_path=json_path)
+    if backend == "journal":
+        return JournalStateStore(journal_path, snapshot_path, get_state, journal_interval,
+                                 snapshot_every=snapshot_every, import_json_path=json_path)
+    if backend == "json":
+        return JsonStateStore(json_path, get_state, min_interval)
+    raise ValueError(f"알 수 없는 상태 저장소 백엔드입니다: {backend}")
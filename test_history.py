@@ -0,0 +1,103 @@
+import os
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from history import PartyHistory
+
+KST = timezone(timedelta(hours=9))
+
+
+def make_party(dungeon: str, owner_id: int, participants: dict) -> dict:
+    return {
+        "dungeon": dungeon, "date": "7/10", "time": "21:00", "owner_id": owner_id, "participants": participants,
+        "party_time": datetime(2025, 7, 10, 21, tzinfo=KST),  # 목요일 21시 (KST)
+    }
+
+
+class PartyHistoryTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        base = os.path.join(tempfile.mkdtemp(), "1")
+        self.paths = {"records_path": f"{base}.history.jsonl", "stats_path": f"{base}.history_stats.json"}
+
+    def open_history(self) -> PartyHistory:
+        history = PartyHistory(**self.paths, tz=KST)
+        history.load()
+        return history
+
+    async def record_some(self, history: PartyHistory):
+        await history.record(1, make_party("브리레흐1-3관", 7, {"100": "세인트바드", "101": "다크메이지"}))
+        await history.record(2, make_party("브리레흐1-3관", 8, {"100": "세인트바드"}))
+        await history.record(3, make_party("글렌베르나", 7, {}))
+
+    async def test_record_updates_stats(self):
+        history = self.open_history()
+        await self.record_some(history)
+        self.assertEqual(history.aggregates["parties"], 3)
+        self.assertEqual(history.top("dungeons"), [("브리레흐1-3관", 2), ("글렌베르나", 1)])
+        self.assertEqual(history.top("owners", limit=1), [("7", 2)])
+        self.assertEqual(history.top("arcana"), [("세인트바드", 2), ("다크메이지", 1)])
+        self.assertEqual(history.aggregates["hours"], {"21": 3})
+        self.assertEqual(history.aggregates["weekdays"], {"3": 3})
+        self.assertEqual(history.average_size(), 1.0)
+        self.assertEqual(history.aggregates["offset"], os.path.getsize(self.paths["records_path"]))
+
+    async def test_load_reads_saved_stats(self):
+        await self.record_some(self.open_history())
+        self.assertEqual(self.open_history().aggregates["parties"], 3)
+
+    async def test_load_replays_records_missing_from_stats(self):
+        """기록 줄을 추가한 뒤 통계 파일을 쓰기 전에 죽었으면, 다음 시작 때 빠진 기록만 다시 반영합니다."""
+        history = self.open_history()
+        await history.record(1, make_party("브리레흐1-3관", 7, {"100": "세인트바드"}))
+        with open(self.paths["stats_path"], encoding="utf-8") as f:
+            stale_stats = f.read()
+        await history.record(2, make_party("글렌베르나", 8, {}))
+        with open(self.paths["stats_path"], "w", encoding="utf-8") as f:
+            f.write(stale_stats)
+
+        reloaded = self.open_history()
+        self.assertEqual(reloaded.aggregates, history.aggregates)
+
+    async def test_load_truncates_torn_last_record(self):
+        history = self.open_history()
+        await self.record_some(history)
+        intact_size = os.path.getsize(self.paths["records_path"])
+        os.remove(self.paths["stats_path"])
+        with open(self.paths["records_path"], "ab") as f:
+            f.write(b'{"thread_id": "4", "dungeon": "')
+
+        reloaded = self.open_history()
+        self.assertEqual(reloaded.aggregates["parties"], 3)
+        self.assertEqual(os.path.getsize(self.paths["records_path"]), intact_size)
+
+        # 잘라 낸 자리에 이어 쓴 기록은 다음 로드에서도 읽힙니다.
+        await reloaded.record(4, make_party("글렌베르나", 9, {}))
+        os.remove(self.paths["stats_path"])
+        self.assertEqual(self.open_history().aggregates["parties"], 4)
+
+    async def test_load_recounts_when_records_shrink(self):
+        history = self.open_history()
+        await self.record_some(history)
+        with open(self.paths["records_path"], "rb") as f:
+            first_line = f.readline()
+        with open(self.paths["records_path"], "wb") as f:
+            f.write(first_line)
+
+        reloaded = self.open_history()
+        self.assertEqual(reloaded.aggregates["parties"], 1)
+        self.assertEqual(reloaded.aggregates["dungeons"], {"브리레흐1-3관": 1})
+
+    async def test_unreadable_stats_are_rebuilt_from_records(self):
+        await self.record_some(self.open_history())
+        with open(self.paths["stats_path"], "w", encoding="utf-8") as f:
+            f.write("{not json")
+        reloaded = self.open_history()
+        self.assertEqual(reloaded.aggregates["parties"], 3)
+        with open(self.paths["stats_path"], encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["parties"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+from join_queue import JoinQueue
+
+
+def make_member(user_id: int):
+    return SimpleNamespace(id=user_id, guild=SimpleNamespace(id=1))
+
+
+class JoinQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.assigned = []
+        self.welcomes = []
+        self.spike_events = []
+
+        async def assign(member, spike):
+            self.assigned.append((member.id, spike))
+
+        async def welcome(members, spike):
+            self.welcomes.append(([member.id for member in members], spike))
+
+        self.queue = JoinQueue(
+            assign, welcome, lambda active, rate: self.spike_events.append(active),
+            concurrency=2, batch_size=3, batch_window=0.05, spike_batch_window=0.2,
+            spike_threshold=5, spike_window=0.3, spike_cooldown=0.2,
+        )
+        self.queue.check_interval = 0.05
+        self.queue.start()
+
+    async def asyncTearDown(self):
+        await self.queue.close()
+
+    async def test_assigns_and_batches_welcomes(self):
+        for user_id in range(4):
+            self.queue.submit(make_member(user_id))
+        self.assertTrue(await self.queue.drain(1.0))
+        await asyncio.sleep(0.1)
+        self.assertEqual(sorted(user_id for user_id, _ in self.assigned), [0, 1, 2, 3])
+        self.assertEqual(self.welcomes, [([0, 1, 2], False), ([3], False)])
+        self.assertFalse(self.queue.spike)
+
+    async def test_spike_mode_sends_one_welcome_per_window(self):
+        for user_id in range(8):
+            self.queue.submit(make_member(user_id))
+        self.assertTrue(self.queue.spike)
+        self.assertEqual(self.spike_events, [True])
+        await asyncio.sleep(0.3)
+        self.assertEqual(self.welcomes, [(list(range(8)), True)])
+        self.assertTrue(any(spike for _, spike in self.assigned))
+
+    async def test_spike_mode_ends_after_joins_stop(self):
+        """입장이 끊겨도 쿨다운이 지나면 일반 모드로 돌아옵니다."""
+        for user_id in range(5):
+            self.queue.submit(make_member(user_id))
+        self.assertTrue(self.queue.spike)
+        await asyncio.sleep(0.3 + 0.2 + 0.3)  # 입장 기록이 창에서 빠지고 쿨다운이 지날 때까지
+        self.assertFalse(self.queue.spike)
+        self.assertEqual(self.spike_events, [True, False])
+        self.assertEqual(self.queue.stats()["spikes"], 1)
+
+    async def test_stats_do_not_change_spike_mode(self):
+        for user_id in range(5):
+            self.queue.submit(make_member(user_id))
+        self.queue._tasks[-1].cancel()  # 주기 확인(join-spike-watch)을 멈추고 stats()만 부릅니다.
+        await asyncio.sleep(0.7)
+        stats = self.queue.stats()
+        self.assertTrue(stats["spike"])
+        self.assertEqual(stats["rate"], 0)
+        self.assertEqual(self.spike_events, [True])
+
+    async def test_failed_assign_is_counted(self):
+        async def failing(member, spike):
+            raise RuntimeError("권한 없음")
+
+        self.queue.assign = failing
+        self.queue.submit(make_member(1))
+        self.assertTrue(await self.queue.drain(1.0))
+        self.assertEqual(self.queue.stats()["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
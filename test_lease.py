@@ -0,0 +1,74 @@
+import os
+import time
+import sqlite3
+import asyncio
+import tempfile
+import unittest
+
+from lease import LeaderLease
+
+
+class LeaderLeaseTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "leader.db")
+
+    def make_lease(self, holder: str) -> LeaderLease:
+        return LeaderLease(self.path, holder=holder, ttl=0.6, heartbeat=0.2)
+
+    async def test_standby_takes_over_after_release(self):
+        leader, standby = self.make_lease("a"), self.make_lease("b")
+        await leader.acquire()
+        self.assertFalse(await asyncio.to_thread(standby._try_acquire))
+        await leader.release()
+        await asyncio.wait_for(standby.acquire(), timeout=1.0)
+        self.assertTrue(standby.is_leader)
+        await standby.release()
+
+    async def test_steps_down_when_renew_keeps_failing(self):
+        """임대 파일에 계속 닿지 못하면 ttl 안에 스스로 내려옵니다. (대기 프로세스와 둘 다 리더가 되지 않도록)"""
+        lease = self.make_lease("a")
+        await lease.acquire()
+        lost = asyncio.Event()
+
+        async def on_lost():
+            lost.set()
+
+        def locked():
+            raise sqlite3.OperationalError("database is locked")
+
+        lease.on_lost = on_lost
+        lease._renew = locked
+        started = time.monotonic()
+        lease.start()
+        await asyncio.wait_for(lost.wait(), timeout=2.0)
+        self.assertFalse(lease.is_leader)
+        self.assertLess(time.monotonic() - started, lease.ttl + lease.heartbeat + 0.2)
+        await lease.release()
+
+    async def test_steps_down_when_renew_hangs(self):
+        lease = self.make_lease("a")
+        await lease.acquire()
+        lost = asyncio.Event()
+
+        async def on_lost():
+            lost.set()
+
+        lease.on_lost = on_lost
+        lease._renew = lambda: time.sleep(2.0) or True
+        lease.start()
+        await asyncio.wait_for(lost.wait(), timeout=1.5)
+        self.assertFalse(lease.is_leader)
+        await lease.release()
+
+    async def test_keeps_leadership_while_renewing(self):
+        lease = self.make_lease("a")
+        await lease.acquire()
+        lease.start()
+        await asyncio.sleep(1.0)
+        self.assertTrue(lease.is_leader)
+        self.assertGreater(lease.renew_count, 2)
+        await lease.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import time
+import asyncio
+import unittest
+
+import discord
+
+from outbound import OutboundDispatcher, PRIORITY_BULK, PRIORITY_REMINDER, PRIORITY_ROLE
+
+
+class OutboundDispatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.dispatcher = OutboundDispatcher(workers=4, route_concurrency=1)
+        self.dispatcher.start()
+
+    async def asyncTearDown(self):
+        await self.dispatcher.close()
+
+    async def test_paused_route_does_not_delay_other_routes(self):
+        """429로 멈춘 경로의 작업이 쌓여 있어도 다른 경로의 작업은 바로 실행됩니다."""
+        limited = {"first": True}
+
+        async def role_edit():
+            if limited["first"]:
+                limited["first"] = False
+                raise discord.RateLimited(1.0)
+            return "role"
+
+        roles = [self.dispatcher.submit(PRIORITY_BULK, "guild:1:roles", role_edit) for _ in range(8)]
+        await asyncio.sleep(0.05)  # 첫 작업이 429를 받아 경로가 멈출 때까지
+
+        started = time.monotonic()
+        result = await asyncio.wait_for(
+            self.dispatcher.call(PRIORITY_REMINDER, "channel:2", lambda: asyncio.sleep(0, "reminder")), timeout=0.5)
+        self.assertEqual(result, "reminder")
+        self.assertLess(time.monotonic() - started, 0.2)
+        self.assertFalse(any(future.done() for future in roles))
+
+        # 멈춤이 끝나면 보관했던 작업이 모두 실행됩니다.
+        self.assertEqual(await asyncio.wait_for(asyncio.gather(*roles), timeout=3.0), ["role"] * 8)
+        self.assertEqual(self.dispatcher.stats()["rate_limited"], 1)
+
+    async def test_saturated_route_does_not_hold_workers(self):
+        """동시 호출 한도가 찬 경로의 작업은 작업자를 붙잡지 않습니다."""
+        gate = asyncio.Event()
+        running = []
+
+        async def slow_edit():
+            running.append(1)
+            await gate.wait()
+
+        roles = [self.dispatcher.submit(PRIORITY_ROLE, "guild:1:roles", slow_edit) for _ in range(6)]
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(running), 1)
+
+        result = await asyncio.wait_for(
+            self.dispatcher.call(PRIORITY_BULK, "channel:3", lambda: asyncio.sleep(0, "log")), timeout=0.5)
+        self.assertEqual(result, "log")
+
+        gate.set()
+        await asyncio.wait_for(asyncio.gather(*roles), timeout=1.0)
+        self.assertEqual(len(running), 6)
+        self.assertTrue(await self.dispatcher.drain(1.0))
+
+    async def test_short_ratelimit_is_waited_inside_the_call(self):
+        """max_ratelimit_timeout보다 짧은 429는 discord.py가 요청 안에서 기다립니다.
+        경로는 멈추지 않고, 묶이는 것은 그 작업자 하나와 같은 경로의 다음 작업뿐입니다."""
+        async def role_edit():
+            await asyncio.sleep(0.3)  # HTTPClient.request가 짧은 retry_after를 기다렸다가 다시 보내는 동안
+            return "role"
+
+        roles = [self.dispatcher.submit(PRIORITY_ROLE, "guild:1:roles", role_edit) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        started = time.monotonic()
+        result = await asyncio.wait_for(
+            self.dispatcher.call(PRIORITY_REMINDER, "channel:2", lambda: asyncio.sleep(0, "reminder")), timeout=0.5)
+        self.assertEqual(result, "reminder")
+        self.assertLess(time.monotonic() - started, 0.2)
+
+        self.assertEqual(await asyncio.wait_for(asyncio.gather(*roles), timeout=2.0), ["role"] * 2)
+        stats = self.dispatcher.stats()
+        self.assertEqual(stats["rate_limited"], 0)
+        self.assertEqual(stats["parked"], 0)
+
+    async def test_close_drops_parked_jobs(self):
+        async def limited():
+            raise discord.RateLimited(30.0)
+
+        future = self.dispatcher.submit(PRIORITY_ROLE, "guild:1:roles", limited)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.dispatcher.stats()["parked"], 1)
+        await self.dispatcher.close()
+        with self.assertRaises(Exception):
+            await future
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from party_index import PartyIndex, dungeon_key
+
+BASE = datetime(2025, 7, 10, 12, tzinfo=timezone.utc)
+
+
+def make_party(dungeon: str, owner_id: int, hours) -> dict:
+    return {"dungeon": dungeon, "owner_id": owner_id, "party_time": None if hours is None else BASE + timedelta(hours=hours)}
+
+
+def at(hours: float) -> float:
+    return (BASE + timedelta(hours=hours)).timestamp()
+
+
+class PartyIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = PartyIndex()
+        self.index.rebuild({
+            "1": make_party("브리레흐 1-3관", 7, 3),
+            "2": make_party("브리레흐1-3관", 8, 1),
+            "3": make_party("글렌 베르나", 7, 2),
+            "4": make_party("글렌베르나", 9, None),  # 시간 정보가 없는 파티
+        })
+
+    def test_dungeon_key_ignores_case_and_spaces(self):
+        self.assertEqual(dungeon_key(" Glenn  Bearna "), dungeon_key("glennbearna"))
+
+    def test_query_all_in_time_order(self):
+        self.assertEqual(self.index.query(), ["2", "3", "1", "4"])
+
+    def test_time_range_excludes_end(self):
+        self.assertEqual(self.index.query(start=at(1), end=at(3)), ["2", "3"])
+        self.assertEqual(self.index.query(start=at(2)), ["3", "1", "4"])
+        self.assertEqual(self.index.query(end=at(2)), ["2"])
+        self.assertEqual(self.index.query(start=at(4), end=at(5)), [])
+
+    def test_dungeon_matches_part_of_the_name(self):
+        self.assertEqual(self.index.query(dungeon="브리레흐1-3"), ["2", "1"])
+        self.assertEqual(self.index.query(dungeon="베르나", end=at(10)), ["3"])
+        self.assertEqual(self.index.query(dungeon="없는 던전"), [])
+
+    def test_owner_combined_with_other_conditions(self):
+        self.assertEqual(self.index.query(owner_id=7), ["3", "1"])
+        self.assertEqual(self.index.query(owner_id=7, dungeon="브리레흐"), ["1"])
+        self.assertEqual(self.index.query(owner_id=7, start=at(2.5), end=at(10)), ["1"])
+        self.assertEqual(self.index.query(owner_id=1), [])
+
+    def test_edit_and_remove_keep_index_consistent(self):
+        self.index.add("2", make_party("글렌베르나", 9, 5))  # 파티 정보 수정
+        self.assertEqual(self.index.query(dungeon="브리레흐"), ["1"])
+        self.assertEqual(self.index.query(owner_id=9, end=at(10)), ["2"])
+        self.index.remove("1")
+        self.index.remove("1")  # 없는 파티는 무시합니다.
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.query(), ["3", "2", "4"])
+        self.assertNotIn(dungeon_key("브리레흐1-3관"), self.index.by_dungeon)
+        self.assertNotIn(8, self.index.by_owner)
+
+
+class ParseDateRangeTest(unittest.TestCase):
+    """`!파티목록 날짜:` 해석. 오늘 날짜를 고정하고 확인합니다."""
+
+    @classmethod
+    def setUpClass(cls):
+        from core import KST
+        from extensions import party
+        cls.KST, cls.party = KST, party
+
+    def parse(self, text: str, today: tuple) -> tuple:
+        frozen = self.KST.localize(datetime(*today, 15, 30))
+
+        class FrozenDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return frozen.astimezone(tz)
+
+        with mock.patch.object(self.party, "datetime", FrozenDatetime):
+            start, end = self.party.parse_date_range(text)
+        return datetime.fromtimestamp(start, self.KST).date(), datetime.fromtimestamp(end, self.KST).date()
+
+    def test_single_day_and_range(self):
+        day = datetime(2025, 7, 20).date()
+        self.assertEqual(self.parse("7/20", (2025, 7, 15)), (day, day + timedelta(days=1)))
+        self.assertEqual(self.parse(" 7/20 ~ 7/22 ", (2025, 7, 15)), (day, datetime(2025, 7, 23).date()))
+
+    def test_today_stays_in_this_year(self):
+        self.assertEqual(self.parse("7/15", (2025, 7, 15)), (datetime(2025, 7, 15).date(), datetime(2025, 7, 16).date()))
+
+    def test_past_range_means_next_year(self):
+        self.assertEqual(self.parse("7/1~7/3", (2025, 7, 15)), (datetime(2026, 7, 1).date(), datetime(2026, 7, 4).date()))
+
+    def test_reversed_range_crosses_the_year(self):
+        expected = (datetime(2025, 12, 30).date(), datetime(2026, 1, 3).date())
+        self.assertEqual(self.parse("12/30~1/2", (2025, 7, 15)), expected)
+        self.assertEqual(self.parse("12/30~1/2", (2025, 12, 31)), expected)
+        # 연초에는 작년 말부터 시작한 범위를 그대로 씁니다.
+        self.assertEqual(self.parse("12/30~1/2", (2026, 1, 2)), expected)
+        self.assertEqual(self.parse("12/30~1/2", (2026, 1, 3)), (datetime(2026, 12, 30).date(), datetime(2027, 1, 3).date()))
+
+    def test_bad_input(self):
+        for text in ("", "7월 10일", "13/1", "2/30", "7/10~7/", "7-10"):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                self.parse(text, (2025, 7, 15))
+
+
+if __name__ == "__main__":
+    unittest.main()
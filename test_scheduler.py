@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from scheduler import DeadlineScheduler
+
+
+def after(seconds: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+class DeadlineSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.fired = []
+
+        async def remember(kind, key, when):
+            self.fired.append((kind, key))
+
+        self.handlers = {
+            "reminder": lambda key, when: remember("reminder", key, when),
+            "delete": lambda key, when: remember("delete", key, when),
+        }
+        self.scheduler = DeadlineScheduler(self.handlers)
+        self.scheduler.start()
+
+    async def asyncTearDown(self):
+        await self.scheduler.close()
+
+    async def test_fires_in_deadline_order(self):
+        self.scheduler.schedule("delete", "1", after(0.15))
+        self.scheduler.schedule("reminder", "1", after(0.05))
+        self.scheduler.schedule("reminder", "2", after(0.1))
+        await asyncio.sleep(0.3)
+        self.assertEqual(self.fired, [("reminder", "1"), ("reminder", "2"), ("delete", "1")])
+        self.assertEqual(len(self.scheduler), 0)
+
+    async def test_reschedule_replaces_previous_deadline(self):
+        self.scheduler.schedule("reminder", "1", after(0.05))
+        later = after(0.2)
+        self.scheduler.schedule("reminder", "1", later)
+        self.assertEqual(self.scheduler.get("reminder", "1"), later)
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.fired, [])
+        await asyncio.sleep(0.2)
+        self.assertEqual(self.fired, [("reminder", "1")])
+
+    async def test_earlier_deadline_wakes_the_sleeping_task(self):
+        self.scheduler.schedule("delete", "1", after(60))
+        await asyncio.sleep(0.01)
+        self.scheduler.schedule("reminder", "2", after(0.05))
+        await asyncio.sleep(0.15)
+        self.assertEqual(self.fired, [("reminder", "2")])
+
+    async def test_cancel_and_cancel_all(self):
+        self.scheduler.schedule("reminder", "1", after(0.05))
+        self.scheduler.schedule("delete", "1", after(0.05))
+        self.scheduler.schedule("reminder", "2", after(0.05))
+        self.scheduler.cancel("reminder", "2")
+        self.scheduler.cancel_all("1")
+        self.scheduler.cancel("reminder", "3")  # 없는 예약은 무시합니다.
+        self.assertIsNone(self.scheduler.get("reminder", "1"))
+        await asyncio.sleep(0.15)
+        self.assertEqual(self.fired, [])
+
+    async def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            self.scheduler.schedule("archive", "1", after(1))
+
+    async def test_compacts_when_most_entries_are_stale(self):
+        for i in range(200):
+            self.scheduler.schedule("reminder", str(i), after(60))
+        for shift in range(3):
+            for i in range(200):
+                self.scheduler.schedule("reminder", str(i), after(120 + shift))  # 재예약마다 이전 항목이 무효가 됩니다.
+        self.assertEqual(len(self.scheduler), 200)
+        self.assertGreater(self.scheduler.get("reminder", "0"), after(121))
+        self.assertLessEqual(self.scheduler.stats()["heap_size"], 400)  # 정리하지 않으면 800개
+        for i in range(200):
+            self.scheduler.cancel("reminder", str(i))
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertLess(self.scheduler.stats()["heap_size"], 100)
+
+    async def test_close_waits_for_running_handlers(self):
+        finished = []
+
+        async def slow(key, when):
+            await asyncio.sleep(0.1)
+            finished.append(key)
+
+        async def stuck(key, when):
+            await asyncio.sleep(10)
+            finished.append(key)
+
+        scheduler = DeadlineScheduler({"slow": slow, "stuck": stuck})
+        scheduler.start()
+        scheduler.schedule("slow", "1", after(0))
+        scheduler.schedule("stuck", "2", after(0))
+        await asyncio.sleep(0.02)
+        self.assertEqual(scheduler.stats()["running"], 2)
+
+        await asyncio.wait_for(scheduler.close(timeout=0.5), timeout=1.0)
+        self.assertEqual(finished, ["1"])
+        self.assertEqual(scheduler.stats()["running"], 0)
+
+    async def test_close_stops_new_deadlines(self):
+        self.scheduler.schedule("reminder", "1", after(0.05))
+        await self.scheduler.close()
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.fired, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
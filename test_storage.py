@@ -0,0 +1,148 @@
+import os
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from storage import create_store, empty_state, serialize_state
+
+
+def make_party(owner_id: int, hours: int) -> dict:
+    party_time = datetime(2025, 7, 10, 12, tzinfo=timezone.utc) + timedelta(hours=hours)
+    return {
+        "dungeon": "브리레흐1-3관", "date": "7/10", "time": "21:00",
+        "reminder_time": party_time - timedelta(minutes=10), "party_time": party_time,
+        "embed_msg_id": 1000 + hours, "owner_id": owner_id, "participants": {},
+    }
+
+
+class StoreRoundTripTest(unittest.IsolatedAsyncioTestCase):
+    """봇이 하듯 메모리 상태를 고치고 변경을 기록한 뒤, 새 저장소로 다시 읽어 같은지 확인합니다."""
+
+    async def asyncSetUp(self):
+        base = os.path.join(tempfile.mkdtemp(), "1")
+        self.paths = {
+            "json_path": f"{base}.json", "db_path": f"{base}.db",
+            "journal_path": f"{base}.journal", "snapshot_path": f"{base}.snapshot.json",
+        }
+        self.state = empty_state()
+
+    def open_store(self, backend: str, **options):
+        return create_store(backend, lambda: self.state, **self.paths, **options)
+
+    async def mutate(self, store):
+        infos = self.state["party_infos"]
+        for thread_id, hours in (("10", 1), ("11", 2), ("12", 3)):
+            infos[thread_id] = make_party(owner_id=7, hours=hours)
+            store.party_created(thread_id, infos[thread_id])
+        infos["10"]["participants"]["100"] = "세인트바드"
+        store.participant_joined("10", 100, "세인트바드")
+        infos["10"]["participants"]["101"] = "다크메이지"
+        store.participant_joined("10", 101, "다크메이지")
+        del infos["10"]["participants"]["100"]
+        store.participant_left("10", 100)
+        infos["11"]["reminder_time"] = None
+        store.reminder_fired("11")
+        infos["11"]["time"] = "22:00"
+        store.party_edited("11", infos["11"])
+        del infos["12"]
+        store.party_removed("12")
+        self.state["role_message_id"] = 555
+        store.meta_changed("role_message_id", 555)
+        await store.close()
+
+    async def assert_round_trip(self, backend: str, **options):
+        await self.mutate(self.open_store(backend, **options))
+        loaded = self.open_store(backend, **options).load()
+        self.assertEqual(serialize_state(loaded), serialize_state(self.state))
+        self.assertEqual(loaded["party_infos"]["10"]["party_time"], self.state["party_infos"]["10"]["party_time"])
+
+    async def test_json_round_trip(self):
+        await self.assert_round_trip("json")
+
+    async def test_sqlite_round_trip(self):
+        await self.assert_round_trip("sqlite")
+
+    async def test_sqlite_imports_json_state_once(self):
+        self.state["party_infos"]["20"] = make_party(owner_id=8, hours=5)
+        self.state["party_infos"]["20"]["participants"] = {"200": "세인트바드", "201": "다크메이지"}
+        self.state["initial_message_id"] = 42
+        with open(self.paths["json_path"], "w", encoding="utf-8") as f:
+            json.dump(serialize_state(self.state), f)
+
+        store = self.open_store("sqlite")
+        loaded = store.load()
+        self.assertEqual(serialize_state(loaded), serialize_state(self.state))
+        # 가져온 뒤에는 SQLite가 원본입니다. 예전 JSON이 바뀌어도 다시 가져오지 않습니다.
+        loaded["party_infos"].pop("20")
+        store.party_removed("20")
+        await store.close()
+        with open(self.paths["json_path"], "w", encoding="utf-8") as f:
+            json.dump(serialize_state(empty_state()) | {"initial_message_id": 99}, f)
+
+        reloaded = self.open_store("sqlite").load()
+        self.assertEqual(reloaded["party_infos"], {})
+        self.assertEqual(reloaded["initial_message_id"], 42)
+
+    async def test_journal_round_trip(self):
+        await self.assert_round_trip("journal")
+
+    async def test_journal_round_trip_across_snapshots(self):
+        await self.assert_round_trip("journal", snapshot_every=3)
+        self.assertTrue(os.path.exists(self.paths["snapshot_path"]))
+
+    async def test_journal_skips_entries_already_in_snapshot(self):
+        """스냅샷을 쓴 뒤 journal을 비우기 전에 죽었으면, 스냅샷에 들어간 기록은 다시 적용하지 않습니다."""
+        store = self.open_store("journal", snapshot_every=2)
+        self.state["party_infos"]["10"] = make_party(owner_id=7, hours=1)
+        store.party_created("10", self.state["party_infos"]["10"])
+        self.state["party_infos"]["10"]["participants"]["100"] = "세인트바드"
+        store.participant_joined("10", 100, "세인트바드")
+        await store.close()
+        with open(self.paths["snapshot_path"], encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["journal_seq"], 2)
+
+        # 비워지기 전의 journal을 되살리고, 스냅샷 이후 기록 하나를 덧붙입니다.
+        entries = [
+            {"s": 1, "op": "party_created", "k": "10", "d": {"dungeon": "옛 던전", "participants": {}, "owner_id": 7}},
+            {"s": 2, "op": "participant_left", "k": "10", "d": "100"},
+            {"s": 3, "op": "participant_joined", "k": "10", "d": ["101", "다크메이지"]},
+        ]
+        with open(self.paths["journal_path"], "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+
+        store = self.open_store("journal")
+        loaded = store.load()
+        info = loaded["party_infos"]["10"]
+        self.assertEqual(info["dungeon"], "브리레흐1-3관")
+        self.assertEqual(info["participants"], {"100": "세인트바드", "101": "다크메이지"})
+        self.assertEqual(store.stats()["journal_seq"], 3)
+
+    async def test_journal_drops_torn_last_line(self):
+        store = self.open_store("journal")
+        self.state["party_infos"]["10"] = make_party(owner_id=7, hours=1)
+        store.party_created("10", self.state["party_infos"]["10"])
+        self.state["party_infos"]["10"]["participants"]["100"] = "세인트바드"
+        store.participant_joined("10", 100, "세인트바드")
+        await store.close()
+        intact_size = os.path.getsize(self.paths["journal_path"])
+        with open(self.paths["journal_path"], "ab") as f:
+            f.write(b'{"s":3,"op":"participant_joined","k":"10","d":["1')
+
+        store = self.open_store("journal")
+        self.assertEqual(serialize_state(store.load()), serialize_state(self.state))
+        self.assertEqual(os.path.getsize(self.paths["journal_path"]), intact_size)
+
+        # 잘라 낸 뒤에 덧붙인 기록은 다음 로드에서 정상적으로 재생됩니다.
+        self.state["party_infos"]["10"]["participants"]["101"] = "다크메이지"
+        store.participant_joined("10", 101, "다크메이지")
+        await store.close()
+        self.assertEqual(serialize_state(self.open_store("journal").load()), serialize_state(self.state))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            self.open_store("redis")
+
+
+if __name__ == "__main__":
+    unittest.main()
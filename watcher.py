@@ -1,67 +1,199 @@
-<<<<<<< HEAD
+import os
+import signal
 import subprocess
 import sys
+import threading
+from datetime import datetime
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import time
 
-class RestartOnChangeHandler(FileSystemEventHandler):
-    def __init__(self, script):
-        self.script = script
-        self.process = None
-        self.restart()
+# 이 폴더의 파일은 봇 프로세스 안에서 확장만 다시 불러옵니다. 그 밖의 .py 파일은 전체 재시작합니다.
+EXTENSIONS_DIR = "extensions"
+# 마지막 변경 이후 이 시간(초) 동안 조용해지면 모아 둔 변경을 한 번에 처리합니다. (저장 한 번에 이벤트가 여러 개 옴)
+DEBOUNCE_SECONDS = 1.0
+# 봇 실행과 관계없는 파일/폴더 (바뀌어도 재시작하지 않음)
+IGNORED_FILES = {"watcher.py", "bench.py", "loadsim.py", "test_env.py"}
+IGNORED_DIRS = {"__pycache__", ".git", ".venv", "venv", "state"}
+CHANGE_EVENTS = {"created", "modified", "moved", "deleted"}
 
-    def restart(self):
-        if self.process:
-            self.process.kill()
-            self.process.wait()
-        print(f"Starting {self.script} ...")
-        self.process = subprocess.Popen([sys.executable, self.script])
+# 종료 요청(SIGTERM, Windows는 `shutdown` 제어 명령) 후 이 시간(초) 안에 끝나지 않으면 강제 종료합니다.
+# 봇은 이 안에서 진행 중인 처리를 마무리하고(core.SHUTDOWN_DRAIN_TIMEOUT) 상태를 저장합니다.
+DRAIN_TIMEOUT = 20.0
+# 비정상 종료 후 재시작 대기 시간: 1초부터 두 배씩, 최대 60초. 이 시간 이상 살아 있었으면 처음으로 되돌립니다.
+BACKOFF_INITIAL = 1.0
+BACKOFF_MAX = 60.0
+STABLE_UPTIME = 60.0
 
-    def on_any_event(self, event):
-        if event.src_path.endswith(".py"):
-            print(f"Detected change in {event.src_path}, restarting...")
-            self.restart()
+# 시작/종료/재시작 기록
+SUPERVISOR_LOG = "watcher.log"
 
-if __name__ == "__main__":
-    path = "."  # 현재 디렉터리 감시
-    script = "main.py"  # 실행할 봇 스크립트 이름
 
-    event_handler = RestartOnChangeHandler(script)
-    observer = Observer()
-    observer.schedule(event_handler, path=path, recursive=True)
-    observer.start()
-    print(f"Watching directory {path} for changes...")
+def log_event(message: str):
+    line = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}"
+    print(line)
     try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
-=======
-import subprocess
-import sys
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-import time
+        with open(SUPERVISOR_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass
+
+
+def extension_name(path: str):
+    """확장 파일 경로면 `extensions.party` 같은 모듈 이름을, 아니면 None을 반환합니다."""
+    rel = os.path.relpath(os.path.abspath(path))
+    parts = rel.replace(os.sep, "/").split("/")
+    if len(parts) == 2 and parts[0] == EXTENSIONS_DIR and parts[1] != "__init__.py":
+        return f"{EXTENSIONS_DIR}.{parts[1][:-3]}"
+    return None
+
+
+def is_watched(path: str) -> bool:
+    """봇 코드(.py)이고 무시 목록에 없는 파일인지 확인합니다."""
+    if not path.endswith(".py"):
+        return False
+    parts = os.path.relpath(os.path.abspath(path)).replace(os.sep, "/").split("/")
+    if any(part in IGNORED_DIRS or part.startswith(".") for part in parts[:-1]):
+        return False
+    return parts[-1] not in IGNORED_FILES and not parts[-1].startswith(".")
+
 
 class RestartOnChangeHandler(FileSystemEventHandler):
+    """파일 변경을 모아 두었다가(디바운스) 확장 다시 로드 또는 전체 재시작으로 처리하고,
+    봇이 죽으면 지수 백오프로 다시 띄우는 감시자."""
+
     def __init__(self, script):
         self.script = script
         self.process = None
-        self.restart()
+        self.started_at = None
+        self.restarts = 0
+        self.crashes = 0
+        self.backoff = BACKOFF_INITIAL
+        self._stop_requested = False   # 감시자가 직접 종료를 요청했는지 (요청한 종료는 비정상 종료가 아님)
 
-    def restart(self):
-        if self.process:
+        self._lock = threading.Lock()
+        self._pending_extensions = set()
+        self._pending_restart = None   # 재시작이 필요한 변경 파일 경로
+        self._last_event = 0.0
+        self.start()
+
+    # --- 프로세스 관리 ---
+    def start(self):
+        print(f"Starting {self.script} ...")
+        # 봇이 표준 입력으로 제어 명령(확장 다시 로드, 종료)을 받도록 합니다.
+        env = dict(os.environ, BOT_CONTROL_STDIN="1")
+        self.process = subprocess.Popen([sys.executable, self.script], stdin=subprocess.PIPE, text=True, env=env)
+        self._stop_requested = False
+        self.started_at = time.monotonic()
+        log_event(f"시작 pid={self.process.pid} (재시작 {self.restarts}회, 비정상 종료 {self.crashes}회)")
+
+    def uptime(self) -> float:
+        return time.monotonic() - self.started_at if self.started_at else 0.0
+
+    def send_control(self, line: str) -> bool:
+        try:
+            self.process.stdin.write(line + "\n")
+            self.process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError, ValueError):
+            return False
+
+    def stop(self, reason: str):
+        """SIGTERM(Windows는 `shutdown` 명령)으로 정상 종료를 요청하고, DRAIN_TIMEOUT 안에 끝나지 않으면 강제 종료합니다."""
+        if self.process is None or self.process.poll() is not None:
+            return
+        self._stop_requested = True
+        uptime = self.uptime()
+        if os.name == "nt":
+            requested = self.send_control("shutdown")
+        else:
+            self.process.send_signal(signal.SIGTERM)
+            requested = True
+        try:
+            if not requested:
+                raise subprocess.TimeoutExpired(self.script, 0)
+            self.process.wait(timeout=DRAIN_TIMEOUT)
+            how = "정상 종료"
+        except subprocess.TimeoutExpired:
             self.process.kill()
             self.process.wait()
-        print(f"Starting {self.script} ...")
-        self.process = subprocess.Popen([sys.executable, self.script])
+            how = "강제 종료"
+        log_event(f"{how} pid={self.process.pid} 사유={reason} 가동 {uptime:.0f}초 종료 코드={self.process.returncode}")
+
+    def restart(self, reason: str):
+        self.stop(reason)
+        self.restarts += 1
+        self.backoff = BACKOFF_INITIAL
+        self.start()
 
+    def reload_extension(self, name: str):
+        """실행 중인 봇에 확장 하나만 다시 불러오라고 알립니다. 알릴 수 없으면 전체 재시작합니다."""
+        if self.process is None or self.process.poll() is not None or not self.send_control(f"reload {name}"):
+            self.restart(f"{name} 다시 로드 실패")
+            return
+        log_event(f"확장 다시 로드 요청 pid={self.process.pid} {name}")
+
+    # --- 파일 이벤트 (감시 스레드) ---
     def on_any_event(self, event):
-        if event.src_path.endswith(".py"):
-            print(f"Detected change in {event.src_path}, restarting...")
-            self.restart()
+        # 파일을 열기만 해도(봇이 시작하며 .py를 읽을 때) opened/closed 이벤트가 오므로 내용 변경만 봅니다.
+        if event.is_directory or event.event_type not in CHANGE_EVENTS:
+            return
+        paths = [event.src_path] + ([event.dest_path] if getattr(event, "dest_path", None) else [])
+        for path in paths:
+            if not is_watched(path):
+                continue
+            name = extension_name(path)
+            with self._lock:
+                if name and event.event_type != "deleted":
+                    self._pending_extensions.add(name)
+                else:
+                    self._pending_restart = path
+                self._last_event = time.monotonic()
+
+    # --- 주기 작업 (메인 스레드) ---
+    def tick(self):
+        """모아 둔 변경을 처리하고, 봇이 죽었으면 백오프 후 다시 띄웁니다."""
+        with self._lock:
+            ready = (self._pending_restart or self._pending_extensions) and time.monotonic() - self._last_event >= DEBOUNCE_SECONDS
+            if ready:
+                restart_path, extensions = self._pending_restart, sorted(self._pending_extensions)
+                self._pending_restart, self._pending_extensions = None, set()
+        if ready:
+            if restart_path:
+                print(f"Detected change in {restart_path}, restarting...")
+                self.restart(f"변경 {restart_path}")
+            else:
+                for name in extensions:
+                    print(f"Detected change in {name}, reloading...")
+                    self.reload_extension(name)
+
+        if self.process.poll() is not None:
+            self.handle_exit()
+
+    def handle_exit(self):
+        """봇이 스스로 끝났을 때 처리합니다.
+
+        종료 코드 0(정상 종료 절차, `shutdown` 명령, 리더 임대를 넘겨준 경우)이면 비정상 종료로 세지 않고
+        바로 다시 띄웁니다. (리더를 넘겨준 프로세스는 대기 프로세스로 돌아갑니다)
+        """
+        if self._stop_requested:
+            return
+        uptime = self.uptime()
+        code = self.process.returncode
+        if code == 0:
+            log_event(f"정상 종료 감지 pid={self.process.pid} 가동 {uptime:.0f}초, 바로 다시 시작")
+            self.backoff = BACKOFF_INITIAL
+            self.restarts += 1
+            self.start()
+            return
+        if uptime >= STABLE_UPTIME:
+            self.backoff = BACKOFF_INITIAL
+        self.crashes += 1
+        log_event(f"비정상 종료 감지 pid={self.process.pid} 종료 코드={code} 가동 {uptime:.0f}초, {self.backoff:.0f}초 후 재시작")
+        time.sleep(self.backoff)
+        self.backoff = min(self.backoff * 2, BACKOFF_MAX)
+        self.restarts += 1
+        self.start()
 
 if __name__ == "__main__":
     path = "."  # 현재 디렉터리 감시
@@ -74,8 +206,9 @@ if __name__ == "__main__":
     print(f"Watching directory {path} for changes...")
     try:
         while True:
-            time.sleep(1)
+            time.sleep(0.2)
+            event_handler.tick()
     except KeyboardInterrupt:
         observer.stop()
+        event_handler.stop("감시 종료")
     observer.join()
->>>>>>> 950864be99e42392aff6563d3097bc194b660368